@@ -0,0 +1,124 @@
+# Standard Library
+import csv
+import multiprocessing
+import os
+import time
+from collections import deque
+from multiprocessing.connection import wait
+
+# Local Modules
+from Constants import *
+
+'''Batch of independent jobs (the simulations of many SBML files, with one or more
+engines) run on a pool of at most workers processes. Every job is run by a process of
+its own, started when a worker is free, so a pool of workers processes keeps all the
+cores busy until the last jobs, whatever their durations:
+    - a job that fails reports its error in its result, the other jobs go on;
+    - a job that is still running after its timeout is killed, and reported as such;
+    - a job that ends without a result (e.g. killed by the system) is reported as failed.
+The processes of the jobs are not daemonic, so a job can have a pool of its own (the
+workers of an Ensemble). The result of a job is its status, a string returned by its
+function, its duration and whether it failed; the results are collected in a summary
+table, printed and saved to CSV.'''
+
+SUMMARY_COLUMNS = ("file", "engine", "status", "seconds")
+
+
+class Job:
+    def __init__(self, file, engine, function, args=(), timeout=None):
+        if timeout is not None and timeout <= 0:
+            raise Exception("The timeout of a job must be greater than 0.")
+        self.file = file
+        self.engine = engine
+        self.function = function
+        self.args = args
+        self.timeout = timeout
+
+    '''This method returns the row of the job in the summary table.'''
+    def result(self, status, seconds, failed=False):
+        return {"file": self.file, "engine": self.engine, "status": status, "seconds": round(seconds, 3),
+                "failed": failed}
+
+
+'''This function is run by the process of a job: it sends to the scheduler the status
+returned by the function of the job, or its error, and whether it failed.'''
+def run_job(connection, function, args):
+    try:
+        result = (function(*args), False)
+    except Exception as e:
+        result = (STATUS_FAILED.format(e), True)
+    try:
+        connection.send(result)
+    finally:
+        connection.close()
+
+'''This function runs the jobs on at most workers processes and returns their results,
+in the order of the jobs. A result is reported by report(result), if given, as soon as
+the job ends.'''
+def run_jobs(jobs, workers=None, report=None):
+    workers = workers or os.cpu_count()
+    pending = deque(enumerate(jobs))
+    running = {}        # Receiving end of the pipe of a job -> (index, process, start)
+    results = [None] * len(jobs)
+
+    def finish(receiver, status, failed):
+        index, process, start = running.pop(receiver)
+        receiver.close()
+        process.join()
+        results[index] = jobs[index].result(status, time.perf_counter() - start, failed)
+        if report is not None:
+            report(results[index])
+
+    try:
+        while pending or running:
+            while pending and len(running) < workers:
+                index, job = pending.popleft()
+                receiver, sender = multiprocessing.Pipe(duplex=False)
+                process = multiprocessing.Process(target=run_job, args=(sender, job.function, job.args),
+                                                  name=f"{job.file}:{job.engine}")
+                process.start()
+                sender.close()      # The pipe is closed, and readable, when the process ends
+                running[receiver] = (index, process, time.perf_counter())
+
+            # Wait for a job to end, or for the first timeout to expire
+            deadlines = [start + jobs[index].timeout for index, _, start in running.values()
+                         if jobs[index].timeout is not None]
+            timeout = max(0.0, min(deadlines) - time.perf_counter()) if deadlines else None
+            for receiver in wait(list(running), timeout):
+                try:
+                    status, failed = receiver.recv()
+                except EOFError:
+                    running[receiver][1].join()
+                    status, failed = STATUS_FAILED.format(f"exit code {running[receiver][1].exitcode}"), True
+                finish(receiver, status, failed)
+
+            now = time.perf_counter()
+            for receiver, (index, process, start) in list(running.items()):
+                if jobs[index].timeout is not None and now >= start + jobs[index].timeout:
+                    process.kill()
+                    finish(receiver, STATUS_TIMEOUT.format(jobs[index].timeout), True)
+    finally:
+        # Interrupted: the jobs still running are killed
+        for receiver, (_, process, _) in running.items():
+            process.kill()
+            process.join()
+            receiver.close()
+    return results
+
+'''This function returns the summary table of the results, with aligned columns.'''
+def format_summary(results):
+    rows = [SUMMARY_COLUMNS] + [tuple(str(result[column]) for column in SUMMARY_COLUMNS) for result in results]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(SUMMARY_COLUMNS))]
+    lines = ["  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip() for row in rows]
+    lines.insert(1, "  ".join("-" * width for width in widths))
+    return "\n".join(lines)
+
+'''This function writes the summary table of the results to a CSV file.'''
+def write_summary_csv(results, csv_path):
+    directory = os.path.dirname(csv_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(csv_path, mode='w', newline='') as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=SUMMARY_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(results)
@@ -0,0 +1,182 @@
+# Standard Library
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+# Local Modules
+from Constants import *
+from Gillespie_events import Gillespie
+from Gillespie_vectorized import GillespieVectorized
+from Gillespie_jit import GillespieJit
+from Reaction_selection import SELECTION_STRATEGIES
+import Parser
+
+
+'''This function evaluates every kinetic law and every trigger of the model as
+the simulator did before the compiled expressions: the string is parsed by eval()
+and a new scope is merged from species and parameters at every evaluation.'''
+def evaluate_strings(parser, repetitions):
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        for r in parser.reactions:
+            local_scope = {**parser.species, **parser.parameters, TIME: 0.0}
+            eval(r[RATE_FORMULA], SAFE_GLOBALS_RATE, local_scope)
+        for event in parser.events:
+            local_scope = {**parser.species, **parser.parameters, TIME: 0.0}
+            eval(event[TRIGGER_FORMULA], SAFE_GLOBALS_BASE, local_scope)
+    return time.perf_counter() - start
+
+'''This function evaluates the same expressions through the code objects compiled
+by the parser and the persistent namespace of the simulator.'''
+def evaluate_compiled(parser, repetitions):
+    gillespie_sim = Gillespie(parser, 0)
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        for r in parser.reactions:
+            gillespie_sim.evaluate_expr(r[RATE_CODE], ERROR_KINETIC_LAW, 0.0, SAFE_GLOBALS_RATE)
+        for event in parser.events:
+            gillespie_sim.evaluate_expr(event[TRIGGER_CODE], ERROR_TRIGGER, 0.0)
+    return time.perf_counter() - start
+
+'''This function runs a full simulation with the engine (Gillespie by default) and
+returns the wall time and the number of steps recorded in the evolution.'''
+def run_simulation(file_path, file_path_csv, t_max, engine=Gillespie, **options):
+    model = Parser.Parser(str(file_path), file_path_csv).get_model_spec()
+    start = time.perf_counter()
+    gillespie_sim = engine(model, t_max, **options)
+    gillespie_sim.gillespie_ssa()
+    elapsed = time.perf_counter() - start
+    return elapsed, len(gillespie_sim.get_evolution()[TIME]) - 1
+
+CHAIN_AMOUNT = 1000     # Initial amount of the first species of a synthetic chain
+
+'''This function writes to path a synthetic SBML model with the reversible chain
+S0 <-> S1 <-> ... <-> S(n-1): 2 (n - 1) mass-action reactions whose rate constants span
+three orders of magnitude, so that few reactions fire most of the times (the case of
+the sorted-direct and composition-rejection strategies) as in large networks.'''
+def write_chain_model(n, path):
+    species = "".join(f'<species id="S{i}" compartment="cell" initialAmount="{CHAIN_AMOUNT if i == 0 else 0}" '
+                      f'substanceUnits="item" hasOnlySubstanceUnits="true" boundaryCondition="false" '
+                      f'constant="false"/>' for i in range(n))
+    parameters, reactions = [], []
+    for j, (source, target) in enumerate([(i, i + 1) for i in range(n - 1)] + [(i + 1, i) for i in range(n - 1)]):
+        parameters.append(f'<parameter id="k{j}" value="{10 ** (-3 * j / (2 * n)):.6g}" units="per_day" '
+                          f'constant="true"/>')
+        reactions.append(
+            f'<reaction id="R{j}" reversible="false">'
+            f'<listOfReactants><speciesReference species="S{source}" stoichiometry="1"/></listOfReactants>'
+            f'<listOfProducts><speciesReference species="S{target}" stoichiometry="1"/></listOfProducts>'
+            f'<kineticLaw><math xmlns="http://www.w3.org/1998/Math/MathML"><apply><times/><ci> k{j} </ci>'
+            f'<apply><power/><ci> S{source} </ci><cn type="real"> 1 </cn></apply></apply></math></kineticLaw>'
+            f'</reaction>')
+    with open(path, "w") as sbml_file:
+        sbml_file.write(
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<sbml xmlns="http://www.sbml.org/sbml/level2/version4" level="2" version="4">'
+            f'<model id="chain_{n}"><listOfUnitDefinitions><unitDefinition id="per_day"><listOfUnits>'
+            '<unit kind="second" multiplier="86400" scale="0" exponent="1"/></listOfUnits></unitDefinition>'
+            '</listOfUnitDefinitions><listOfCompartments><compartment id="cell" size="1" constant="true"/>'
+            f'</listOfCompartments><listOfSpecies>{species}</listOfSpecies>'
+            f'<listOfParameters>{"".join(parameters)}</listOfParameters>'
+            f'<listOfReactions>{"".join(reactions)}</listOfReactions></model></sbml>')
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark of the Gillespie simulator on SBML files."
+    )
+    parser.add_argument(
+        '--filesbml',
+        type=Path,
+        nargs='+',
+        required=True,
+        help="One or more SBML file paths to benchmark"
+    )
+    parser.add_argument(
+        "--t_max",
+        type=float,
+        default=10.0,
+        help="T_MAX limit for the simulations"
+    )
+    parser.add_argument(
+        "--repetitions",
+        type=int,
+        default=10000,
+        help="Number of evaluations of every expression"
+    )
+    parser.add_argument(
+        "--selection",
+        choices=SELECTION_STRATEGIES.keys(),
+        nargs='*',
+        default=list(SELECTION_STRATEGIES.keys()),
+        help="Reaction selection strategies to compare"
+    )
+    parser.add_argument(
+        "--chain",
+        type=int,
+        nargs='*',
+        default=[],
+        help="Numbers of species of synthetic reversible chains added to the files (see write_chain_model)"
+    )
+    args = parser.parse_args()
+
+    chain_directory = tempfile.TemporaryDirectory()
+    for n in args.chain:
+        if n < 2:
+            parser.error("--chain needs at least 2 species")
+        path = Path(chain_directory.name) / f"chain_{n}.xml"
+        write_chain_model(n, path)
+        args.filesbml.append(path)
+
+    current_dir = os.path.dirname(__file__)
+    file_path_csv = os.path.join(current_dir, "..", "Example", "Inference_of_stochastic_rate_constant")
+
+    print(f"{'file':<40}{'eval(str) [s]':>15}{'compiled [s]':>15}{'speedup':>10}{'SSA [s]':>10}{'steps/s':>12}")
+    for file_path in [p.resolve() for p in args.filesbml]:
+        try:
+            parser_instance = Parser.Parser(str(file_path), file_path_csv)
+            before = evaluate_strings(parser_instance, args.repetitions)
+            after = evaluate_compiled(parser_instance, args.repetitions)
+            elapsed, steps = run_simulation(file_path, file_path_csv, args.t_max)
+            print(f"{file_path.name:<40}{before:>15.3f}{after:>15.3f}{before / after:>10.2f}"
+                  f"{elapsed:>10.3f}{steps / elapsed if elapsed > 0 else 0:>12.0f}")
+        except Exception as e:
+            print(f"{RED}[SKIP] {file_path.name}: {e}{RESET}")
+
+    # Steps per second of the direct method with every reaction selection strategy
+    print(f"\n{'file':<40}{'reactions':>10}" + "".join(f"{name:>24}" for name in args.selection))
+    for file_path in [p.resolve() for p in args.filesbml]:
+        try:
+            reactions = len(Parser.Parser(str(file_path), file_path_csv).reactions)
+            row = f"{file_path.name:<40}{reactions:>10}"
+            for name in args.selection:
+                elapsed, steps = run_simulation(file_path, file_path_csv, args.t_max, selection=name)
+                row += f"{steps / elapsed if elapsed > 0 else 0:>24.0f}"
+            print(row)
+        except Exception as e:
+            print(f"{RED}[SKIP] {file_path.name}: {e}{RESET}")
+
+    # Steps per second of the engines, with the kernel of the jit engine compiled in advance
+    engines = {"direct": Gillespie, "vectorized": GillespieVectorized, "jit": GillespieJit}
+    print(f"\n{'file':<40}" + "".join(f"{name:>16}" for name in engines) + f"{'jit speedup':>16}")
+    for file_path in [p.resolve() for p in args.filesbml]:
+        try:
+            model = Parser.Parser(str(file_path), file_path_csv).get_model_spec()
+            if GillespieJit(model, 0).uses_kernel:
+                run_simulation(file_path, file_path_csv, args.t_max / 100, GillespieJit)
+            row = f"{file_path.name:<40}"
+            speeds = {}
+            for name, engine in engines.items():
+                elapsed, steps = run_simulation(file_path, file_path_csv, args.t_max, engine)
+                speeds[name] = steps / elapsed if elapsed > 0 else 0
+                row += f"{speeds[name]:>16.0f}"
+            if GillespieJit(model, 0).uses_kernel:
+                row += f"{speeds['jit'] / speeds['direct'] if speeds['direct'] > 0 else 0:>16.2f}"
+            else:
+                row += f"{'fallback':>16}"
+            print(row)
+        except Exception as e:
+            print(f"{RED}[SKIP] {file_path.name}: {e}{RESET}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+# Standard Library
+import os
+import pickle
+
+# Third part libraries
+import numpy as np
+
+'''Checkpoints of long simulations. A checkpoint is the whole state of an engine
+between two steps, pickled in a binary file: the time, the amounts of the species,
+the parameters, the pending delayed events, the value of every trigger at the previous
+step and the values captured at trigger time, the state of the random numbers (the
+Generator and the numbers of the current blocks not used yet, see Random_stream), the
+trajectory recorded so far and the model itself (a ModelSpec, plain data). The arrays
+are pickled as raw bytes and only in the used part, so the file is compact.
+A simulation restored from a checkpoint continues exactly as the one that saved it:
+its trajectory is the same as the one of an uninterrupted run. The engines save a
+checkpoint every checkpoint_interval seconds and when their wall-clock budget runs out
+(see Gillespie.out_of_time); a warmed-up simulation can also be forked in many
+replicates, each one with its own stream of random numbers.'''
+
+CHECKPOINT_VERSION = 1      # Changed when the format of the checkpoints changes
+CHECKPOINT_INTERVAL = 60.0  # Default seconds between two checkpoints
+
+'''This function saves the checkpoint of a simulation in a file. The checkpoint is
+written to a temporary file and renamed, so that a crash while saving never leaves a
+damaged checkpoint in place of the previous one.'''
+def save_checkpoint(simulation, path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, "wb") as checkpoint_file:
+        pickle.dump((CHECKPOINT_VERSION, simulation), checkpoint_file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary_path, path)
+
+'''This function returns the simulation saved in a checkpoint file: calling its
+gillespie_ssa() continues the run.'''
+def load_checkpoint(path):
+    with open(path, "rb") as checkpoint_file:
+        version, simulation = pickle.load(checkpoint_file)
+    if version != CHECKPOINT_VERSION:
+        raise Exception(f"Checkpoint {path} has version {version}, expected {CHECKPOINT_VERSION}.")
+    return simulation
+
+'''This function forks a simulation (or the checkpoint file of a simulation) in
+replicates independent copies, that continue from its state with the streams of random
+numbers of the children of the SeedSequence of seed. The trajectory recorded before
+the fork is kept by every copy.'''
+def fork_checkpoint(simulation, replicates, seed=None):
+    if isinstance(simulation, (str, os.PathLike)):
+        simulation = load_checkpoint(simulation)
+    data = pickle.dumps(simulation, protocol=pickle.HIGHEST_PROTOCOL)
+    forks = []
+    for child in np.random.SeedSequence(seed).spawn(replicates):
+        fork = pickle.loads(data)
+        fork.set_rng(child)
+        forks.append(fork)
+    return forks
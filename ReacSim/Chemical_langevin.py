@@ -0,0 +1,48 @@
+# Third part libraries
+import numpy as np
+
+# Local Modules
+from Gillespie_vectorized import *
+
+'''Chemical Langevin Equation integrated with the Euler-Maruyama scheme:
+    x(t + h) = x(t) + S^T (a(x) h + sqrt(a(x) h) N(0, 1))
+where S is the net stoichiometry matrix and a(x) the mass-action propensities.
+The amounts are continuous and are kept non negative. It approximates the SSA when
+all the populations are large, at a cost per step that does not depend on the number
+of molecules. A step never crosses t_max, the time of a pending delayed event or
+the time at which a trigger that depends on time becomes True, and the events are
+handled at the end of each step as in Gillespie.gillespie_ssa.'''
+
+class ChemicalLangevin(GillespieVectorized):
+    def __init__(self, model, t_max, dt=None, **kwargs):
+        super().__init__(model, t_max, **kwargs)
+        self.dt = dt if dt is not None else t_max / DEFAULT_STEPS
+        if self.dt <= 0:
+            raise Exception("The step of the Langevin simulation must be greater than 0.")
+
+    '''This method prepares a new run (see Gillespie.reset), with continuous amounts.'''
+    def reset(self, species=None, parameters=None, rng=None):
+        super().reset(species, parameters, rng)
+        self.state = self.state.astype(float)
+
+    '''This method simulates an approximate trajectory integrating the Chemical
+    Langevin Equation, extended to support SBML events and delays.'''
+    def gillespie_ssa(self):
+        self.start_budget()
+        while self.t < self.t_max and not self.out_of_time():
+            a0 = self.compute_propensities()
+            if a0 == 0:
+                break
+
+            h = self.next_event_horizon(self.t + self.dt) - self.t
+            drift = self.propensities * h
+            noise = np.sqrt(drift) * self.rng.generator.standard_normal(len(drift))
+            self.state += (drift + noise) @ self.stoichiometry
+            np.maximum(self.state, 0, out=self.state)
+            self.sync_species()
+
+            # The events at the end of the step are handled as in the SSA
+            if self.process_events(h):
+                self.last_fired = None
+            # Updating the evolution of species
+            self.record_state()
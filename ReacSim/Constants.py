@@ -1,6 +1,5 @@
 import os
 
-import libsbml
 import math
 import operator
 
@@ -10,32 +9,46 @@ ID = "id"
 REACTANTS = "reactants"
 PRODUCTS = "products"
 RATE_FORMULA = "rate_formula"
+RATE_CODE = "rate_code"
+RATE_CONSTANT = "rate_constant"
+REACTANT_ORDERS = "reactant_orders"
+FAST = "fast"
 
-TYPE_NUMBER = (libsbml.AST_INTEGER, libsbml.AST_REAL,
-               libsbml.AST_REAL_E, libsbml.AST_RATIONAL)
+# stoichiometry
+SPECIES_IDS = "species_ids"
+ORDERS_MATRIX = "orders_matrix"
+STOICHIOMETRY_MATRIX = "stoichiometry_matrix"
+REACTANTS_MATRIX = "reactants_matrix"
+PRODUCTS_MATRIX = "products_matrix"
+RATE_CONSTANTS = "rate_constants"
+RATE_CONSTANT_VALUES = "rate_constant_values"
+STATE_VECTOR = "state_vector"
 
 # event
 TRIGGER_FORMULA = "trigger_formula"
+TRIGGER_CODE = "trigger_code"
+TRIGGER_DEPENDENCIES = "trigger_dependencies"
 PREVIOUS = "previous"
 IS_TIME = "is_time_trigger"
+TRIGGER_TREE = "trigger_tree"
+TRIGGER_TRANSITIONS = "trigger_transitions"
 LIST_OF_EVENT_ASSIGMENT = "list_of_event_assigment"
 DELAY_FORMULA = "delay_formula"
+DELAY_CODE = "delay_code"
+EVENT_ASSIGNMENT_FORMULAS = "event_assignment_formulas"
+EVENT_ASSIGNMENT_CODES = "event_assignment_codes"
 PRIORITY = "priority"
 USE_VALUES_FROM_TRIGGER_TIME = "use_values_from_trigger_time"
 VALUES_FROM_TRIGGER_TIME = "values_from_trigger_time"
 
-TYPE_TRIGGER_LOGICAL = (libsbml.AST_LOGICAL_AND, libsbml.AST_LOGICAL_OR,
-              libsbml.AST_LOGICAL_NOT, libsbml.AST_LOGICAL_XOR)
+# steps of the engines with a step (dt) or a sampling grid, when it is not given
+DEFAULT_STEPS = 1000
 
-TYPE_TRIGGER_RELATIONAL = (libsbml.AST_RELATIONAL_EQ, libsbml.AST_RELATIONAL_GEQ,
-              libsbml.AST_RELATIONAL_GT, libsbml.AST_RELATIONAL_LEQ,
-              libsbml.AST_RELATIONAL_LT,libsbml.AST_RELATIONAL_NEQ)
-
-TYPE_TRIGGER = TYPE_TRIGGER_LOGICAL + TYPE_TRIGGER_RELATIONAL
-
-TYPE_CODE = (libsbml.SBML_PARAMETER, libsbml.SBML_SPECIES, libsbml.SBML_COMPARTMENT)
-
-TYPE_OP = (libsbml.AST_PLUS, libsbml.AST_MINUS)
+# simulation status
+STATUS_COMPLETED = "completed"
+STATUS_TRUNCATED = "truncated at t={:g}"
+STATUS_FAILED = "failed: {}"
+STATUS_TIMEOUT = "timeout after {:g} s"
 
 ERROR_KINETIC_LAW = "Kinetic Law"
 ERROR_TRIGGER = "Trigger"
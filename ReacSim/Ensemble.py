@@ -0,0 +1,247 @@
+# Standard Library
+import csv
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+# Third part libraries
+import numpy as np
+
+# Local Modules
+from Constants import *
+from Gillespie_events import Gillespie
+from Gillespie_batched import GillespieBatched
+from Trajectory_recorder import time_grid
+from Trajectory_sink import StoreSink
+
+'''Ensemble of independent replicates of a stochastic simulation. The replicates are
+spread over a pool of processes, each one is recorded on the same grid of times and
+is folded in the statistics as soon as it is completed, so the trajectories are never
+held all together in memory:
+    - mean and variance with the Welford algorithm;
+    - quantiles with the P^2 algorithm of Jain and Chlamtac (1985), that estimates
+      a quantile from 5 markers without storing the observations.
+The model is given as a ModelSpec (see Model_spec), parsed once: it is plain data,
+so the workers receive it pickled with the arguments of the replicates.
+Every replicate gets its own stream of random numbers, seeded with a child of the
+NumPy SeedSequence of a single master seed: the ensemble is reproducible, whatever
+the number of workers.
+With the GillespieBatched engine the replicates are run in batches of BATCH_SIZE,
+advanced together by a single simulation; the seeds are then derived per batch. The
+batches are always sampled on the grid of the ensemble: the only options passed to
+the engine are those of BATCHED_OPTIONS, the others are rejected.
+With a store path, every replicate is also written, on the grid, to a trajectory store
+(see Trajectory_store) as soon as it is folded in the statistics.'''
+
+DEFAULT_QUANTILES = (0.05, 0.5, 0.95)
+BATCH_SIZE = 256
+BATCHED_OPTIONS = ("max_wall_time",)   # Options of GillespieBatched not set by the ensemble
+
+'''This function runs a single replicate of the model (a ModelSpec) and returns the
+amounts of the species on the grid (one row per time, one column per species).
+If a simulation of the model is given, it is reset and used for the replicate.'''
+def run_replicate(model, t_max, engine, options, grid, seed, simulation=None):
+    if simulation is None:
+        simulation = engine(model, t_max, **{**options, "recording": "grid", "grid": grid, "rng": seed})
+    else:
+        simulation.reset(rng=seed)
+    simulation.gillespie_ssa()
+    evolution = simulation.get_evolution()
+    return np.column_stack([evolution[s_id] for s_id in model.species]).astype(float)
+
+'''This function runs a batch of replicates of the model (a ModelSpec) with the
+GillespieBatched engine and returns their amounts on the grid (replicate x time x species).'''
+def run_batch(model, t_max, engine, options, grid, seed, replicates):
+    simulation = engine(model, t_max, **{**options, "replicates": replicates, "grid": grid, "rng": seed})
+    simulation.gillespie_ssa()
+    return simulation.get_counts().astype(float)
+
+'''This function derives the seeds of the replicates from the master seed: the children
+of its SeedSequence, that give independent streams of random numbers.'''
+def replicate_seeds(seed, replicates):
+    return np.random.SeedSequence(seed).spawn(replicates)
+
+
+'''Streaming mean and variance (Welford) of arrays of observations of the same shape.'''
+class RunningMoments:
+    def __init__(self, shape):
+        self.count = 0
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    '''This method returns the unbiased sample variance (0 with less than 2 observations).'''
+    def variance(self):
+        if self.count < 2:
+            return np.zeros_like(self.m2)
+        return self.m2 / (self.count - 1)
+
+
+'''Streaming estimate of the p-quantile with the P^2 algorithm, for arrays of
+observations of the same shape (one independent estimator for every element).
+The first 5 observations are kept to initialize the markers.'''
+class RunningQuantile:
+    def __init__(self, p, shape):
+        self.p = p
+        self.count = 0
+        self.heights = np.zeros((5,) + shape)
+        self.positions = np.tile(np.arange(1.0, 6.0).reshape((5,) + (1,) * len(shape)), (1,) + shape)
+        self.desired = np.array([1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5])
+        self.increments = np.array([0, p / 2, p, (1 + p) / 2, 1])
+
+    def add(self, x):
+        if self.count < 5:
+            self.heights[self.count] = x
+            self.count += 1
+            if self.count == 5:
+                self.heights.sort(axis=0)
+            return
+        self.count += 1
+        q, n = self.heights, self.positions
+
+        # Cell of the observation, and update of the extreme markers
+        k = (x[None] >= q[1:4]).sum(axis=0)
+        np.minimum(q[0], x, out=q[0])
+        np.maximum(q[4], x, out=q[4])
+        for i in range(1, 5):
+            n[i] += i > k
+        self.desired += self.increments
+
+        # Adjustment of the middle markers with the parabolic (or linear) formula
+        for i in range(1, 4):
+            d = self.desired[i] - n[i]
+            move = ((d >= 1) & (n[i + 1] - n[i] > 1)) | ((d <= -1) & (n[i - 1] - n[i] < -1))
+            if not move.any():
+                continue
+            s = np.where(d >= 0, 1.0, -1.0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                parabolic = q[i] + s / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + s) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+                    (n[i + 1] - n[i] - s) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                neighbour = np.where(s > 0, q[i + 1], q[i - 1])
+                neighbour_position = np.where(s > 0, n[i + 1], n[i - 1])
+                linear = q[i] + s * (neighbour - q[i]) / (neighbour_position - n[i])
+            inside = (q[i - 1] < parabolic) & (parabolic < q[i + 1])
+            q[i] = np.where(move, np.where(inside, parabolic, linear), q[i])
+            n[i] += np.where(move, s, 0.0)
+
+    '''This method returns the estimate of the quantile (exact with less than 5 observations).'''
+    def value(self):
+        if self.count == 0:
+            return np.full(self.heights.shape[1:], np.nan)
+        if self.count < 5:
+            return np.quantile(self.heights[:self.count], self.p, axis=0)
+        return self.heights[2].copy()
+
+
+class Ensemble:
+    def __init__(self, model, t_max, engine=Gillespie, options=None, grid_step=1.0, quantiles=DEFAULT_QUANTILES,
+                 store=None):
+        self.model = model
+        self.t_max = t_max
+        self.engine = engine
+        self.options = options or {}
+        self.quantiles = quantiles
+        if issubclass(engine, GillespieBatched):
+            # The replicates, the grid and the seeds of the batches are set by the ensemble
+            self.options = {k: v for k, v in self.options.items() if k not in ("replicates", "grid", "rng")}
+            unsupported = sorted(set(self.options) - set(BATCHED_OPTIONS))
+            if unsupported:
+                raise Exception(f"Options not supported by the batched engine: {', '.join(unsupported)}")
+
+        self.grid = time_grid(grid_step, t_max)
+        self.species_ids = list(self.model.species)
+        shape = (len(self.grid), len(self.species_ids))
+        self.moments = RunningMoments(shape)
+        self.estimators = [RunningQuantile(p, shape) for p in quantiles]
+        self.store = store
+        self.sink = None
+
+    '''This method folds a replicate in the statistics, and writes it to the store.'''
+    def add(self, counts):
+        self.moments.add(counts)
+        for estimator in self.estimators:
+            estimator.add(counts)
+        if self.sink is not None:
+            self.sink.write(self.grid, counts)
+            self.sink.new_replicate()
+
+    '''This method runs the replicates, on a pool of workers processes if workers > 1,
+    and returns the statistics of the ensemble.'''
+    def run(self, replicates, workers=1, seed=None):
+        if self.store is not None:
+            self.sink = StoreSink(self.store, self.species_ids)
+        try:
+            return self.run_replicates(replicates, workers, seed)
+        finally:
+            if self.sink is not None:
+                self.sink.close()
+                self.sink = None
+
+    def run_replicates(self, replicates, workers, seed):
+        arguments = (self.model, self.t_max, self.engine, self.options, self.grid)
+        if issubclass(self.engine, GillespieBatched):
+            return self.run_batched(replicates, workers, seed, arguments)
+
+        seeds = replicate_seeds(seed, replicates)
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                chunksize = max(1, replicates // (4 * workers))
+                for counts in executor.map(run_replicate, *map(repeat, arguments), seeds, chunksize=chunksize):
+                    self.add(counts)
+        else:
+            # A single simulation, reset before every replicate
+            simulation = self.engine(self.model, self.t_max, **{**self.options, "recording": "grid", "grid": self.grid})
+            for s in seeds:
+                self.add(run_replicate(*arguments, s, simulation))
+        return self.statistics()
+
+    '''This method runs the replicates in batches of BATCH_SIZE with the GillespieBatched engine.'''
+    def run_batched(self, replicates, workers, seed, arguments):
+        sizes = [min(BATCH_SIZE, replicates - start) for start in range(0, replicates, BATCH_SIZE)]
+        seeds = replicate_seeds(seed, len(sizes))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                batches = executor.map(run_batch, *map(repeat, arguments), seeds, sizes)
+                for counts in batches:
+                    for replicate in counts:
+                        self.add(replicate)
+        else:
+            for s, size in zip(seeds, sizes):
+                for replicate in run_batch(*arguments, s, size):
+                    self.add(replicate)
+        return self.statistics()
+
+    '''This method returns a dict with the number of replicates, the grid of times, and,
+    for every species, the mean, the variance and the quantiles at the times of the grid.'''
+    def statistics(self):
+        mean, variance = self.moments.mean, self.moments.variance()
+        quantiles = [estimator.value() for estimator in self.estimators]
+        return {
+            "replicates": self.moments.count,
+            TIME: self.grid,
+            "mean": {s_id: mean[:, i] for i, s_id in enumerate(self.species_ids)},
+            "variance": {s_id: variance[:, i] for i, s_id in enumerate(self.species_ids)},
+            "quantiles": {p: {s_id: q[:, i] for i, s_id in enumerate(self.species_ids)}
+                          for p, q in zip(self.quantiles, quantiles)}
+        }
+
+    '''This method writes the statistics to a CSV file: a row for every time of the grid,
+    and the columns <species>_mean, <species>_variance and <species>_q<p> for every species.'''
+    def write_csv(self, csv_path):
+        statistics = self.statistics()
+        header = [TIME]
+        columns = [self.grid]
+        for s_id in self.species_ids:
+            header += [f"{s_id}_mean", f"{s_id}_variance"] + [f"{s_id}_q{p}" for p in self.quantiles]
+            columns += [statistics["mean"][s_id], statistics["variance"][s_id]]
+            columns += [statistics["quantiles"][p][s_id] for p in self.quantiles]
+
+        with open(csv_path, mode='w', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(header)
+            writer.writerows(np.column_stack(columns).round(4).tolist())
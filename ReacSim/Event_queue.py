@@ -0,0 +1,71 @@
+# Standard Library
+import heapq
+import itertools
+
+# Local Modules
+from Constants import *
+
+'''Queue of the events waiting for the end of their delay. The events are kept in a
+min-heap keyed on the time at which they have to be executed, so only the head has
+to be inspected to know whether a delayed event comes before the next reaction.
+The cancellation is lazy: a cancelled (or rescheduled) event is only removed from
+the dict of the pending events, and its entry of the heap is discarded when it
+reaches the head. The pending events are accessible by id as in a dict, with the
+pair (delay_time, event) as value.'''
+
+class EventQueue:
+    def __init__(self):
+        self.heap = []          # (delay_time, sequence number, event id)
+        self.pending = {}       # event id -> (delay_time, event, sequence number)
+        self.counter = itertools.count()
+
+    def __contains__(self, event_id):
+        return event_id in self.pending
+
+    def __len__(self):
+        return len(self.pending)
+
+    def __getitem__(self, event_id):
+        delay_time, event, _ = self.pending[event_id]
+        return delay_time, event
+
+    def items(self):
+        return [(event_id, (delay_time, event)) for event_id, (delay_time, event, _) in self.pending.items()]
+
+    def values(self):
+        return [(delay_time, event) for delay_time, event, _ in self.pending.values()]
+
+    '''This method schedules an event at delay_time, replacing its previous schedule.'''
+    def push(self, event, delay_time):
+        sequence = next(self.counter)
+        self.pending[event[ID]] = (delay_time, event, sequence)
+        heapq.heappush(self.heap, (delay_time, sequence, event[ID]))
+
+    '''This method cancels a pending event (lazily, for the heap).'''
+    def cancel(self, event_id):
+        self.pending.pop(event_id, None)
+
+    '''This method discards the entries of the heap that are cancelled or that are not
+    later than t (they cannot be executed anymore), and returns the time of the head.'''
+    def first_time(self, t):
+        while self.heap:
+            delay_time, sequence, event_id = self.heap[0]
+            entry = self.pending.get(event_id)
+            if entry is not None and entry[2] == sequence and delay_time > t:
+                return delay_time
+            heapq.heappop(self.heap)
+            if entry is not None and entry[2] == sequence:
+                del self.pending[event_id]
+        return None
+
+    '''This method removes and returns the events with the least delay time in (t, t_end],
+    with that time. It returns ([], None) if no event is due.'''
+    def pop_due(self, t, t_end):
+        first = self.first_time(t)
+        if first is None or first > t_end:
+            return [], None
+        due = []
+        while self.first_time(t) == first:
+            _, _, event_id = heapq.heappop(self.heap)
+            due.append(self.pending.pop(event_id)[1])
+        return due, first
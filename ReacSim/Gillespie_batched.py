@@ -0,0 +1,371 @@
+# Third part libraries
+import numpy as np
+
+# Local Modules
+from Constants import *
+from Gillespie_vectorized import reactant_terms
+from Model_spec import ModelSpec
+from Simulation_state import SimulationState
+from Trajectory_recorder import time_grid
+from Random_stream import RandomStream
+from Wall_clock_budget import WallClockBudget
+
+'''Lock-step batched SSA: R replicates of the same parsed model are advanced together,
+one reaction (or one execution of events) per replicate at every iteration. The state
+is an (R x species) array and the propensities an (R x reactions) array, computed
+with the compressed reactant-order matrix of GillespieVectorized; the waiting times
+and the reactions to fire are drawn as vectors. A replicate is masked out once its
+time passes t_max or its a0 is 0.
+The events follow Gillespie.process_events, with the state of the triggers, the
+pending delays and the values captured at trigger time kept per replicate. Triggers,
+delays and assignments are evaluated once on the arrays of all the replicates, and a
+trigger is evaluated again only if one of its variables has changed in at least one
+replicate, or if it reads the time (see Gillespie.mark_changed); the
+expressions that cannot be evaluated on arrays (e.g. "and", "or", functions of the
+math module) are evaluated replicate by replicate.
+The trajectories are sampled on a grid of times, as the "grid" policy of the
+TrajectoryRecorder, in an (R x grid x species) array. The model is not modified,
+so the same ModelSpec can be used for several batches.'''
+
+class GillespieBatched:
+    def __init__(self, model, t_max, replicates=1, grid=None, rng=None, max_wall_time=None):
+        if not isinstance(model, ModelSpec):
+            model = model.get_model_spec()
+        self.model = model
+        self.t_max = t_max
+        self.replicates = replicates
+
+        if self.model.species is None:
+            raise Exception("Model has no species")
+        if self.model.reactions is None:
+            raise Exception("Model has no reactions")
+        if self.model.parameters is None:
+            raise Exception("Model has no parameters")
+
+        stoichiometry = self.model.stoichiometry
+        self.species_ids = stoichiometry[SPECIES_IDS]
+        self.species_index = {s_id: i for i, s_id in enumerate(self.species_ids)}
+        self.stoichiometry = stoichiometry[STOICHIOMETRY_MATRIX]
+        self.reactants = stoichiometry[REACTANTS_MATRIX]
+        self.products = stoichiometry[PRODUCTS_MATRIX]
+        self.rate_constants = stoichiometry[RATE_CONSTANTS]
+
+        # Compressed (row by row) reactant-order matrix, as in GillespieVectorized
+        self.term_species, self.term_orders, self.term_starts = reactant_terms(stoichiometry[ORDERS_MATRIX])
+
+        self.scalar_codes = set()   # Expressions evaluated replicate by replicate
+
+        # For every variable, the indices of the events whose trigger reads it, as in Gillespie,
+        # and for every reaction the mask of the species whose amount it can change
+        self.trigger_readers = {}
+        self.time_triggers = set()
+        for index, event in enumerate(self.model.events):
+            for name in event[TRIGGER_DEPENDENCIES]:
+                self.trigger_readers.setdefault(name, []).append(index)
+            if TIME in event[TRIGGER_DEPENDENCIES]:
+                self.time_triggers.add(index)
+        self.changed_mask = (self.reactants != 0) | (self.products != 0)
+
+        # Sampling grid
+        if grid is None:
+            grid = t_max / DEFAULT_STEPS
+        if np.isscalar(grid):
+            grid = time_grid(grid, t_max)
+        self.grid = np.asarray(grid, dtype=float)
+
+        # Random numbers of the simulation (see Random_stream): rng is a seed, a SeedSequence or a Generator
+        self.rng = RandomStream(rng)
+        # Wall-clock budget (in seconds) of every call of gillespie_ssa, as in Gillespie
+        self.budget = WallClockBudget(max_wall_time)
+        self.reset()
+
+    '''This method prepares a new batch of runs from the initial conditions of the model,
+    with the initial values of some species or parameters optionally overridden (see
+    SimulationState.reset), reusing everything that depends only on the model. The
+    random numbers continue the stream of the previous batch, unless a new seed is
+    given with rng.'''
+    def reset(self, species=None, parameters=None, rng=None):
+        if rng is not None:
+            self.rng = RandomStream(rng)
+        initial = SimulationState(self.model, species, parameters)
+        replicates = self.replicates
+
+        state = np.array([initial.species[s_id] for s_id in self.species_ids], dtype=np.int64)
+        rates = np.array([initial.parameters[k] for k in self.rate_constants], dtype=float)
+        self.state = np.tile(state, (replicates, 1))
+        self.rates = np.tile(rates, (replicates, 1))
+        self.t = np.zeros(replicates)
+        self.stopped = np.zeros(replicates, dtype=bool)
+
+        # Namespace of the expressions: a column of the state for every species (views,
+        # always up to date), an array for every parameter and the array of the times.
+        self.parameters = {p_id: np.full(replicates, value, dtype=float)
+                           for p_id, value in initial.parameters.items()}
+        self.namespace = {**{s_id: self.state[:, i] for i, s_id in enumerate(self.species_ids)},
+                          **self.parameters, TIME: self.t}
+
+        # State of the events for every replicate
+        self.previous = {e[ID]: np.full(replicates, initial.previous[e[ID]], dtype=bool) for e in self.model.events}
+        self.pending = {e[ID]: np.full(replicates, np.nan) for e in self.model.events}
+        self.captured = {e[ID]: {key: np.zeros(replicates) for key in e[VALUES_FROM_TRIGGER_TIME]}
+                         for e in self.model.events}
+        self.capture_enabled = {e[ID]: np.ones(replicates, dtype=bool) for e in self.model.events}
+        # Indices of the events whose trigger has to be evaluated again, for the new triggers
+        # and for the pending delayed events: all of them at the first step
+        self.changed_triggers = set(range(len(self.model.events)))
+        self.changed_pending = set(range(len(self.model.events)))
+
+        # Amounts on the grid and next grid point of every replicate
+        self.counts = np.zeros((replicates, len(self.grid), len(self.species_ids)), dtype=self.state.dtype)
+        self.next_grid = np.zeros(replicates, dtype=np.int64)
+        self.truncated_at = None
+
+    '''This method gives the batch a new stream of random numbers (see Random_stream).'''
+    def set_rng(self, rng):
+        self.rng = RandomStream(rng)
+
+    '''This method evaluates a compiled expression for all the replicates, with the
+    given times, and returns an array with a value for every replicate.'''
+    def evaluate_expr(self, code, error_message, time_values, safe_globals=SAFE_GLOBALS_BASE):
+        self.namespace[TIME] = np.broadcast_to(time_values, (self.replicates,))
+        if code not in self.scalar_codes:
+            try:
+                with np.errstate(all='ignore'):
+                    value = np.asarray(eval(code, safe_globals, self.namespace))
+                if value.shape in ((), (self.replicates,)):
+                    return np.broadcast_to(value, (self.replicates,))
+            except Exception:
+                pass
+            self.scalar_codes.add(code)
+
+        values = []
+        for r in range(self.replicates):
+            scope = {name: array[r].item() for name, array in self.namespace.items()}
+            try:
+                values.append(eval(code, safe_globals, scope))
+            except:
+                raise Exception(
+                    f"{error_message} — Evaluation failed.\n"
+                    f"Expression: {code.co_filename}\n")
+        return np.array(values)
+
+    '''This method assigns new values to a species or a parameter in the replicates of
+    the mask, keeping the rate constants aligned. It returns False if the variable is unknown.
+    The values assigned to a species are rounded to the nearest integer amount, halves to
+    even, as by GillespieVectorized.set_value.'''
+    def set_value(self, var_id, values, mask):
+        if var_id in self.species_index:
+            self.state[mask, self.species_index[var_id]] = np.rint(np.broadcast_to(values, mask.shape)[mask])
+        elif var_id in self.parameters:
+            self.parameters[var_id][mask] = np.broadcast_to(values, mask.shape)[mask]
+            for j, k in enumerate(self.rate_constants):
+                if k == var_id:
+                    self.rates[mask, j] = self.parameters[var_id][mask]
+        else:
+            return False
+        self.mark_changed(var_id)
+        return True
+
+    '''This method marks the events whose trigger reads a changed variable (see
+    Gillespie.mark_changed).'''
+    def mark_changed(self, var_id):
+        for index in self.trigger_readers.get(var_id, ()):
+            self.changed_triggers.add(index)
+            self.changed_pending.add(index)
+
+    '''This method applies the assignments of an event to the replicates of the mask
+    (see Gillespie.apply_events_assigment): a replicate stops applying the assignments
+    of the event at the first negative value.'''
+    def apply_events_assigment(self, event, mask):
+        for var_ea, values in self.captured[event[ID]].items():
+            self.set_value(var_ea, values, mask & self.capture_enabled[event[ID]])
+
+        for var_id, code in event[EVENT_ASSIGNMENT_CODES]:
+            values = self.evaluate_expr(code, ERROR_EVENT_ASSIGNMENTS, self.t)
+            negative = mask & (values < 0)
+            if negative.any():
+                print(f"{RED}Impossible to do apply the event, skip {event[ID]} ")
+                mask = mask & ~negative
+
+            if not self.set_value(var_id, values, mask):
+                print(f"{RED}Cannot apply assignment to unknown variable: {var_id}, skip {event[ID]} ")
+                return
+
+    '''This method computes the propensities of all the reactions of all the replicates.'''
+    def compute_propensities(self):
+        terms = self.state[:, self.term_species] ** self.term_orders
+        propensities = self.rates * np.multiply.reduceat(terms, self.term_starts, axis=1)
+        if (propensities < 0).any():
+            raise Exception("Negative propensity is denied")
+        return propensities
+
+    '''This method finds, for the active replicates, the delayed events due in (t, t_new]
+    (cancelling those whose trigger is False at their time) and returns the new times
+    and, for every event, the mask of the replicates that have to execute it.'''
+    def delayed_events(self, t_new, active):
+        min_delay_time = t_new.copy()
+        due = {}
+        # A trigger whose variables have not changed is still True, as when the event was delayed
+        to_check = self.changed_pending | self.time_triggers
+        self.changed_pending = set()
+        for index, event in enumerate(self.model.events):
+            pending = active & ~np.isnan(self.pending[event[ID]])
+            if not pending.any():
+                continue
+            delay_time = np.where(pending, self.pending[event[ID]], self.t)
+            if index in to_check:
+                valid = self.evaluate_expr(event[TRIGGER_CODE], ERROR_TRIGGER, delay_time).astype(bool)
+            else:
+                valid = pending
+            self.pending[event[ID]][pending & ~valid] = np.nan
+            due[event[ID]] = pending & valid & (self.t < delay_time) & (delay_time <= t_new)
+            min_delay_time = np.where(due[event[ID]], np.minimum(min_delay_time, delay_time), min_delay_time)
+
+        for event_id, mask in due.items():
+            mask &= self.pending[event_id] == min_delay_time
+            self.pending[event_id][mask] = np.nan
+        return min_delay_time, due
+
+    '''This method executes the events at the new time of the active replicates, as
+    Gillespie.process_events after the time has been advanced. It returns the mask of
+    the replicates that executed at least one event.'''
+    def execute_events(self, active, due):
+        with_due = np.zeros(self.replicates, dtype=bool)
+        for mask in due.values():
+            with_due |= mask
+
+        # Pending events whose trigger is False at the time of an executed delayed event
+        if with_due.any():
+            for event in self.model.events:
+                pending = with_due & ~np.isnan(self.pending[event[ID]])
+                if not pending.any():
+                    continue
+                false = pending & ~self.evaluate_expr(event[TRIGGER_CODE], ERROR_TRIGGER, self.t).astype(bool)
+                self.pending[event[ID]][false] = np.nan
+                self.capture_enabled[event[ID]][false] = False
+
+        # Events triggered at the new time (transition of the trigger from False to True). The
+        # triggers whose variables have not changed keep their value (equal to previous).
+        to_eval_events = [(event, due[event[ID]]) for event in self.model.events if event[ID] in due]
+        to_check = sorted(self.changed_triggers | self.time_triggers)
+        self.changed_triggers = set()
+        for event in (self.model.events[index] for index in to_check):
+            value = self.evaluate_expr(event[TRIGGER_CODE], ERROR_TRIGGER, self.t).astype(bool)
+            previous = self.previous[event[ID]]
+            triggered = active & ~previous & value
+            previous[active] = value[active]
+            if not triggered.any():
+                continue
+
+            if event[DELAY_CODE] is None:
+                to_eval_events.append((event, triggered))
+                continue
+            delay_time = self.evaluate_expr(event[DELAY_CODE], ERROR_DELAY, self.t)
+            if (triggered & (delay_time < 0)).any():
+                raise Exception("The delay time is lesser than 0.")
+            to_eval_events.append((event, triggered & (delay_time == 0)))
+
+            delayed = triggered & (delay_time > 0)
+            if event[USE_VALUES_FROM_TRIGGER_TIME]:
+                for key_ea, values in self.captured[event[ID]].items():
+                    source = self.namespace[key_ea] if key_ea in self.namespace else None
+                    if source is not None:
+                        values[delayed] = source[delayed]
+            self.pending[event[ID]][delayed] = (self.t + delay_time)[delayed]
+
+        executed = with_due.copy()
+        for event, mask in to_eval_events:
+            executed |= mask
+            if not mask.any():
+                continue
+            # Check that the trigger is still True
+            still = mask & self.evaluate_expr(event[TRIGGER_CODE], ERROR_TRIGGER, self.t).astype(bool)
+            if still.any():
+                self.apply_events_assigment(event, still)
+        return executed
+
+    '''This method assigns the current state to the grid times before t_new of the
+    active replicates.'''
+    def record_grid(self, t_new, active):
+        while True:
+            fill = active & (self.next_grid < len(self.grid))
+            fill[fill] = self.grid[self.next_grid[fill]] < t_new[fill]
+            if not fill.any():
+                break
+            self.counts[fill, self.next_grid[fill]] = self.state[fill]
+            self.next_grid[fill] += 1
+
+    '''This method advances all the replicates until each of them passes t_max or has no
+    reaction that can fire, or until the wall-clock budget runs out: then every replicate
+    has reached at least the time in truncated_at, and the batch can be continued by
+    calling gillespie_ssa again.'''
+    def gillespie_ssa(self):
+        self.budget.start()
+        self.truncated_at = None
+        while True:
+            if self.budget.expired():
+                self.truncated_at = float(self.t.min())
+                break
+            propensities = self.compute_propensities()
+            a0 = propensities.sum(axis=1)
+            active = (self.t < self.t_max) & ~self.stopped
+            self.stopped |= active & (a0 == 0)
+            active &= a0 > 0
+            if not active.any():
+                break
+
+            # New times
+            y = self.rng.generator.random((2, self.replicates))
+            tau = np.full(self.replicates, np.inf)
+            tau[active] = -np.log(y[0, active]) / a0[active]
+            t_new = self.t + tau
+            due = {}
+            if self.model.events:
+                t_new, due = self.delayed_events(t_new, active)
+
+            self.record_grid(t_new, active)
+            self.t[active] = t_new[active]
+
+            executed = np.zeros(self.replicates, dtype=bool)
+            if self.model.events:
+                executed = self.execute_events(active, due)
+
+            # Reaction chosen between 0 and a0 in the replicates without events
+            fire = active & ~executed
+            n = y[1, fire] * a0[fire]
+            chosen = (np.cumsum(propensities[fire], axis=1) <= n[:, None]).sum(axis=1)
+            chosen = np.minimum(chosen, len(self.stoichiometry) - 1)
+            # Reactants consumed and clamped at 0 before the products, as by the direct method
+            self.state[fire] -= self.reactants[chosen]
+            np.maximum(self.state, 0, out=self.state)
+            self.state[fire] += self.products[chosen]
+            np.maximum(self.state, 0, out=self.state)
+            if self.trigger_readers:
+                for i in np.flatnonzero(self.changed_mask[np.unique(chosen)].any(axis=0)):
+                    self.mark_changed(self.species_ids[i])
+
+    '''The status of the last run: "completed", or "truncated at t=..." if the wall-clock
+    budget ran out before t_max.'''
+    @property
+    def status(self):
+        return STATUS_COMPLETED if self.truncated_at is None else STATUS_TRUNCATED.format(self.truncated_at)
+
+    '''The batched engine keeps its grid in memory and has no output to close: the method
+    is here so that it can be used in place of the other engines (see Gillespie.close_output).'''
+    def close_output(self):
+        pass
+
+    '''This method returns the amounts of the species of all the replicates on the grid,
+    an (R x grid x species) array. The last state of every replicate is kept until the end
+    of the grid, without changing the recorded amounts.'''
+    def get_counts(self):
+        unrecorded = np.arange(len(self.grid))[None, :] >= self.next_grid[:, None]
+        return np.where(unrecorded[:, :, None], self.state[:, None, :], self.counts)
+
+    '''This method returns the trajectory of a replicate on the grid, as a dict of arrays
+    compatible with plot_gillepsie.'''
+    def get_evolution(self, replicate=0):
+        evolution = {TIME: self.grid}
+        counts = self.get_counts()[replicate]
+        evolution.update({s_id: counts[:, i] for i, s_id in enumerate(self.species_ids)})
+        return evolution
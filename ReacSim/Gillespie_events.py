@@ -1,40 +1,202 @@
 # Standard Library
-import random
+import bisect
 
 # Local Modules
 from Constants import *
+from Reaction_selection import SELECTION_STRATEGIES
+from Trajectory_recorder import TrajectoryRecorder
+from Trajectory_sink import OUTPUT_FORMATS
+from Model_spec import ModelSpec
+from Simulation_state import SimulationState
+from Random_stream import RandomStream
+from Wall_clock_budget import WallClockBudget
+from Checkpoint import CHECKPOINT_INTERVAL, save_checkpoint
+import Time_triggers as time_triggers
+
+TRIGGER_TOLERANCE = 1e-9    # Precision of the times of the triggers found by bisection
 
 class Gillespie:
-    def __init__(self, parser, t_max):
+    def __init__(self, model, t_max, selection="linear", recording="every", every_n=1, grid=None, rng=None,
+                 max_wall_time=None, checkpoint_path=None, checkpoint_interval=CHECKPOINT_INTERVAL,
+                 output=None, output_format="npy"):
         self.t_max = t_max
-        self.t = 0.0
-        self.pending_event_delay = {} # The set of all events with active delay
-        self.parser = parser
-        
-        if self.parser.species is None:
+        # The model is read-only (see Model_spec): a Parser is converted to its ModelSpec
+        if not isinstance(model, ModelSpec):
+            model = model.get_model_spec()
+        self.model = model
+
+        if self.model.species is None:
             raise Exception("Model has no species")
 
-        if self.parser.reactions is None:
+        if self.model.reactions is None:
             raise Exception("Model has no reactions")
 
-        if self.parser.parameters is None:
+        if self.model.parameters is None:
             raise Exception("Model has no parameters")
 
-        self.evolution = {TIME: [self.t]}
-        self.evolution.update({id_specie: [amount] for id_specie,amount in self.parser.species.items()})
-
-    '''This method safely evaluates a string expression using the current 
+        # Options of the trajectory recorder (see Trajectory_recorder) and of the strategy
+        # used to select the reaction to fire (see Reaction_selection): both are created
+        # again for every run. With an output path, the trajectory is streamed to a sink
+        # of the given format (see Trajectory_sink) instead of being kept in memory.
+        if output is not None and output_format not in OUTPUT_FORMATS:
+            raise Exception(f"Unknown output format: {output_format}")
+        self.output = None if output is None else OUTPUT_FORMATS[output_format](output, self.model.species.keys())
+        self.recording_options = (recording, every_n, grid, t_max, self.output)
+        self.selection_option = selection
+        self.dependency_graph = self.model.dependency_graph
+
+        # For every variable, the indices of the events whose trigger reads it. A trigger is
+        # evaluated again only when one of its variables has changed, or if it reads the time.
+        self.trigger_readers = {}
+        for index, event in enumerate(self.model.events):
+            for name in event[TRIGGER_DEPENDENCIES]:
+                self.trigger_readers.setdefault(name, []).append(index)
+
+        # Random numbers of the simulation (see Random_stream): rng is a seed, a SeedSequence or a Generator
+        self.rng = RandomStream(rng)
+
+        # Wall-clock budget of every call of gillespie_ssa and checkpoints of the run
+        self.set_run_limits(max_wall_time, checkpoint_path, checkpoint_interval)
+
+        self.simulation_state = None
+        self.reset()
+
+    '''This method prepares a new run of the model from its initial conditions (see
+    SimulationState.reset for the optional overrides), reusing everything that depends
+    only on the model. The random numbers continue the stream of the previous run,
+    unless a new seed is given with rng. The subclasses extend it with their own
+    state; it is called by the constructor, so it can use only the model and the options.'''
+    def reset(self, species=None, parameters=None, rng=None):
+        if rng is not None:
+            self.rng = RandomStream(rng)
+        if self.simulation_state is None:
+            self.simulation_state = SimulationState(self.model, species, parameters)
+        else:
+            self.simulation_state.reset(species, parameters)
+        self.t = 0.0
+        self.species = self.simulation_state.species
+        self.parameters = self.simulation_state.parameters
+        self.previous = self.simulation_state.previous
+        self.values_from_trigger_time = self.simulation_state.values_from_trigger_time
+        self.pending_event_delay = self.simulation_state.pending_event_delay
+
+        # Trajectory of the simulation, recorded with the chosen policy
+        self.recorder = TrajectoryRecorder(self.species.keys(), *self.recording_options)
+        self.recorder.record(self.t, list(self.species.values()))
+
+        # Persistent namespace used to evaluate the compiled expressions: it is built
+        # once and kept aligned with species and parameters by every update of the state.
+        self.namespace = {**self.species, **self.parameters, TIME: self.t}
+        self.schedule_time_triggers(set(parameters or {}))
+
+        # After a firing only the propensities of the reactions that depend on it are updated
+        selection = self.selection_option
+        if isinstance(selection, str):
+            selection = SELECTION_STRATEGIES[selection]()
+        selection.uniform = self.rng.random
+        self.selection = selection
+        self.last_fired = None
+
+        self.changed_triggers = set(range(len(self.model.events)))
+        self.events_to_check = set()    # Ids of the pending delayed events to check again
+        self.truncated_at = None        # Time reached when the wall-clock budget ran out
+
+    '''This method schedules the triggers that depend only on the time and on constant
+    parameters: they are evaluated only at the times at which they change value, so a
+    step never crosses a time at which one of them becomes True and the event is executed
+    exactly at that time. The times are computed by the parser with the values of the
+    parameters in the model; those of the triggers that read a parameter overridden for
+    the run are computed again here, from the tree of the trigger. The other triggers
+    that read the time are evaluated at every step.'''
+    def schedule_time_triggers(self, overridden=frozenset()):
+        self.time_triggers = set()
+        transitions = []
+        for index, event in enumerate(self.model.events):
+            if not event[IS_TIME]:
+                if TIME in event[TRIGGER_DEPENDENCIES]:
+                    self.time_triggers.add(index)
+                continue
+            event_transitions = event[TRIGGER_TRANSITIONS]
+            if event[TRIGGER_DEPENDENCIES] & overridden:
+                event_transitions = time_triggers.trigger_transitions(
+                    event[TRIGGER_TREE], self.parameters,
+                    lambda t, code=event[TRIGGER_CODE]: self.evaluate_expr(code, ERROR_TRIGGER, t))
+            transitions.extend((time, value, index) for time, value in event_transitions)
+
+        transitions.sort()
+        self.transition_times = [time for time, _, _ in transitions]
+        self.transition_events = [index for _, _, index in transitions]
+        self.rising_edges = [time for time, value, _ in transitions if value]
+
+    '''This method sets the wall-clock budget (in seconds, None for no limit) of the next
+    calls of gillespie_ssa, and the file in which a checkpoint (see Checkpoint) is saved
+    every checkpoint_interval seconds and when the budget runs out (None for no checkpoints).'''
+    def set_run_limits(self, max_wall_time=None, checkpoint_path=None, checkpoint_interval=CHECKPOINT_INTERVAL):
+        self.budget = WallClockBudget(max_wall_time)
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_timer = WallClockBudget(checkpoint_interval)
+
+    '''This method gives the simulation a new stream of random numbers (see Random_stream),
+    from a seed, a SeedSequence or a Generator.'''
+    def set_rng(self, rng):
+        self.rng = RandomStream(rng)
+        self.selection.uniform = self.rng.random
+
+    '''This method safely evaluates a compiled expression using the current 
     species values, parameters, and simulation time.'''
-    def evaluate_expr(self, expr, error_message, time_value, safe_globals = SAFE_GLOBALS_BASE):
-        # Merge state and parameters in a single dictionary for expression evaluation
-        local_scope = {**self.parser.species, **self.parser.parameters, "time": time_value}
+    def evaluate_expr(self, code, error_message, time_value, safe_globals = SAFE_GLOBALS_BASE):
+        self.namespace[TIME] = time_value
 
         try:
-            return eval(expr, safe_globals, local_scope)
+            return eval(code, safe_globals, self.namespace)
         except:
             raise Exception(
                 f"{error_message} — Evaluation failed.\n"
-                f"Expression: {expr}\n")
+                f"Expression: {code.co_filename}\n")
+
+    '''This method assigns a new value to a species or a parameter, keeping the
+    evaluation namespace aligned. It returns False if the variable is unknown.'''
+    def set_value(self, var_id, value):
+        if var_id in self.species:
+            self.species[var_id] = value
+        elif var_id in self.parameters:
+            self.parameters[var_id] = value
+        else:
+            return False
+        self.namespace[var_id] = value
+        self.mark_changed(var_id)
+        return True
+
+    '''This method marks the events whose trigger reads a changed variable, and among them
+    the pending delayed events.'''
+    def mark_changed(self, var_id):
+        for index in self.trigger_readers.get(var_id, ()):
+            self.changed_triggers.add(index)
+            if self.model.events[index][ID] in self.pending_event_delay:
+                self.events_to_check.add(self.model.events[index][ID])
+
+    '''This method cancels the pending delayed events whose trigger, evaluated at their
+    delay time, has become False. Only the events marked by mark_changed are evaluated.'''
+    def check_pending_events(self):
+        for event_id in self.events_to_check:
+            if event_id in self.pending_event_delay:
+                delay_time, event = self.pending_event_delay[event_id]
+                if not self.evaluate_expr(event[TRIGGER_CODE], ERROR_TRIGGER, delay_time):
+                    self.pending_event_delay.cancel(event_id)
+        self.events_to_check.clear()
+
+    '''This method returns the first time after t at which a trigger that depends only
+    on the time becomes True, or None.'''
+    def next_rising_edge(self):
+        i = bisect.bisect_right(self.rising_edges, self.t)
+        return self.rising_edges[i] if i < len(self.rising_edges) else None
+
+    '''This method marks the triggers that depend only on the time and change value in
+    (t_start, t_end].'''
+    def mark_time_transitions(self, t_start, t_end):
+        start = bisect.bisect_right(self.transition_times, t_start)
+        end = bisect.bisect_right(self.transition_times, t_end)
+        self.changed_triggers.update(self.transition_events[start:end])
 
     ''' This method applies an event's assignments by first restoring any 
     variable values captured at trigger time, then evaluating and applying 
@@ -43,158 +205,257 @@ class Gillespie:
     def apply_events_assigment(self, event_id, events_assigments, values_from_trigger_time):
         # Update the current state and parameters with the values captured at the trigger time
         for var_ea, value_ea in values_from_trigger_time.items():
-            if var_ea in self.parser.species:
-                self.parser.species[var_ea] = value_ea
-            elif var_ea in self.parser.parameters:
-                self.parser.parameters[var_ea] = value_ea
+            self.set_value(var_ea, value_ea)
 
-        for ea in events_assigments:
-            var_id = ea.getVariable()
-            value = self.evaluate_expr(libsbml.formulaToString(ea.getMath()), ERROR_EVENT_ASSIGNMENTS, self.t)
+        for var_id, code in events_assigments:
+            value = self.evaluate_expr(code, ERROR_EVENT_ASSIGNMENTS, self.t)
 
             if value < 0:
                 print(f"{RED}Impossible to do apply the event, skip {event_id} ")
                 return
 
             # Apply to the right variable
-            if var_id in self.parser.species:
-                self.parser.species[var_id] = value
-            elif var_id in self.parser.parameters:
-                self.parser.parameters[var_id] = value
-            else:
+            if not self.set_value(var_id, value):
                 print(f"{RED}Cannot apply assignment to unknown variable: {var_id}, skip {event_id} ")
                 return
 
     '''This method simulates a stochastic trajectory using the Gillespie SSA (Stochastic Simulation Algorithm),
     extended to support SBML events and delays. '''
     def gillespie_ssa (self):
-        while self.t < self.t_max:
-            propensities = []
-            for r in self.parser.reactions:
-                propensity = self.evaluate_expr(r[RATE_FORMULA], ERROR_KINETIC_LAW, self.t, SAFE_GLOBALS_RATE)
-                if propensity < 0:
-                    raise Exception("Negative propensity is denied")
-                propensities.append(propensity)
-            a0 = sum(propensities)
-            if a0 == 0:
+        self.start_budget()
+        while self.t < self.t_max and not self.out_of_time():
+            if not self.ssa_step():
                 break
 
-            # New time
-            y = random.random()
-            tau = -math.log(y) / a0
-
-            # Select delay events
-            min_delay_time = self.t + tau
-
-            to_eval_events = [] # events to evaluate at current t
-            to_remove = []      # list of events have to remove from pending_event_delay
-
-            for delay_time, event in self.pending_event_delay.values():
-                # evaluation of the trigger at delay_time
-                if self.evaluate_expr(event[TRIGGER_FORMULA], ERROR_TRIGGER, delay_time):
-                    # take only the events with the least delay_time
-                    if self.t < delay_time <= self.t + tau:
-                        if delay_time < min_delay_time:
-                            to_eval_events=[event]
-                            min_delay_time = delay_time
-                        elif delay_time == min_delay_time:
-                            to_eval_events.append(event)
-                else:
-                    to_remove.append(event[ID])
+    '''This method writes the end of the trajectory to the output, if any, and closes it
+    (see TrajectoryRecorder.close).'''
+    def close_output(self):
+        self.recorder.close()
+
+    '''This method starts the wall-clock budget of a call of gillespie_ssa (see
+    Wall_clock_budget). A truncated simulation can be continued by calling
+    gillespie_ssa again, with a new budget.'''
+    def start_budget(self):
+        self.budget.start()
+        self.checkpoint_timer.start()
+        self.truncated_at = None
+
+    '''This method is called at every step of the loop of the simulation: it returns True
+    if the wall-clock budget is exhausted, recording the time reached in truncated_at, so
+    that the loop stops cleanly and the trajectory computed so far is kept. It also saves
+    the checkpoints of the run, between two steps. With every_step=True the clock is read
+    at every call.'''
+    def out_of_time(self, every_step=False):
+        if self.budget.exceeded() if every_step else self.budget.expired():
+            self.truncated_at = self.t
+            if self.checkpoint_path is not None:
+                save_checkpoint(self, self.checkpoint_path)
+            return True
+        if self.checkpoint_path is not None and (
+                self.checkpoint_timer.exceeded() if every_step else self.checkpoint_timer.expired()):
+            save_checkpoint(self, self.checkpoint_path)
+            self.checkpoint_timer.start()
+        return False
+
+    '''The status of the last run: "completed", or "truncated at t=..." if the wall-clock
+    budget ran out before t_max.'''
+    @property
+    def status(self):
+        return STATUS_COMPLETED if self.truncated_at is None else STATUS_TRUNCATED.format(self.truncated_at)
+
+    '''This method performs a single step of the SSA: it executes the events or fires
+    one reaction. It returns False if no reaction can fire anymore (a0 = 0).'''
+    def ssa_step(self):
+        a0 = self.compute_propensities()
+        if a0 == 0:
+            return False
+
+        # New time
+        tau = self.rng.exponential() / a0
+
+        # There is one or more event(s) executed at the new time t: no reaction fires in this step
+        if self.process_events(tau):
+            # Events can change any species or parameter: all the propensities are recomputed
+            self.last_fired = None
+            # Updating the evolution of species
+            self.record_state()
+            return True
+
+        #Reaction choose between 0 and a0
+        chosen = self.select_reaction(a0)
+
+        # Update of state, and of the order of the selection strategy
+        self.fire_reaction(chosen)
+        self.selection.fired(chosen)
+        # Updating the evolution of species
+        self.record_state()
+        return True
+
+    '''This method evaluates the kinetic law of a single reaction at the current time.'''
+    def compute_propensity(self, index):
+        r = self.model.reactions[index]
+        propensity = self.evaluate_expr(r[RATE_CODE], ERROR_KINETIC_LAW, self.t, SAFE_GLOBALS_RATE)
+        if propensity < 0:
+            raise Exception("Negative propensity is denied")
+        return propensity
+
+    '''This method brings the propensities of the selection strategy up to date and
+    returns their sum (a0). All the kinetic laws are evaluated at
+    the first step and after the events, otherwise only the reactions that depend on
+    the last fired one.'''
+    def compute_propensities(self):
+        if self.last_fired is None:
+            self.selection.build([self.compute_propensity(index) for index in range(len(self.model.reactions))])
+        else:
+            for index in self.dependency_graph[self.last_fired]:
+                self.selection.update(index, self.compute_propensity(index))
+        return self.selection.total()
+
+    '''This method handles the events for a step of length tau: it selects the
+    delayed events scheduled in (t, t + tau], advances the time, detects the newly
+    triggered events and applies the assignments of those to execute now. It
+    returns True if at least one event had to be executed at the new time, or if the
+    step has been stopped at a time at which a trigger that depends only on the time
+    becomes True (the reaction is not fired, the next step draws a new waiting time).'''
+    def process_events(self, tau):
+        # Cancel the delayed events whose trigger has become False
+        self.check_pending_events()
+
+        # The step is stopped at the next time-only trigger that becomes True. A step that ends
+        # within TRIGGER_TOLERANCE of that time (e.g. a leap limited by next_event_horizon) too.
+        t_start, t_end = self.t, self.t + tau
+        edge = self.next_rising_edge()
+        stopped = edge is not None and t_end >= edge - TRIGGER_TOLERANCE * max(1.0, edge)
+        if stopped:
+            t_end = edge
+
+        # Select the delayed events with the least delay_time in (t, t_end]
+        to_eval_events, min_delay_time = self.pending_event_delay.pop_due(self.t, t_end)
+        self.t = min_delay_time if to_eval_events else t_end
+        self.mark_time_transitions(t_start, self.t)
+
+        # There are some events to evaluate
+        if to_eval_events != []:
+            to_remove = []
+            for id_event, (_, event) in self.pending_event_delay.items():
+                # Delete the events whose trigger is False
+                if not self.evaluate_expr(event[TRIGGER_CODE], ERROR_TRIGGER, self.t):
+                    self.values_from_trigger_time[id_event] = {}
+                    to_remove.append(id_event)
 
             for event_id in to_remove:
-                self.pending_event_delay.pop(event_id, None)
-
-            self.t = min_delay_time
-
-            # There are some events to evaluate
-            if to_eval_events != []:
-                to_remove = []
-                for id_event, (_, event) in self.pending_event_delay.items():
-                    # Delete the events whose trigger is False
-                    if not self.evaluate_expr(event[TRIGGER_FORMULA], ERROR_TRIGGER, self.t):
-                        event[VALUES_FROM_TRIGGER_TIME] = {}
-                        to_remove.append(id_event)
-
-                for event_id in to_remove:
-                    self.pending_event_delay.pop(event_id, None)
-
-            # Adding all the True-valuated events without delay or delay=0 at time t
-            for event in self.parser.events:
-                trigger_expr = event[TRIGGER_FORMULA]
-                val_trigger = self.evaluate_expr(trigger_expr, ERROR_TRIGGER, self.t) # at time t
-                # The event isn't triggered
-                if not(not event[PREVIOUS] and val_trigger):
-                    event[PREVIOUS] = val_trigger
-                    continue
-
-                # Triggered event: its expr evaluates to True and its PREVIOUS value is False.
-
-                delay = event[DELAY_FORMULA]
-                if delay is None:
-                    # Triggered event without delay
+                self.pending_event_delay.cancel(event_id)
+
+        # Adding all the True-valuated events without delay or delay=0 at time t. The triggers
+        # whose variables have not changed keep their value (equal to PREVIOUS) and are skipped.
+        to_check = sorted(self.changed_triggers | self.time_triggers)
+        self.changed_triggers.clear()
+        for event in (self.model.events[index] for index in to_check):
+            val_trigger = self.evaluate_expr(event[TRIGGER_CODE], ERROR_TRIGGER, self.t) # at time t
+            # The event isn't triggered
+            if not(not self.previous[event[ID]] and val_trigger):
+                self.previous[event[ID]] = val_trigger
+                continue
+
+            # Triggered event: its expr evaluates to True and its PREVIOUS value is False.
+
+            delay = event[DELAY_CODE]
+            if delay is None:
+                # Triggered event without delay
+                to_eval_events.append(event)
+            else:
+                delay_time = self.evaluate_expr(delay, ERROR_DELAY, self.t)
+
+                if delay_time == 0:
+                    # Triggered event's delay tag contains zero
                     to_eval_events.append(event)
+                elif delay_time > 0: # Triggered event's delay tag contains a value > 0
+                    # Storing the values at trigger time for the input variables used in event assignments
+                    if event[USE_VALUES_FROM_TRIGGER_TIME]:
+                        captured = self.values_from_trigger_time[event[ID]]
+                        for key_ea in captured.keys():
+                            if key_ea in self.species:
+                                captured[key_ea] = self.species[key_ea]
+                            elif key_ea in self.parameters:
+                                captured[key_ea] = self.parameters[key_ea]
+
+                    # Adding new event with delay, its trigger is checked at the delay time
+                    self.pending_event_delay.push(event, self.t + delay_time)
+                    self.events_to_check.add(event[ID])
+
                 else:
-                    delay_time = self.evaluate_expr(delay, ERROR_DELAY, self.t)
-
-                    if delay_time == 0:
-                        # Triggered event's delay tag contains zero
-                        to_eval_events.append(event)
-                    elif delay_time > 0: # Triggered event's delay tag contains a value > 0
-                        # Storing the values at trigger time for the input variables used in event assignments
-                        if event[USE_VALUES_FROM_TRIGGER_TIME]:
-                            for key_ea in event[VALUES_FROM_TRIGGER_TIME].keys():
-                                if key_ea in self.parser.species:
-                                    event[VALUES_FROM_TRIGGER_TIME][key_ea] = self.parser.species[key_ea]
-                                elif key_ea in self.parser.parameters:
-                                    event[VALUES_FROM_TRIGGER_TIME][key_ea] = self.parser.parameters[key_ea]
-
-                        # Adding new event with delay
-                        self.pending_event_delay[event[ID]] = (self.t + delay_time, event)
-
-                    else:
-                        raise Exception("The delay time is lesser than 0.")
-
-                event[PREVIOUS] = True
-
-            # There is one or more event(s) to evaluate and apply its EventAssigment
-            if to_eval_events != []:
-                for event in to_eval_events:
-                    # Check that the trigger is still True
-                    if self.evaluate_expr(event[TRIGGER_FORMULA], ERROR_TRIGGER, self.t):
-                        # event[VALUES_FROM_TRIGGER_TIME] may be {} if eventAssigment use only constant or if
-                        # useValuesFromTriggerTime="false"
-                        self.apply_events_assigment(event[ID], event[LIST_OF_EVENT_ASSIGMENT], event[VALUES_FROM_TRIGGER_TIME])
-
-                # Updating the evolution of species
-                self.evolution[TIME].append(self.t)
-                for s_id in self.parser.species:
-                    self.evolution[s_id].append(self.parser.species[s_id])
+                    raise Exception("The delay time is lesser than 0.")
+
+            self.previous[event[ID]] = True
+
+        # There is one or more event(s) to evaluate and apply its EventAssigment
+        for event in to_eval_events:
+            # Check that the trigger is still True
+            if self.evaluate_expr(event[TRIGGER_CODE], ERROR_TRIGGER, self.t):
+                # The captured values may be {} if eventAssigment use only constant or if
+                # useValuesFromTriggerTime="false"
+                self.apply_events_assigment(event[ID], event[EVENT_ASSIGNMENT_CODES],
+                                            self.values_from_trigger_time[event[ID]])
+
+        return to_eval_events != [] or stopped
+
+    '''This method is used by the engines that advance the time by steps longer than
+    a single reaction (tau-leaping, Langevin): it returns the time that the step ending
+    at t_end cannot cross, that is t_max, the first pending delayed event, the first time
+    at which a trigger that depends only on the time becomes True, or the first time at
+    which another trigger that reads the time, currently False, becomes True with the
+    current state (found by bisection).'''
+    def next_event_horizon(self, t_end):
+        horizon = min(t_end, self.t_max)
+        delay_time = self.pending_event_delay.first_time(self.t)
+        if delay_time is not None and delay_time < horizon:
+            horizon = delay_time
+        edge = self.next_rising_edge()
+        if edge is not None and edge < horizon:
+            horizon = edge
+
+        for index in sorted(self.time_triggers):
+            event = self.model.events[index]
+            if self.previous[event[ID]]:
                 continue
-
-            #Reaction choose between 0 and a0
-            n = random.random() * a0
-            cumulative = 0.0
-            for i, a in enumerate(propensities):
-                cumulative += a
-                if n < cumulative:
-                    chosen = i
-                    break
-
-            # Update of state
-            r = self.parser.reactions[chosen]
-            for s, stoich in r[REACTANTS].items():
-                self.parser.species[s] -= stoich
-                if self.parser.species[s] < 0:
-                    self.parser.species[s] = 0
-            for p, stoich in r[PRODUCTS].items():
-                self.parser.species[p] += stoich
-                if self.parser.species[p] < 0:
-                    self.parser.species[p] = 0
-            # Updating the evolution of species
-            self.evolution[TIME].append(self.t)
-            for s_id in self.parser.species:
-                self.evolution[s_id].append(self.parser.species[s_id])
+            if not self.evaluate_expr(event[TRIGGER_CODE], ERROR_TRIGGER, horizon):
+                continue
+            low, high = self.t, horizon
+            while high - low > TRIGGER_TOLERANCE * max(1.0, high):
+                middle = (low + high) / 2
+                if self.evaluate_expr(event[TRIGGER_CODE], ERROR_TRIGGER, middle):
+                    high = middle
+                else:
+                    low = middle
+            horizon = high
+        return horizon
+
+    '''This method chooses the reaction to fire: a random number between 0 and a0
+    is passed to the selection strategy.'''
+    def select_reaction(self, a0):
+        return self.selection.select(self.rng.random() * a0)
+
+    '''This method updates the amounts of the species according to the
+    stoichiometry of the chosen reaction.'''
+    def fire_reaction(self, chosen):
+        r = self.model.reactions[chosen]
+        for s, stoich in r[REACTANTS].items():
+            self.species[s] -= stoich
+            if self.species[s] < 0:
+                self.species[s] = 0
+            self.namespace[s] = self.species[s]
+            self.mark_changed(s)
+        for p, stoich in r[PRODUCTS].items():
+            self.species[p] += stoich
+            if self.species[p] < 0:
+                self.species[p] = 0
+            self.namespace[p] = self.species[p]
+            self.mark_changed(p)
+        self.last_fired = chosen
+
+    '''This method passes the current time and amounts of the species to the recorder.'''
+    def record_state(self):
+        self.recorder.record(self.t, list(self.species.values()))
 
     '''Main steps:
     1. Calculate τ (tau).
@@ -223,4 +484,4 @@ class Gillespie:
     # is canceled (As if the persistent attribute of the trigger were set to True, but the project doesn't handle this attribute.
 
     def get_evolution(self):
-        return self.evolution
\ No newline at end of file
+        return self.recorder.get_evolution()
\ No newline at end of file
@@ -0,0 +1,123 @@
+# Third part libraries
+import numpy as np
+
+# Local Modules
+from Gillespie_vectorized import *
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+'''Direct method with the loop of the SSA compiled by Numba (optional dependency). When
+the model has no events, a step is only the propensities of the mass-action reactions,
+the waiting time, the choice of the reaction and an integer update of the state: the
+whole loop is run by a kernel compiled on the arrays of GillespieVectorized (compressed
+reactant-order matrix, rate constants, reactants and products matrices), without any evaluation of
+Python expressions. The kernel runs KERNEL_BLOCK steps per call, with the exponential
+and uniform numbers drawn in blocks by the Generator of the RandomStream, and the steps
+of a block are passed to the recorder at once.
+If Numba is not installed, or the model has events (that need the evaluation of the
+triggers and of the assignments), the simulation is run by GillespieVectorized.'''
+
+KERNEL_BLOCK = 4096     # Steps of the SSA run by a single call of the kernel
+
+'''This function runs at most len(exponentials) steps of the SSA from time t, stopping
+when the time reaches t_max or no reaction can fire. The state vector is updated in
+place, the time and the state after every step are written in times and counts.
+It returns the number of steps, the new time and True if a0 is 0.'''
+def ssa_kernel(t, t_max, state, rates, term_species, term_orders, term_starts, term_ends,
+               reactants, products, exponentials, uniforms, times, counts):
+    n_reactions = rates.shape[0]
+    n_species = state.shape[0]
+    propensities = np.empty(n_reactions)
+    steps = 0
+    while steps < exponentials.shape[0] and t < t_max:
+        a0 = 0.0
+        for j in range(n_reactions):
+            a = 1.0
+            for k in range(term_starts[j], term_ends[j]):
+                a *= state[term_species[k]] ** term_orders[k]
+            a *= rates[j]
+            propensities[j] = a
+            a0 += a
+        if a0 == 0.0:
+            return steps, t, True
+
+        t += exponentials[steps] / a0
+
+        # First reaction whose cumulative propensity exceeds the target
+        target = uniforms[steps] * a0
+        chosen = n_reactions - 1
+        cumulative = 0.0
+        for j in range(n_reactions):
+            cumulative += propensities[j]
+            if cumulative > target:
+                chosen = j
+                break
+
+        for i in range(n_species):
+            # Reactants consumed and clamped at 0 before the products, as by the direct method
+            state[i] -= reactants[chosen, i]
+            if state[i] < 0:
+                state[i] = 0
+            state[i] += products[chosen, i]
+            if state[i] < 0:
+                state[i] = 0
+            counts[steps, i] = state[i]
+        times[steps] = t
+        steps += 1
+    return steps, t, False
+
+compiled_kernel = numba.njit(cache=True, nogil=True)(ssa_kernel) if numba is not None else None
+
+
+class GillespieJit(GillespieVectorized):
+    def __init__(self, model, t_max, **kwargs):
+        super().__init__(model, t_max, **kwargs)
+        self.term_ends = np.append(self.term_starts[1:], len(self.term_species)).astype(np.int64)
+        self.reactants = np.ascontiguousarray(self.reactants, dtype=np.int64)
+        self.products = np.ascontiguousarray(self.products, dtype=np.int64)
+
+        self.allocate_blocks()
+
+    '''This method allocates the output buffers of the kernel, reused by every block.'''
+    def allocate_blocks(self):
+        self.block_times = np.empty(KERNEL_BLOCK, dtype=float)
+        self.block_counts = np.empty((KERNEL_BLOCK, len(self.species_ids)), dtype=np.int64)
+
+    '''The output buffers of the kernel are not pickled (see Checkpoint).'''
+    def __getstate__(self):
+        return {key: value for key, value in self.__dict__.items() if key not in ("block_times", "block_counts")}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.allocate_blocks()
+
+    '''This property is True if the simulation is run by the compiled kernel.'''
+    @property
+    def uses_kernel(self):
+        return compiled_kernel is not None and len(self.model.events) == 0
+
+    '''This method simulates a trajectory with the compiled kernel, block after block,
+    or with GillespieVectorized if the kernel cannot be used (see uses_kernel).'''
+    def gillespie_ssa(self):
+        if not self.uses_kernel:
+            return super().gillespie_ssa()
+        if (self.rates < 0).any():
+            raise Exception("Negative propensity is denied")
+
+        # A block of the kernel is long: the clock is read after every block
+        self.start_budget()
+        stopped = False
+        while self.t < self.t_max and not stopped and not self.out_of_time(every_step=True):
+            exponentials = self.rng.generator.standard_exponential(KERNEL_BLOCK)
+            uniforms = self.rng.generator.random(KERNEL_BLOCK)
+            steps, self.t, stopped = compiled_kernel(
+                float(self.t), float(self.t_max), self.state, self.rates, self.term_species, self.term_orders,
+                self.term_starts, self.term_ends, self.reactants, self.products, exponentials, uniforms,
+                self.block_times, self.block_counts)
+            self.recorder.record_many(self.block_times[:steps], self.block_counts[:steps])
+
+        self.sync_species()
+        self.last_fired = None
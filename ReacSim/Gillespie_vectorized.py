@@ -0,0 +1,120 @@
+# Third part libraries
+import numpy as np
+
+# Local Modules
+from Gillespie_events import *
+
+'''This function returns the compressed (row by row) form of a reactant-order matrix:
+the species and the orders of the terms x^a of every row, and the index of the first
+term of every row. The propensity of every reaction is the product of the terms of its
+row, computed with a single reduceat; the reactions without reactants get a neutral
+term x^0 = 1 so that no row is empty.'''
+def reactant_terms(orders):
+    term_species, term_orders, term_starts = [], [], []
+    for row in orders:
+        term_starts.append(len(term_species))
+        columns = np.flatnonzero(row)
+        if len(columns) == 0:
+            term_species.append(0)
+            term_orders.append(0.0)
+        else:
+            term_species.extend(columns)
+            term_orders.extend(row[columns])
+    return (np.array(term_species, dtype=np.int64), np.array(term_orders, dtype=float),
+            np.array(term_starts, dtype=np.int64))
+
+
+class GillespieVectorized(Gillespie):
+    def __init__(self, model, t_max, **kwargs):
+        super().__init__(model, t_max, **kwargs)
+
+        stoichiometry = self.model.stoichiometry
+        self.species_ids = stoichiometry[SPECIES_IDS]
+        self.species_index = {s_id: i for i, s_id in enumerate(self.species_ids)}
+        self.orders = stoichiometry[ORDERS_MATRIX]
+        self.stoichiometry = stoichiometry[STOICHIOMETRY_MATRIX]
+        self.reactants = stoichiometry[REACTANTS_MATRIX]
+        self.products = stoichiometry[PRODUCTS_MATRIX]
+        self.rate_constants = stoichiometry[RATE_CONSTANTS]
+
+        self.term_species, self.term_orders, self.term_starts = reactant_terms(self.orders)
+
+        # For each reaction, the indices of its reactants and products, whose amount can change
+        # when it fires (see apply_stoichiometry)
+        self.changed_species = [np.flatnonzero(row) for row in (self.reactants != 0) | (self.products != 0)]
+
+    '''This method prepares a new run (see Gillespie.reset): the state vector and the
+    rate constants vector are built from the initial values.'''
+    def reset(self, species=None, parameters=None, rng=None):
+        super().reset(species, parameters, rng)
+        stoichiometry = self.model.stoichiometry
+        self.state = np.array([self.species[s_id] for s_id in stoichiometry[SPECIES_IDS]], dtype=np.int64)
+        self.rates = np.array([self.parameters[k] for k in stoichiometry[RATE_CONSTANTS]], dtype=float)
+        self.propensities = None
+
+    '''This method computes all the propensities with a single NumPy expression:
+    a = k * prod(x^a) over the rows of the reactant-order matrix.'''
+    def compute_propensities(self):
+        terms = self.state[self.term_species] ** self.term_orders
+        self.propensities = self.rates * np.multiply.reduceat(terms, self.term_starts)
+        if (self.propensities < 0).any():
+            raise Exception("Negative propensity is denied")
+        return self.propensities.sum()
+
+    '''This method chooses the reaction to fire by searching a random number
+    between 0 and a0 in the cumulative sum of the propensities.'''
+    def select_reaction(self, a0):
+        n = self.rng.random() * a0
+        chosen = int(np.searchsorted(np.cumsum(self.propensities), n, side='right'))
+        return min(chosen, len(self.propensities) - 1)
+
+    '''This method applies the state change of the chosen reaction as the direct method
+    does (see Gillespie.fire_reaction): the reactants are consumed and clamped at 0 before
+    the products are added, so the result is not the net stoichiometry row when a reactant
+    has less than the amount consumed.'''
+    def apply_stoichiometry(self, chosen):
+        self.state -= self.reactants[chosen]
+        np.maximum(self.state, 0, out=self.state)
+        self.state += self.products[chosen]
+        np.maximum(self.state, 0, out=self.state)
+
+    '''This method applies the state change of the chosen reaction with vector operations
+    (see apply_stoichiometry), then aligns the species and the namespace for the changed
+    species only.'''
+    def fire_reaction(self, chosen):
+        self.apply_stoichiometry(chosen)
+        for i in self.changed_species[chosen]:
+            value = self.state[i].item()
+            self.species[self.species_ids[i]] = value
+            self.namespace[self.species_ids[i]] = value
+            self.mark_changed(self.species_ids[i])
+
+    '''This method passes the state vector to the recorder, without building a list.'''
+    def record_state(self):
+        self.recorder.record(self.t, self.state)
+
+    '''This method assigns a new value to a species or a parameter (see Gillespie.set_value),
+    keeping also the state vector and the rate constants vector aligned. The amounts of
+    the SSA are integers: a non-integer value assigned to a species (by an event) is
+    rounded to the nearest integer, halves to even, instead of being truncated.'''
+    def set_value(self, var_id, value):
+        if var_id in self.species_index:
+            if np.issubdtype(self.state.dtype, np.integer):
+                value = round(value)
+            value = self.state.dtype.type(value).item()
+            self.state[self.species_index[var_id]] = value
+        if not super().set_value(var_id, value):
+            return False
+        if var_id in self.parameters:
+            for j, k in enumerate(self.rate_constants):
+                if k == var_id:
+                    self.rates[j] = value
+        return True
+
+    '''This method aligns the species dictionary and the namespace with the state vector.'''
+    def sync_species(self):
+        for i, s_id in enumerate(self.species_ids):
+            value = self.state[i].item()
+            self.species[s_id] = value
+            self.namespace[s_id] = value
+            self.mark_changed(s_id)
@@ -1,10 +1,13 @@
 import os
 import numpy as np
 from Constants import *
+from Trajectory_store import TrajectoryStore
 import matplotlib.pyplot as plt
 
-def plot_gillepsie(evolution, t_max, filename=None, dfs_csv= None):
+def plot_gillepsie(evolution, t_max, filename=None, dfs_csv= None, replicate=0):
     if evolution is None: raise Exception("Evolution is None")
+    # A trajectory store is read directly, only up to t_max
+    if isinstance(evolution, TrajectoryStore): evolution = evolution.query(t_end=t_max, replicate=replicate)
     if TIME not in evolution: raise Exception("Evolution does not contain time")
     if TIME in evolution.keys() and len(evolution) == 1: raise Exception("Evolution does not contain data.")
 
@@ -21,15 +24,16 @@ def plot_gillepsie(evolution, t_max, filename=None, dfs_csv= None):
         'Recovered': 'purple'
     }
 
+    # The species without a custom color take the next one of the default cycle
     for specie in specie_names:
         valori = evolution[specie]
-        plt.plot(time_values, valori, label=specie, color=custom_colors[specie])
+        plt.plot(time_values, valori, label=specie, color=custom_colors.get(specie))
 
     # Scatter plot dai punti del DataFrame, se disponibile
-    for df in dfs_csv.values():
+    for df in (dfs_csv.values() if dfs_csv else ()):
         for specie in specie_names:
             if TIME in df.columns and specie in df.columns:
-                plt.scatter(df[TIME], df[specie], s=40, marker='o', label=f"{specie} (data)", edgecolors='black', alpha=0.6, color=custom_colors[specie])
+                plt.scatter(df[TIME], df[specie], s=40, marker='o', label=f"{specie} (data)", edgecolors='black', alpha=0.6, color=custom_colors.get(specie))
 
     plt.xlabel("Time")
     plt.ylabel("Molecule count")
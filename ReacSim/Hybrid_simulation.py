@@ -0,0 +1,132 @@
+# Third part libraries
+import numpy as np
+from scipy.integrate import solve_ivp
+
+# Local Modules
+from Gillespie_vectorized import *
+
+'''Hybrid SSA/ODE simulation for multi-scale models. At every step the reactions
+are partitioned in two subsets:
+    - fast reactions: those annotated with fast="true" in the SBML file, and those
+      whose propensity is at least fast_propensity and that change only species with
+      at least fast_population molecules;
+    - slow reactions: all the others.
+The fast reactions are integrated as ODEs (LSODA, suitable for stiff systems)
+together with the integral of the total propensity of the slow reactions. A slow
+reaction fires, as in the SSA, when that integral reaches -ln(u): the integration
+stops there (terminal event of the solver) and the reaction is selected among the
+slow ones with probability proportional to its propensity.
+The partition is computed again at every step, so reactions move between the two
+subsets as the populations change. A step never crosses t_max, the time of a pending
+delayed event or the time at which a trigger that depends on time becomes True, and
+the events are handled at the end of each step as in Gillespie.gillespie_ssa.'''
+
+class HybridSimulation(GillespieVectorized):
+    def __init__(self, model, t_max, dt=None, fast_propensity=100.0, fast_population=100, **kwargs):
+        super().__init__(model, t_max, **kwargs)
+        self.dt = dt if dt is not None else t_max / DEFAULT_STEPS
+        if self.dt <= 0:
+            raise Exception("The step of the hybrid simulation must be greater than 0.")
+        self.fast_propensity = fast_propensity
+        self.fast_population = fast_population
+
+        self.annotated_fast = np.array([r[FAST] for r in self.model.reactions], dtype=bool)
+        self.fast = self.annotated_fast.copy()
+        self.changed_mask = self.stoichiometry != 0
+
+    '''This method prepares a new run (see Gillespie.reset), with continuous amounts.'''
+    def reset(self, species=None, parameters=None, rng=None):
+        super().reset(species, parameters, rng)
+        self.state = self.state.astype(float)
+        # Integral of the propensity of the slow reactions since the last slow firing,
+        # and the value it must reach for the next one.
+        self.reset_slow_integral()
+
+    '''This method computes the propensities for a given (continuous) state.'''
+    def propensities_at(self, state):
+        terms = np.maximum(state, 0)[self.term_species] ** self.term_orders
+        return self.rates * np.multiply.reduceat(terms, self.term_starts)
+
+    '''This method splits the reactions in fast and slow ones for the current state.'''
+    def partition(self):
+        low_population = (self.changed_mask & (self.state < self.fast_population)).any(axis=1)
+        self.fast = self.annotated_fast | ((self.propensities >= self.fast_propensity) & ~low_population)
+
+    '''This method returns the derivative of the system integrated by the solver: the
+    species changed by the fast reactions, and the propensity of the slow ones.'''
+    def derivative(self, t, y):
+        propensities = self.propensities_at(y[:-1])
+        dx = (propensities * self.fast) @ self.stoichiometry
+        return np.append(dx, propensities[~self.fast].sum())
+
+    '''This method advances the fast subsystem and the slow integral for at most h. It
+    returns the time actually elapsed and whether a slow reaction has to fire.'''
+    def integrate(self, h):
+        if not self.fast.any():
+            # Only slow reactions: their propensities are constant until the next firing
+            a_slow = self.propensities.sum()
+            if self.slow_integral + a_slow * h >= self.slow_target:
+                h = (self.slow_target - self.slow_integral) / a_slow
+                self.slow_integral = self.slow_target
+                return h, True
+            self.slow_integral += a_slow * h
+            return h, False
+
+        def slow_firing(t, y):
+            return y[-1] - self.slow_target
+        slow_firing.terminal = True
+        slow_firing.direction = 1
+
+        y0 = np.append(self.state, self.slow_integral)
+        solution = solve_ivp(self.derivative, (0.0, h), y0, method="LSODA", events=slow_firing)
+        if not solution.success:
+            raise Exception(f"Hybrid simulation — Integration failed: {solution.message}")
+
+        if solution.status == 1:
+            h = solution.t_events[0][0]
+            y = solution.y_events[0][0]
+        else:
+            y = solution.y[:, -1]
+        self.state[:] = np.maximum(y[:-1], 0)
+        self.slow_integral = y[-1]
+        return h, solution.status == 1
+
+    '''This method fires one slow reaction, chosen with probability proportional to its
+    propensity, and starts the integral for the next one.'''
+    def fire_slow_reaction(self):
+        propensities = self.propensities_at(self.state) * ~self.fast
+        a_slow = propensities.sum()
+        if a_slow > 0:
+            n = self.rng.random() * a_slow
+            chosen = min(int(np.searchsorted(np.cumsum(propensities), n, side='right')), len(propensities) - 1)
+            self.apply_stoichiometry(chosen)
+        self.reset_slow_integral()
+
+    '''This method draws the value of the slow integral at which the next slow reaction fires.'''
+    def reset_slow_integral(self):
+        self.slow_integral = 0.0
+        self.slow_target = self.rng.exponential()
+
+    '''This method simulates a hybrid trajectory, extended to support SBML events and delays.'''
+    def gillespie_ssa(self):
+        self.start_budget()
+        while self.t < self.t_max and not self.out_of_time():
+            a0 = self.compute_propensities()
+            if a0 == 0:
+                break
+            self.partition()
+
+            h = self.next_event_horizon(self.t + self.dt) - self.t
+            h, slow_firing = self.integrate(h)
+            self.sync_species()
+
+            # The events at the end of the step are handled as in the SSA: if they are executed,
+            # the slow reaction does not fire and the next one is drawn from the time of the events.
+            if self.process_events(h):
+                self.last_fired = None
+                self.reset_slow_integral()
+            elif slow_firing:
+                self.fire_slow_reaction()
+                self.sync_species()
+            # Updating the evolution of species
+            self.record_state()
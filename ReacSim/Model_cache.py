@@ -0,0 +1,127 @@
+# Standard Library
+import hashlib
+import os
+import pickle
+
+# Local Modules
+from Trajectory_store import STORE_EXTENSION
+
+'''Persistent cache of the parsed and validated models. Reading an SBML file with
+libsbml, checking its compatibility, validating the ASTs and the units and inferring
+the stochastic rate constants is done only the first time a file is seen: the result,
+the ModelSpec (see Model_spec) and the data of the inference, is pickled in the cache
+directory. The key is the SHA-256 of the bytes of the SBML file and of the CSV files
+and trajectory stores of the inference directory (names and contents), so an entry is used only if none of
+them has changed; on a hit the Parser, and so libsbml, is not used at all.
+The size of the directory is bounded: when it exceeds max_bytes, the least recently
+used entries are removed (the time of last use is the modification time of the file).'''
+
+CACHE_VERSION = 3                   # Changed when the format of the entries changes
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "reacsim")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+ENTRY_SUFFIX = ".pkl"
+
+'''This function returns the key of a model: the hash of the SBML file and of the
+CSV files and trajectory stores of the inference directory.'''
+def model_key(file_name, path_inference_directory=None):
+    digest = hashlib.sha256(f"reacsim-model-{CACHE_VERSION}".encode())
+    with open(file_name, "rb") as sbml_file:
+        digest.update(sbml_file.read())
+
+    if path_inference_directory is not None and os.path.isdir(path_inference_directory):
+        for filename in sorted(os.listdir(path_inference_directory)):
+            file_path = os.path.join(path_inference_directory, filename)
+            if filename.endswith(('.csv', STORE_EXTENSION)) and os.path.isfile(file_path):
+                digest.update(filename.encode())
+                with open(file_path, "rb") as csv_file:
+                    digest.update(hashlib.sha256(csv_file.read()).digest())
+    return digest.hexdigest()
+
+
+class ModelCache:
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def entry_path(self, key):
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    '''This method returns the value stored with the key, or None. A damaged entry
+    is removed and treated as missing.'''
+    def get(self, key):
+        path = self.entry_path(key)
+        try:
+            with open(path, "rb") as entry:
+                value = pickle.load(entry)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            self.remove(path)
+            return None
+        os.utime(path)  # Most recently used
+        return value
+
+    '''This method stores a value with the key, then removes the least recently used
+    entries if the cache is too large. The entry is written to a temporary file and
+    renamed, so that a concurrent reader never sees a partial entry.'''
+    def put(self, key, value):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.entry_path(key)
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as entry:
+            pickle.dump(value, entry, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, path)
+        self.evict()
+
+    '''This method removes the least recently used entries until the size of the cache
+    is at most max_bytes.'''
+    def evict(self):
+        entries = []
+        for filename in os.listdir(self.directory):
+            if filename.endswith(ENTRY_SUFFIX):
+                path = os.path.join(self.directory, filename)
+                try:
+                    status = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((status.st_mtime, status.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self.remove(path)
+            total -= size
+
+    def remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    '''This method removes all the entries.'''
+    def clear(self):
+        if os.path.isdir(self.directory):
+            for filename in os.listdir(self.directory):
+                if filename.endswith(ENTRY_SUFFIX):
+                    self.remove(os.path.join(self.directory, filename))
+
+
+'''This function returns the ModelSpec of an SBML file and the data used to infer its
+stochastic rate constants (the dfs of the Parser), from the cache if possible. With
+use_cache=False the file is always parsed and the cache is not touched.'''
+def load_model(file_name, path_inference_directory=None, use_cache=True, cache=None):
+    if use_cache:
+        cache = cache or ModelCache()
+        key = model_key(file_name, path_inference_directory)
+        value = cache.get(key)
+        if value is not None:
+            return value
+
+    # The Parser (and libsbml) is needed only on a miss
+    import Parser
+    parser = Parser.Parser(file_name, path_inference_directory)
+    value = (parser.get_model_spec(), parser.dfs)
+    if use_cache:
+        cache.put(key, value)
+    return value
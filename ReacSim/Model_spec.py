@@ -0,0 +1,148 @@
+# Standard Library
+from types import MappingProxyType
+
+# Third part libraries
+import numpy as np
+
+# Local Modules
+from Constants import *
+
+'''Compact representation of a parsed model, the only input of the simulation engines.
+It holds plain data only: the species with their initial amounts, the parameters,
+the reactions and the events as dicts of strings, numbers and tuples (the formulas
+are kept as source strings) and the dependency graph of the reactions. It does not depend on libsbml, so it can be sent to other
+processes with pickle, and it is frozen: its attributes cannot be set, the species,
+the parameters and every reaction and event are read-only mappings (MappingProxyType,
+pickled as plain dicts), as the stoichiometry, whose arrays are not writeable. The
+engines keep their own copy of the state, so the same ModelSpec can be shared by any
+number of simulations.
+The formulas are compiled the first time the reactions or the events are requested,
+and the stoichiometry arrays are built the first time they are requested, by the
+engines that use them; they are not pickled: every process builds them once.'''
+
+'''This function compiles a formula extracted from the model into a code object,
+so that the simulator evaluates it with eval() without parsing the string again
+at every step. The formula itself is used as filename of the code object, in this
+way it can be shown in the error messages raised during the simulation.'''
+def compile_expr(expr, error_message):
+    try:
+        return compile(expr, expr, "eval")
+    except SyntaxError:
+        raise Exception(
+            f"{error_message} — Compilation failed.\n"
+            f"Expression: {expr}\n")
+
+# Fields of the ModelSpec kept as read-only mappings, and as tuples of read-only mappings
+FROZEN_MAPPINGS = ("species", "parameters")
+FROZEN_TABLES = ("reaction_table", "event_table")
+
+'''This function returns the fields of a ModelSpec with the mappings wrapped in read-only
+views (see MappingProxyType).'''
+def freeze(fields):
+    fields = dict(fields)
+    for name in FROZEN_MAPPINGS:
+        fields[name] = MappingProxyType(dict(fields[name]))
+    for name in FROZEN_TABLES:
+        fields[name] = tuple(MappingProxyType(dict(row)) for row in fields[name])
+    return fields
+
+'''This function builds the matrix representation of the mass-action reactions: the
+reactant-order matrix (exponents of the kinetic laws), the amounts consumed and
+produced by every reaction and the net stoichiometry matrix (products - reactants), all
+with one row per reaction and one column per species, the rate constants names and values, and the integer state vector. The amounts of the
+engines that use it are integers, so it raises an exception if a stoichiometry is not
+an integer: such a model can be simulated only by the engines that do not use it.'''
+def build_stoichiometry(species, parameters, reactions):
+    species_ids = list(species)
+    species_index = {s_id: i for i, s_id in enumerate(species_ids)}
+
+    orders = np.zeros((len(reactions), len(species_ids)))
+    reactants = np.zeros((len(reactions), len(species_ids)), dtype=np.int64)
+    products = np.zeros((len(reactions), len(species_ids)), dtype=np.int64)
+    for j, r in enumerate(reactions):
+        for s_id, order in r[REACTANT_ORDERS].items():
+            orders[j, species_index[s_id]] = order
+        for side, matrix in ((r[REACTANTS], reactants), (r[PRODUCTS], products)):
+            for s_id, stoich in side.items():
+                if stoich != int(stoich):
+                    raise Exception(f"Non integer stoichiometry in reaction '{r[ID]}': "
+                                    f"the model can be simulated only by the 'direct' and 'next-reaction' engines.")
+                matrix[j, species_index[s_id]] += int(stoich)
+
+    rate_constants = [r[RATE_CONSTANT] for r in reactions]
+    return {
+        SPECIES_IDS: species_ids,
+        ORDERS_MATRIX: orders,
+        REACTANTS_MATRIX: reactants,
+        PRODUCTS_MATRIX: products,
+        STOICHIOMETRY_MATRIX: products - reactants,
+        RATE_CONSTANTS: rate_constants,
+        RATE_CONSTANT_VALUES: np.array([parameters[k] for k in rate_constants], dtype=float),
+        STATE_VECTOR: np.array([species[s_id] for s_id in species_ids], dtype=np.int64)
+    }
+
+
+class ModelSpec:
+    def __init__(self, file_name, species, parameters, reactions, events, dependency_graph):
+        fields = {
+            "file_name": file_name,
+            "species": dict(species),           # Initial amounts
+            "parameters": dict(parameters),     # Initial values
+            "reaction_table": tuple(reactions),
+            "event_table": tuple(events),
+            "dependency_graph": tuple(tuple(d) for d in dependency_graph),
+            "compiled": {}
+        }
+        self.__dict__.update(freeze(fields))
+
+    def __setattr__(self, name, value):
+        raise Exception(f"The model is read-only: cannot set '{name}'.")
+
+    def __delattr__(self, name):
+        raise Exception(f"The model is read-only: cannot delete '{name}'.")
+
+    '''The compiled code objects are not pickled, and the read-only mappings (that cannot
+    be pickled) are pickled as dicts.'''
+    def __getstate__(self):
+        state = {**self.__dict__, "compiled": {}}
+        for name in FROZEN_MAPPINGS:
+            state[name] = dict(state[name])
+        for name in FROZEN_TABLES:
+            state[name] = tuple(dict(row) for row in state[name])
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(freeze(state))
+
+    '''The reactions, with the compiled kinetic law (RATE_CODE).'''
+    @property
+    def reactions(self):
+        if RATE_CODE not in self.compiled:
+            self.compiled[RATE_CODE] = tuple(MappingProxyType(
+                {**r, RATE_CODE: compile_expr(r[RATE_FORMULA], ERROR_KINETIC_LAW)}) for r in self.reaction_table)
+        return self.compiled[RATE_CODE]
+
+    '''The events, with the compiled trigger, delay and assignments.'''
+    @property
+    def events(self):
+        if TRIGGER_CODE not in self.compiled:
+            self.compiled[TRIGGER_CODE] = tuple(MappingProxyType({
+                **e,
+                TRIGGER_CODE: compile_expr(e[TRIGGER_FORMULA], ERROR_TRIGGER),
+                DELAY_CODE: None if e[DELAY_FORMULA] is None else compile_expr(e[DELAY_FORMULA], ERROR_DELAY),
+                EVENT_ASSIGNMENT_CODES: tuple((var_id, compile_expr(formula, ERROR_EVENT_ASSIGNMENTS))
+                                              for var_id, formula in e[EVENT_ASSIGNMENT_FORMULAS])
+            }) for e in self.event_table)
+        return self.compiled[TRIGGER_CODE]
+
+    '''The matrix representation of the reactions (see build_stoichiometry), with arrays
+    that are not writeable.'''
+    @property
+    def stoichiometry(self):
+        if STOICHIOMETRY_MATRIX not in self.compiled:
+            stoichiometry = build_stoichiometry(self.species, self.parameters, self.reaction_table)
+            for array in stoichiometry.values():
+                if hasattr(array, "flags"):
+                    array.flags.writeable = False
+            self.compiled[STOICHIOMETRY_MATRIX] = MappingProxyType(stoichiometry)
+        return self.compiled[STOICHIOMETRY_MATRIX]
@@ -0,0 +1,139 @@
+# Local Modules
+from Gillespie_events import *
+
+'''Binary min-heap of the putative firing times of the reactions. The position
+of every reaction inside the heap is indexed, so that the firing time of any
+reaction can be updated in O(log M) and the next reaction is read in O(1).'''
+class IndexedPriorityQueue:
+    def __init__(self, keys):
+        self.keys = list(keys)
+        self.heap = list(range(len(self.keys)))
+        self.position = list(range(len(self.keys)))
+        for i in reversed(range(len(self.heap) // 2)):
+            self.sift_down(i)
+
+    '''This method returns the index of the reaction with the smallest firing time and that time.'''
+    def top(self):
+        index = self.heap[0]
+        return index, self.keys[index]
+
+    '''This method sets a new firing time for a reaction and restores the heap property.'''
+    def update(self, index, key):
+        old_key = self.keys[index]
+        self.keys[index] = key
+        if key < old_key:
+            self.sift_up(self.position[index])
+        elif key > old_key:
+            self.sift_down(self.position[index])
+
+    def swap(self, i, j):
+        self.heap[i], self.heap[j] = self.heap[j], self.heap[i]
+        self.position[self.heap[i]] = i
+        self.position[self.heap[j]] = j
+
+    def sift_up(self, i):
+        while i > 0:
+            parent = (i - 1) // 2
+            if self.keys[self.heap[i]] >= self.keys[self.heap[parent]]:
+                break
+            self.swap(i, parent)
+            i = parent
+
+    def sift_down(self, i):
+        size = len(self.heap)
+        while True:
+            smallest = i
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < size and self.keys[self.heap[child]] < self.keys[self.heap[smallest]]:
+                    smallest = child
+            if smallest == i:
+                break
+            self.swap(i, smallest)
+            i = smallest
+
+
+'''Gibson-Bruck Next Reaction Method. Every reaction has a putative firing time
+stored in an indexed priority queue; after a firing only the propensities of the
+reactions that depend on the changed species are recomputed (dependency graph),
+and their firing times are rescaled instead of being sampled again.
+SBML events and delays are handled as in Gillespie.gillespie_ssa.'''
+class NextReactionMethod(Gillespie):
+    def __init__(self, model, t_max, **kwargs):
+        super().__init__(model, t_max, **kwargs)
+
+    '''This method prepares a new run (see Gillespie.reset): the queue of the firing
+    times is built again at the start of the simulation.'''
+    def reset(self, species=None, parameters=None, rng=None):
+        super().reset(species, parameters, rng)
+        self.propensities = []
+        self.queue = None
+
+    '''This method replaces the stream of random numbers (see Gillespie.set_rng). The
+    firing times in the queue were drawn from the previous stream: they are drawn again
+    from the new one, so that the forks of a simulation (see Checkpoint.fork_checkpoint)
+    are independent from their first reaction. By the memorylessness of the exponential
+    distribution, the new times have the same law as the old ones.'''
+    def set_rng(self, rng):
+        super().set_rng(rng)
+        if self.queue is not None:
+            self.update_all_reactions()
+
+    '''This method samples a new absolute firing time for a reaction with propensity a.'''
+    def sample_firing_time(self, a):
+        if a == 0:
+            return math.inf
+        return self.t + self.rng.exponential() / a
+
+    '''This method returns the new absolute firing time of a reaction whose propensity
+    changes from a_old to a_new, reusing the time not yet elapsed when possible.'''
+    def rescale_firing_time(self, firing_time, a_old, a_new):
+        if a_new == 0:
+            return math.inf
+        if a_old == 0:
+            return self.sample_firing_time(a_new)
+        return self.t + (a_old / a_new) * (firing_time - self.t)
+
+    '''This method recomputes every propensity and samples again all the firing times.
+    It is used after the events, that can change any species or parameter: as in
+    Gillespie.gillespie_ssa, a step that executes events does not fire any reaction
+    and the next one is drawn from the time of the events.'''
+    def update_all_reactions(self):
+        for index in range(len(self.propensities)):
+            self.propensities[index] = self.compute_propensity(index)
+            self.queue.update(index, self.sample_firing_time(self.propensities[index]))
+
+    '''This method simulates a stochastic trajectory using the Next Reaction Method,
+    extended to support SBML events and delays. A truncated run (see Gillespie.out_of_time)
+    continues with the firing times already in the queue.'''
+    def gillespie_ssa(self):
+        if self.queue is None:
+            self.propensities = [self.compute_propensity(index) for index in range(len(self.model.reactions))]
+            self.queue = IndexedPriorityQueue(self.sample_firing_time(a) for a in self.propensities)
+
+        self.start_budget()
+        while self.t < self.t_max and not self.out_of_time():
+            chosen, firing_time = self.queue.top()
+            if firing_time == math.inf:
+                break
+
+            # There is one or more event(s) executed before the next reaction
+            if self.process_events(firing_time - self.t):
+                self.update_all_reactions()
+                # Updating the evolution of species
+                self.record_state()
+                continue
+
+            self.t = firing_time
+            self.fire_reaction(chosen)
+
+            # Only the reactions that depend on the changed species are updated
+            for index in self.dependency_graph[chosen]:
+                a_new = self.compute_propensity(index)
+                if index == chosen:
+                    self.queue.update(index, self.sample_firing_time(a_new))
+                else:
+                    self.queue.update(index, self.rescale_firing_time(self.queue.keys[index], self.propensities[index], a_new))
+                self.propensities[index] = a_new
+
+            # Updating the evolution of species
+            self.record_state()
@@ -6,26 +6,47 @@ import os
 import libsbml
 import numpy as np
 import pandas as pd
-from scipy.interpolate import interp1d
+from scipy import sparse as sp
 
 
 # Local modul
 import Constants as constants
+import Sbml_constants as sbml_constants
 import Graph_generation as graphgen
-import Gillespie_events as Gillespie
+import Time_triggers as time_triggers
+from Ensemble import Ensemble
+from Trajectory_store import TrajectoryStore, STORE_EXTENSION
+from Model_spec import ModelSpec, build_stoichiometry, compile_expr
 from main import T_MAX
 
 
+'''This function returns the set of the identifiers (AST_NAME nodes) read by an AST,
+with a single visit of its nodes.'''
+def ast_symbols(ast):
+    symbols = set()
+    nodes = [ast] if ast is not None else []
+    while nodes:
+        node = nodes.pop()
+        if node.getType() == libsbml.AST_NAME:
+            symbols.add(node.getName())
+        nodes.extend(node.getChild(i) for i in range(node.getNumChildren()))
+    return symbols
+
+
 class Parser:
     def __init__(self, file_name, path_inference_directory = None):
         self.file_name = file_name
         self.path_inference_directory = path_inference_directory
         self.model = self.read_sbml_file()
+        self.build_symbol_index()
+        self.inference_files = None     # Scanned at the first rate constant to infer
+        self.constant_parameters = None
         self.species = self.extract_species()
         self.parameters = self.extract_parameters()
         self.dfs = {}
         self.reactions = self.extract_reactions()
         self.events = self.extract_events()
+        self.model_spec = None
 
     ''' This method reads a SBML file, checks its validity and 
     the compatibility with SBML L2V3 and L2V4, and store the model.'''
@@ -52,6 +73,60 @@ class Parser:
 
         return model
 
+    '''This method indexes, with a single pass over the lists of the model, the elements
+    by identifier (as getElementBySId: the first in the order of the document), the unit
+    definitions by identifier, the identifiers of species, parameters, compartments and
+    species references (the valid identifiers in a trigger), and the compartments.'''
+    def build_symbol_index(self):
+        self.unit_definitions = {ud.getId(): ud for ud in self.model.getListOfUnitDefinitions()}
+        self.compartment_ids = [c.getId() for c in self.model.getListOfCompartments()]
+
+        self.elements = {}
+        self.identifiers = set()
+        for elements in (self.model.getListOfFunctionDefinitions(), self.model.getListOfCompartments(),
+                         self.model.getListOfSpecies(), self.model.getListOfParameters()):
+            for element in elements:
+                self.elements.setdefault(element.getId(), element)
+                if element.getTypeCode() != libsbml.SBML_FUNCTION_DEFINITION:
+                    self.identifiers.add(element.getId())
+        for r in self.model.getListOfReactions():
+            self.elements.setdefault(r.getId(), r)
+            for references in (r.getListOfReactants(), r.getListOfProducts(), r.getListOfModifiers()):
+                for sr in references:
+                    if sr.isSetId():
+                        self.elements.setdefault(sr.getId(), sr)
+                        self.identifiers.add(sr.getId())
+            if r.isSetKineticLaw():
+                for local_parameter in r.getKineticLaw().getListOfParameters():
+                    self.elements.setdefault(local_parameter.getId(), local_parameter)
+        for e in self.model.getListOfEvents():
+            if e.isSetId():
+                self.elements.setdefault(e.getId(), e)
+
+    '''This method returns the path of the CSV file, or of the trajectory store, of the
+    inference directory whose name (case-insensitive, without extension) is the constant,
+    or None. The directory is listed only once.'''
+    def inference_file(self, constant):
+        if self.path_inference_directory is None:
+            raise Exception("Path inference directory not set.")
+
+        if self.inference_files is None:
+            self.inference_files = {}
+            for filename in os.listdir(self.path_inference_directory):
+                file_path = os.path.join(self.path_inference_directory, filename)
+                name, extension = os.path.splitext(filename)
+                if extension in ('.csv', STORE_EXTENSION) and os.path.isfile(file_path):
+                    self.inference_files.setdefault(name.lower(), file_path)
+        return self.inference_files.get(constant.lower())
+
+    '''This method returns the values of the constant parameters, computed once.'''
+    def get_constant_parameters(self):
+        if self.constant_parameters is None:
+            self.constant_parameters = {p.getId(): self.parameters[p.getId()]
+                                        for p in self.model.getListOfParameters()
+                                        if p.getConstant() and p.getId() in self.parameters}
+        return self.constant_parameters
+
     ''' This method extracts the species from the model. It returns 
     a dictionary with the species IDs as keys and the respective initial 
     amounts as values. '''
@@ -99,6 +174,62 @@ class Parser:
             events.append(Event(e, self).get_event_as_dict())
         return events
 
+    '''This method returns the matrix representation of the mass-action reactions (see
+    Model_spec.build_stoichiometry). With sparse=True the matrices are returned as scipy
+    CSR matrices.'''
+    def get_stoichiometry(self, sparse=False):
+        stoichiometry = build_stoichiometry(self.species, self.parameters, self.reactions)
+        if sparse:
+            for key in (constants.ORDERS_MATRIX, constants.REACTANTS_MATRIX, constants.PRODUCTS_MATRIX,
+                        constants.STOICHIOMETRY_MATRIX):
+                stoichiometry[key] = sp.csr_matrix(stoichiometry[key])
+        return stoichiometry
+
+    '''This method returns the ModelSpec of the model (see Model_spec), built at the
+    first call: the plain data needed by the simulation engines, without the libsbml
+    objects, that can be shared by any number of runs and sent to other processes.'''
+    def get_model_spec(self):
+        if self.model_spec is None:
+            reaction_keys = (constants.ID, constants.REACTANTS, constants.PRODUCTS, constants.RATE_FORMULA,
+                             constants.RATE_CONSTANT, constants.REACTANT_ORDERS, constants.FAST)
+            event_keys = (constants.ID, constants.TRIGGER_FORMULA, constants.TRIGGER_DEPENDENCIES,
+                          constants.IS_TIME, constants.TRIGGER_TREE, constants.TRIGGER_TRANSITIONS,
+                          constants.PREVIOUS, constants.EVENT_ASSIGNMENT_FORMULAS, constants.DELAY_FORMULA,
+                          constants.USE_VALUES_FROM_TRIGGER_TIME, constants.VALUES_FROM_TRIGGER_TIME)
+            self.model_spec = ModelSpec(
+                self.file_name, self.species, self.parameters,
+                [{key: r[key] for key in reaction_keys} for r in self.reactions],
+                [{key: e[key] for key in event_keys} for e in self.events],
+                self.get_dependency_graph())
+        return self.model_spec
+
+    '''This method builds the dependency graph of the reactions: for each reaction
+    it returns the list of the reactions whose propensity must be recomputed after
+    it fires, that is the reactions whose kinetic law reads a species changed by it
+    (the reaction itself is always included).'''
+    def get_dependency_graph(self):
+        changed_species = []
+        for r in self.reactions:
+            changed = set()
+            for s_id in set(r[constants.REACTANTS]) | set(r[constants.PRODUCTS]):
+                if r[constants.REACTANTS].get(s_id, 0) != r[constants.PRODUCTS].get(s_id, 0):
+                    changed.add(s_id)
+            changed_species.append(changed)
+
+        # For each identifier, the reactions whose kinetic law reads it
+        readers = {}
+        for j, r in enumerate(self.reactions):
+            for name in r[constants.RATE_CODE].co_names:
+                readers.setdefault(name, set()).add(j)
+
+        dependency_graph = []
+        for i, changed in enumerate(changed_species):
+            affected = {i}
+            for s_id in changed:
+                affected |= readers.get(s_id, set())
+            dependency_graph.append(sorted(affected))
+        return dependency_graph
+
     '''This method extracts and return the stochastic rate constant name from
     kinetic law's ast.'''
     def extract_stochastic_rate_constant_name(self, ast):
@@ -118,11 +249,13 @@ class Parser:
         raise Exception("Kinetic constants not found.")
 
     '''This method performs multiple stochastic simulations (using the Gillespie 
-    algorithm) only on the specified reaction (by building a temporal model that 
-    contains its associated components: species, parameters, compartments and 
-    units). It interpolates the species amounts over time, averages the results 
-    across the specified number of executions, and saves the mean values to a CSV file.'''
-    def export_mean_species_counts_csv(self, reaction_id, executions):
+    algorithm, run by an Ensemble) only on the specified reaction (by building a
+    temporal model that contains its associated components: species, parameters,
+    compartments and units). It samples the species amounts on a grid of times (every grid_step up to
+    t_max, T_MAX by default), averages the results across the specified number of
+    executions, and saves the mean values to a CSV file. With store=True the executions
+    are saved instead to a trajectory store, whose mean is taken by the inference.'''
+    def export_mean_species_counts_csv(self, reaction_id, executions, t_max=None, grid_step=1.0, store=False):
         reaction = self.model.getReaction(reaction_id)
         if reaction is None:
             raise Exception(f"Reaction '{reaction_id}' not found.")
@@ -188,70 +321,23 @@ class Parser:
         writer = libsbml.SBMLWriter()
         writer.writeSBMLToFile(new_document, path)
 
-        # Interpolation of the points
-        sum_per_specie = {}
-        species_to_time_dict = {} #final result
-        #TODO if the execution ends much earlier than T_MAX, I have to deal with the fact that values are absent at those points.
-        time_query = list(range(0, T_MAX + 1))
-
-        for i in range(executions):
-            print(f"{i}\n")
-            # Gillespie simulation
-            new_parser = Parser(path)
-            gillespie_sim = Gillespie.Gillespie(new_parser, T_MAX)
-            gillespie_sim.gillespie_ssa()
-            evolution = gillespie_sim.get_evolution()
-
-            # Extract time values and species names
-            time_values = evolution["time"]
-            specie_names = [name for name in evolution if name != "time"]
-
-            for specie in specie_names:
-                values = evolution[specie]
-
-                # Step-wise interpolation (values stay constant until next time point)
-                interp = interp1d(
-                    time_values,
-                    values,
-                    kind='previous',
-                    bounds_error=False,
-                    fill_value=(values[0], values[-1])
-                )
-
-                # Calculate interpolated values at each integer second
-                interpolated_values = []
-                for t in time_query:
-                    v = float(interp(t))
-                    interpolated_values.append(v)
-
-                # Initialize with zeros if this species is encountered for the first time
-                if specie not in sum_per_specie:
-                    sum_per_specie[specie] = [0.0] * (T_MAX+ 1) #list
-
-                # Accumulate values
-                for idx in range(len(time_query)):
-                    sum_per_specie[specie][idx] += interpolated_values[idx]
-
-        # Calculate the average for each species and time point
-        for specie in sum_per_specie:
-            mean_dict = {}
-            for idx, total in enumerate(sum_per_specie[specie]):
-                media = round(total / executions, 4)
-                tempo = time_query[idx]
-                mean_dict[tempo] = media
-
-            species_to_time_dict[specie] = mean_dict
+        # The model of the reaction is parsed once and the executions are run by an Ensemble
+        # (see Ensemble), that records them on the grid of times and averages them
+        t_max = T_MAX if t_max is None else t_max
+        store_path = f"./Example/Inference_of_kinetic_laws/{kinetic_constant_name}{STORE_EXTENSION}" if store else None
+        ensemble = Ensemble(Parser(path).get_model_spec(), t_max, grid_step=grid_step, store=store_path)
+        statistics = ensemble.run(executions)
+        if store:
+            return
 
         # Write to CSV file
         csv_path = f"./Example/Inference_of_kinetic_laws/{kinetic_constant_name}.csv"
+        means = np.column_stack([statistics["mean"][s_id] for s_id in ensemble.species_ids]).round(4)
 
         with open(csv_path, mode='w', newline='') as csv_file:
             writer = csv.writer(csv_file)
-            writer.writerow([constants.TIME] + [f"{species}" for species in species_to_time_dict])
-
-            for time_point in range(0, T_MAX + 1):
-                row = [time_point] + [species_to_time_dict[species][time_point] for species in species_to_time_dict]
-                writer.writerow(row)
+            writer.writerow([constants.TIME] + ensemble.species_ids)
+            writer.writerows(np.column_stack((statistics[constants.TIME], means)).tolist())
 
 class Reaction:
     def __init__(self, reaction, parser):
@@ -262,8 +348,13 @@ class Reaction:
         self.products = {}
         self.rate_formula = None
         self.rate_formula_rev = None
+        self.rate_constant = None
+        self.rate_constant_rev = None
+        self.reactant_orders = {}
+        self.reactant_orders_rev = {}
         self.kinetic_law = None
         self.isReversible = self.reaction.getReversible()
+        self.isFast = self.reaction.isSetFast() and self.reaction.getFast()
         self.df_csv = None
         self.constant_inferred_name = None
 
@@ -286,14 +377,16 @@ class Reaction:
         if self.kinetic_law is None:
             raise Exception("Kinetic law not found.")
 
-        for compartment in self.parser.model.getListOfCompartments():
-            if self.contains_identifier(compartment.getId()):
+        self.kinetic_law_symbols = ast_symbols(self.kinetic_law.getMath())
+        for compartment_id in self.parser.compartment_ids:
+            if self.contains_identifier(compartment_id):
                 raise Exception("Kinetic law invalid for us.")
 
         if not self.isReversible:
             self.validate_mass_action_kinetic_law(self.kinetic_law.getMath())
 
             self.rate_formula = self.kinetic_law.getFormula()
+            self.rate_constant, self.reactant_orders = self.extract_mass_action_terms(self.kinetic_law.getMath())
         else:
             ast = self.kinetic_law.getMath()
             if ast is None:
@@ -309,21 +402,53 @@ class Reaction:
 
             self.rate_formula = libsbml.formulaToString(ast_forward)
             self.rate_formula_rev = libsbml.formulaToString(ast_reverse)
+            self.rate_constant, self.reactant_orders = self.extract_mass_action_terms(ast_forward)
+            self.rate_constant_rev, self.reactant_orders_rev = self.extract_mass_action_terms(ast_reverse)
+
+    '''This method extracts from a validated mass-action kinetic law the name of
+    the stochastic rate constant and the exponent of every species, so that the
+    propensity can be computed as k * prod(x^a).'''
+    def extract_mass_action_terms(self, ast, orders=None):
+        if orders is None:
+            orders = {}
+        rate_constant = None
+
+        if ast.getType() == libsbml.AST_NAME:
+            children = [ast]
+        else:
+            children = [ast.getChild(i) for i in range(ast.getNumChildren())]
+
+        for child in children:
+            if child.getType() == libsbml.AST_TIMES:
+                nested_constant, _ = self.extract_mass_action_terms(child, orders)
+                if nested_constant is not None:
+                    if rate_constant is not None:
+                        raise Exception("Too many stochastic rate constant.")
+                    rate_constant = nested_constant
+            elif child.getType() == libsbml.AST_NAME:
+                if child.getName() in self.parser.species:
+                    orders[child.getName()] = orders.get(child.getName(), 0) + 1
+                elif rate_constant is None:
+                    rate_constant = child.getName()
+                else:
+                    raise Exception("Too many stochastic rate constant.")
+            elif child.getType() in (libsbml.AST_FUNCTION_POWER, libsbml.AST_POWER):
+                base = child.getChild(0)
+                exponent = child.getChild(1)
+                if base.getName() not in self.parser.species or exponent.getType() not in sbml_constants.TYPE_NUMBER:
+                    raise Exception(f"Kinetic law is not mass action: {libsbml.formulaToString(ast)}")
+                orders[base.getName()] = orders.get(base.getName(), 0) + exponent.getValue()
+            else:
+                raise Exception(f"Kinetic law is not mass action: {libsbml.formulaToString(ast)}")
+
+        return rate_constant, orders
 
     '''The method searches for a `.csv` file whose name (case-insensitive, 
     without extension) matches the provided constant. If such a file is found 
     and is a valid file, its full path is returned. If no match is found or 
     the directory is not set, it returns None.'''
     def check_file_path(self, constant):
-        if self.parser.path_inference_directory is None:
-            raise Exception("Path inference directory not set.")
-
-        for filename in os.listdir(self.parser.path_inference_directory):
-            if filename.endswith('.csv')  and filename[:-4].lower() == constant.lower():
-                file_path = os.path.join(self.parser.path_inference_directory, filename)
-                if os.path.isfile(file_path):
-                    return file_path
-        return None
+        return self.parser.inference_file(constant)
 
     '''This method infers the stochastic rate constant for a given constant
     from experimental or simulated data in a CSV file. At each time interval
@@ -339,7 +464,6 @@ class Reaction:
         if file_path is None:
             raise Exception("File csv not found.")
 
-        self.df_csv = pd.read_csv(file_path)
         self.constant_inferred_name = constant
 
         stoich_reactants = {reactant.getSpecies(): reactant.getStoichiometry() for reactant in
@@ -348,6 +472,14 @@ class Reaction:
         stoich_products = {product.getSpecies(): product.getStoichiometry() for product in
                            self.reaction.getListOfProducts()}
 
+        if file_path.endswith(STORE_EXTENSION):
+            # Only the species of the reaction are read from the store (the mean of its replicates)
+            store = TrajectoryStore(file_path)
+            species = [s for s in dict.fromkeys([*stoich_reactants, *stoich_products]) if s in store.species_index]
+            self.df_csv = store.to_dataframe(species)
+        else:
+            self.df_csv = pd.read_csv(file_path)
+
         # There must be at least one specie of the reaction in the file and the time.
         species_in_csv = self.df_csv.columns
         num_of_species_in_csv = 0
@@ -455,7 +587,7 @@ class Reaction:
                 exponent = child.getChild(1)
                 if (
                         base.getType() != libsbml.AST_NAME or
-                        exponent.getType() not in constants.TYPE_NUMBER
+                        exponent.getType() not in sbml_constants.TYPE_NUMBER
                 ):
                     if (not isReverse and exponent.getValue() != self.reactants[base.getName()] and
                             base.getName() not in self.reactants):
@@ -472,22 +604,7 @@ class Reaction:
     '''This method return True if the kinetic law contains the target_id
      parameter, otherwise return False.'''
     def contains_identifier(self, target_id):
-        math_ast = self.kinetic_law.getMath()
-        if math_ast is None:
-            return False
-
-        # Recursively search for a node with name target_id
-        def traverse(node):
-            if node is None:
-                return False
-            if node.getType() == libsbml.AST_NAME:
-                return node.getName() == target_id
-            for i in range(node.getNumChildren()):
-                if traverse(node.getChild(i)):
-                    return True
-            return False
-
-        return traverse(math_ast)
+        return target_id in self.kinetic_law_symbols
 
     '''This method returns a dictionary representation of the reaction (usefull 
     for simulations).'''
@@ -497,20 +614,32 @@ class Reaction:
                 constants.ID: self.id,
                 constants.REACTANTS: self.reactants,
                 constants.PRODUCTS: self.products,
-                constants.RATE_FORMULA: self.rate_formula
+                constants.RATE_FORMULA: self.rate_formula,
+                constants.RATE_CODE: compile_expr(self.rate_formula, constants.ERROR_KINETIC_LAW),
+                constants.RATE_CONSTANT: self.rate_constant,
+                constants.REACTANT_ORDERS: self.reactant_orders,
+                constants.FAST: self.isFast
             }]
         else:
             return [{
                 constants.ID: self.id,
                 constants.REACTANTS: self.reactants,
                 constants.PRODUCTS: self.products,
-                constants.RATE_FORMULA: self.rate_formula
+                constants.RATE_FORMULA: self.rate_formula,
+                constants.RATE_CODE: compile_expr(self.rate_formula, constants.ERROR_KINETIC_LAW),
+                constants.RATE_CONSTANT: self.rate_constant,
+                constants.REACTANT_ORDERS: self.reactant_orders,
+                constants.FAST: self.isFast
             },
             {
                 constants.ID: self.id+"Rev",
                 constants.REACTANTS: self.products,
                 constants.PRODUCTS: self.reactants,
-                constants.RATE_FORMULA: self.rate_formula_rev
+                constants.RATE_FORMULA: self.rate_formula_rev,
+                constants.RATE_CODE: compile_expr(self.rate_formula_rev, constants.ERROR_KINETIC_LAW),
+                constants.RATE_CONSTANT: self.rate_constant_rev,
+                constants.REACTANT_ORDERS: self.reactant_orders_rev,
+                constants.FAST: self.isFast
             } ]
 
 
@@ -520,9 +649,17 @@ class Event:
         self.event = event
         self.id = event.getId()
         self.trigger_formula = {}
+        self.trigger_code = None
+        self.trigger_dependencies = frozenset()
+        self.is_time = False
+        self.trigger_tree = None
+        self.trigger_transitions = None
         self.previous = False
         self.list_of_event_assigment = []
+        self.event_assignment_formulas = []
+        self.event_assignment_codes = []
         self.delay_formula = None
+        self.delay_code = None
         self.use_values_from_trigger_time = None
         self.value_from_trigger_time = {}
         self.use_trigger_values = True
@@ -553,7 +690,27 @@ class Event:
         self.validate_trigger_boolean_expr(ast_trigger)
         self.trigger_formula = (libsbml.formulaToL3String(ast_trigger).replace("&&", " and ")
                                 .replace("||", " or ").replace("!", " not "))
-        self.previous = self.evaluate_expr(self.trigger_formula, constants.ERROR_TRIGGER, 0)
+        self.trigger_code = compile_expr(self.trigger_formula, constants.ERROR_TRIGGER)
+        # Identifiers read by the trigger: the trigger can change value only if one of them changes
+        self.trigger_dependencies = frozenset(
+            name for name in self.trigger_code.co_names
+            if name in self.parser.species or name in self.parser.parameters or name == constants.TIME)
+        self.previous = self.evaluate_expr(self.trigger_code, constants.ERROR_TRIGGER, 0)
+
+        # A trigger that depends only on the time and on constant parameters changes value at
+        # times known in advance: they are computed here and scheduled by the simulator.
+        # The tree of the trigger is kept, so that the simulator can compute them again when
+        # a parameter is overridden for a run.
+        if constants.TIME in self.trigger_dependencies:
+            try:
+                self.trigger_tree = time_triggers.trigger_tree(ast_trigger, self.parser.get_constant_parameters())
+            except ValueError:
+                self.trigger_tree = None
+        if self.trigger_tree is not None:
+            self.trigger_transitions = time_triggers.trigger_transitions(
+                self.trigger_tree, self.parser.get_constant_parameters(),
+                lambda t: self.evaluate_expr(self.trigger_code, constants.ERROR_TRIGGER, t))
+            self.is_time = True
 
         variables = []
         for event_assignment in self.event.getListOfEventAssignments():
@@ -562,7 +719,7 @@ class Event:
                 raise Exception(f"Variable '{string_of_variable}' is duplicated in the event '{self.id}'.")
             variables.append(string_of_variable)
 
-            variable = self.parser.model.getElementBySId(string_of_variable)
+            variable = self.parser.elements.get(string_of_variable)
             if variable is None:
                 variable = self.parser.parameters[string_of_variable]
                 if variable is None:
@@ -574,13 +731,17 @@ class Event:
             unit_id = variable.getUnits() if variable.isSetUnits() else None
             if unit_id is None:
                 raise Exception("Undefined unit definition for variable.")
-            unit_definition_variable = self.parser.model.getUnitDefinition(unit_id)
+            unit_definition_variable = self.parser.unit_definitions.get(unit_id)
 
             # Check the eventAssignment
             trigger_value_dict = self.validate_event_assigment(event_assignment.getMath(), unit_definition_variable)
             if self.use_trigger_values:
                 self.value_from_trigger_time.update(trigger_value_dict)
             self.list_of_event_assigment.append(event_assignment)
+            assignment_formula = libsbml.formulaToString(event_assignment.getMath())
+            self.event_assignment_formulas.append((string_of_variable, assignment_formula))
+            self.event_assignment_codes.append(
+                (string_of_variable, compile_expr(assignment_formula, constants.ERROR_EVENT_ASSIGNMENTS)))
 
         # TODO: add priority (supported only at level 3)
         # if version is 3 or there isn't the Delay tag, then we append the event and terminate by evaluating the single event
@@ -593,16 +754,12 @@ class Event:
                 raise Exception("Incorrect use of a constant for the delay.")
 
             self.delay_formula = libsbml.formulaToString(ast_delay)
+            self.delay_code = compile_expr(self.delay_formula, constants.ERROR_DELAY)
 
     '''This method return True if the identifier name is valid in the model,
     otherwise return False.'''
     def is_valid_identifier(self, name):
-        return (
-                self.parser.model.getSpecies(name) is not None or
-                self.parser.model.getParameter(name) is not None or
-                self.parser.model.getCompartment(name) is not None or
-                self.parser.model.getSpeciesReference(name) is not None
-        )
+        return name in self.parser.identifiers
 
     '''This method recursively validates the AST of a trigger expression to 
     ensure it consists of valid logical or relational operations, identifiers, 
@@ -611,17 +768,17 @@ class Event:
         if ast is None:
             raise Exception("AST is None.")
 
-        if ast.getType() not in constants.TYPE_TRIGGER:
+        if ast.getType() not in sbml_constants.TYPE_TRIGGER:
             raise Exception("AST must be logical or relational operator.")
 
         for child in [ast.getChild(i) for i in range(ast.getNumChildren())]:
-            if child.getType() in constants.TYPE_TRIGGER:
+            if child.getType() in sbml_constants.TYPE_TRIGGER:
                 self.validate_trigger_boolean_expr(child)
             elif child.getType() == libsbml.AST_NAME:
                 if not self.is_valid_identifier(child.getName()):
                     raise Exception("Invalid identifier.")
                 return
-            elif child.getType() in constants.TYPE_NUMBER or child.getType() == libsbml.AST_NAME_TIME:
+            elif child.getType() in sbml_constants.TYPE_NUMBER or child.getType() == libsbml.AST_NAME_TIME:
                 return
             else:
                 raise Exception(f"AST node not expected (type: {child.getType()}, name: {child.getName()}, "
@@ -639,22 +796,22 @@ class Event:
             string_of_element = ast.getName()
             if self.use_trigger_values:
                 event_assignment_input_vars[string_of_element] = None
-            element = self.parser.model.getElementBySId(string_of_element)
+            element = self.parser.elements.get(string_of_element)
             if element is None:
                 raise Exception(f"Symbol '{string_of_element}' not found in model.")
 
-            if element.getTypeCode() not in constants.TYPE_CODE: # element != (Species, Parameter, Compartment))
+            if element.getTypeCode() not in sbml_constants.TYPE_CODE: # element != (Species, Parameter, Compartment))
                 raise Exception(f"Unsupported element type for symbol '{string_of_element}'")
 
             if not element.isSetUnits():
                 raise Exception(f"Unsupported element type for symbol '{string_of_element}'")
 
             # Check if the units are different
-            if not libsbml.UnitDefinition.areEquivalent(self.parser.model.getUnitDefinition(element.getUnits()),
+            if not libsbml.UnitDefinition.areEquivalent(self.parser.unit_definitions.get(element.getUnits()),
                                                         unit_definition_variable):
                 raise Exception(f"Unit mismatch: '{string_of_element}' has units different from assigned variable.")
-        elif ast.getType() not in constants.TYPE_NUMBER:
-            if ast.getType() not in constants.TYPE_OP: # TODO: Extend to other operations (TIMES, DIV) and math functions
+        elif ast.getType() not in sbml_constants.TYPE_NUMBER:
+            if ast.getType() not in sbml_constants.TYPE_OP: # TODO: Extend to other operations (TIMES, DIV) and math functions
                 raise Exception("Only AST_PLUS and AST_MINUS are supported in the EventAssigment.")
 
             for i in range(ast.getNumChildren()):
@@ -674,11 +831,11 @@ class Event:
     def validate_delay(self, ast, constant_found = False, parameter_found = False):
         if ast is None:
             raise Exception("AST is None.")
-        if ast.getType() in constants.TYPE_NUMBER: # variable = constant
+        if ast.getType() in sbml_constants.TYPE_NUMBER: # variable = constant
             return True, parameter_found
         elif ast.getType() == libsbml.AST_NAME:
             string_of_element = ast.getName()
-            element = self.parser.model.getElementBySId(string_of_element)
+            element = self.parser.elements.get(string_of_element)
             if element is None:
                 raise Exception(f"Symbol '{string_of_element}' not found in model.")
 
@@ -690,7 +847,7 @@ class Event:
 
             # Check if the units are seconds
             delay_units = element.getUnits()
-            delay_ud = self.parser.model.getUnitDefinition(delay_units)
+            delay_ud = self.parser.unit_definitions.get(delay_units)
 
             if delay_units == 'second' and delay_ud is None:
                 return constant_found, True
@@ -705,7 +862,7 @@ class Event:
             raise Exception(f"Unsupported unit type for symbol '{string_of_element}'. Only second supported.")
 
         else:
-            if ast.getType() not in constants.TYPE_OP:
+            if ast.getType() not in sbml_constants.TYPE_OP:
                 raise Exception("Only AST_PLUS and AST_MINUS are supported in the EventAssigment.")
 
             for i in range(ast.getNumChildren()):
@@ -735,9 +892,17 @@ class Event:
         return {
             constants.ID: self.id,
             constants.TRIGGER_FORMULA: self.trigger_formula,
+            constants.TRIGGER_CODE: self.trigger_code,
+            constants.TRIGGER_DEPENDENCIES: self.trigger_dependencies,
+            constants.IS_TIME: self.is_time,
+            constants.TRIGGER_TREE: self.trigger_tree,
+            constants.TRIGGER_TRANSITIONS: self.trigger_transitions,
             constants.PREVIOUS: self.previous,    # Value of trigger at t-tau (previous value)
             constants.LIST_OF_EVENT_ASSIGMENT: self.list_of_event_assigment,
+            constants.EVENT_ASSIGNMENT_FORMULAS: self.event_assignment_formulas,
+            constants.EVENT_ASSIGNMENT_CODES: self.event_assignment_codes,
             constants.DELAY_FORMULA: self.delay_formula,
+            constants.DELAY_CODE: self.delay_code,
             constants.USE_VALUES_FROM_TRIGGER_TIME: self.use_values_from_trigger_time,
             constants.VALUES_FROM_TRIGGER_TIME: self.value_from_trigger_time
         }
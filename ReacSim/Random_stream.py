@@ -0,0 +1,51 @@
+# Third part libraries
+import numpy as np
+
+'''Source of the random numbers of a simulation. Every engine owns a RandomStream,
+built on a NumPy Generator, instead of using the global state of the random module:
+a run seeded with an integer (or with a child of a SeedSequence, for the replicates
+of an ensemble) is reproducible bit for bit and independent of the others.
+The numbers drawn one at a time in the loop of the SSA are generated in blocks of
+BLOCK_SIZE by the Generator and returned from a list, refilled when exhausted; the
+engines that draw arrays of numbers use the Generator directly.'''
+
+BLOCK_SIZE = 4096
+
+class RandomStream:
+    def __init__(self, seed=None):
+        # seed: None (fresh entropy), an integer, a SeedSequence or a Generator
+        if isinstance(seed, np.random.Generator):
+            self.generator = seed
+        else:
+            self.generator = np.random.default_rng(seed)
+        self.uniforms = iter(())
+        self.exponentials = iter(())
+
+    '''This method returns a uniform random number in [0, 1).'''
+    def random(self):
+        try:
+            return next(self.uniforms)
+        except StopIteration:
+            self.uniforms = iter(self.generator.random(BLOCK_SIZE).tolist())
+            return next(self.uniforms)
+
+    '''This method returns a random number with standard exponential distribution
+    (the waiting time of a reaction with unit propensity).'''
+    def exponential(self):
+        try:
+            return next(self.exponentials)
+        except StopIteration:
+            self.exponentials = iter(self.generator.standard_exponential(BLOCK_SIZE).tolist())
+            return next(self.exponentials)
+
+    '''The numbers of the current blocks not used yet are pickled with the state of the
+    Generator, so a restored stream continues exactly where it was (see Checkpoint).'''
+    def __getstate__(self):
+        uniforms, exponentials = list(self.uniforms), list(self.exponentials)
+        self.uniforms, self.exponentials = iter(uniforms), iter(exponentials)
+        return {"generator": self.generator, "uniforms": np.array(uniforms), "exponentials": np.array(exponentials)}
+
+    def __setstate__(self, state):
+        self.generator = state["generator"]
+        self.uniforms = iter(state["uniforms"].tolist())
+        self.exponentials = iter(state["exponentials"].tolist())
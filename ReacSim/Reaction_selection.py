@@ -0,0 +1,244 @@
+# Standard Library
+import math
+import random
+
+'''Strategies used by the Gillespie direct method to select the reaction to fire.
+Each strategy keeps its own copy of the propensities, that the simulator updates
+reaction by reaction, and offers:
+    - build(propensities): rebuilds the structure from all the propensities;
+    - update(index, propensity): sets the propensity of a single reaction;
+    - total(): returns a0, the sum of the propensities;
+    - select(n): returns the reaction selected by n, a random number in [0, a0);
+    - fired(index): notifies the strategy that a reaction has fired.
+The strategies that draw random numbers of their own use uniform(), set by the
+simulator to the source of random numbers of the run.
+The strategies that keep a0 up to date incrementally sum it again from scratch
+every RESUM_INTERVAL updates, to avoid the accumulation of rounding errors.'''
+
+RESUM_INTERVAL = 100000
+
+'''Linear search: the cumulative sum of the propensities is scanned in the order
+of the reactions of the model, O(M) per step.'''
+class LinearSelection:
+    def __init__(self):
+        self.propensities = []
+
+    def build(self, propensities):
+        self.propensities = list(propensities)
+
+    def update(self, index, propensity):
+        self.propensities[index] = propensity
+
+    def total(self):
+        return sum(self.propensities)
+
+    def select(self, n):
+        cumulative = 0.0
+        chosen = len(self.propensities) - 1
+        for i, a in enumerate(self.propensities):
+            cumulative += a
+            if n < cumulative:
+                chosen = i
+                break
+        return chosen
+
+    def fired(self, index):
+        pass
+
+
+'''Sorted direct method: the reactions are scanned in an order that is adapted
+while the simulation runs, every time a reaction fires it is swapped with the one
+preceding it. The reactions that fire more often move to the head of the list, so
+the search stops after a few terms on models where few reactions dominate.'''
+class SortedDirectSelection(LinearSelection):
+    def __init__(self):
+        super().__init__()
+        self.order = []
+        self.position = []
+        self.a0 = 0.0
+        self.updates = 0
+
+    def build(self, propensities):
+        super().build(propensities)
+        if len(self.order) != len(self.propensities):
+            self.order = list(range(len(self.propensities)))
+            self.position = list(range(len(self.propensities)))
+        self.a0 = sum(self.propensities)
+        self.updates = 0
+
+    def update(self, index, propensity):
+        self.a0 += propensity - self.propensities[index]
+        self.propensities[index] = propensity
+        self.updates += 1
+        if self.updates >= RESUM_INTERVAL:
+            self.a0 = sum(self.propensities)
+            self.updates = 0
+
+    def total(self):
+        return self.a0
+
+    def select(self, n):
+        cumulative = 0.0
+        chosen = self.order[-1]
+        for i in self.order:
+            cumulative += self.propensities[i]
+            if n < cumulative:
+                chosen = i
+                break
+        return chosen
+
+    def fired(self, index):
+        pos = self.position[index]
+        if pos > 0:
+            previous = self.order[pos - 1]
+            self.order[pos - 1], self.order[pos] = index, previous
+            self.position[index], self.position[previous] = pos - 1, pos
+
+
+'''Logarithmic direct method: the propensities are the leaves of a complete binary
+tree in which every node stores the sum of its children. The root is a0, and both
+the search of the selected reaction and the update of a propensity cost O(log M).'''
+class SumTreeSelection:
+    def __init__(self):
+        self.size = 1
+        self.tree = []
+
+    def build(self, propensities):
+        propensities = list(propensities)
+        self.size = 1
+        while self.size < len(propensities):
+            self.size *= 2
+        self.tree = [0.0] * (2 * self.size)
+        self.tree[self.size:self.size + len(propensities)] = propensities
+        for i in reversed(range(1, self.size)):
+            self.tree[i] = self.tree[2 * i] + self.tree[2 * i + 1]
+
+    def update(self, index, propensity):
+        i = self.size + index
+        self.tree[i] = propensity
+        i //= 2
+        while i >= 1:
+            self.tree[i] = self.tree[2 * i] + self.tree[2 * i + 1]
+            i //= 2
+
+    def total(self):
+        return self.tree[1]
+
+    def select(self, n):
+        i = 1
+        while i < self.size:
+            left = self.tree[2 * i]
+            # The right subtree is skipped if it has no propensity (rounding errors on n)
+            if n < left or self.tree[2 * i + 1] == 0:
+                i = 2 * i
+            else:
+                n -= left
+                i = 2 * i + 1
+        return i - self.size
+
+    def fired(self, index):
+        pass
+
+
+'''Composition-rejection method: the reactions are grouped by propensity, group g
+contains the propensities in [2^(g-1), 2^g). A group is selected with a linear search
+over the sums of the groups (their number depends on the dynamic range of the
+propensities, not on M), then a reaction is drawn uniformly in the group and accepted
+with probability a / 2^g, that is at least 1/2. The expected cost is constant in M.'''
+class CompositionRejectionSelection:
+    def __init__(self):
+        self.uniform = random.random
+        self.propensities = []
+        self.group_of = []
+        self.position = []
+        self.groups = {}
+        self.group_sums = {}
+        self.a0 = 0.0
+        self.updates = 0
+
+    def build(self, propensities):
+        self.propensities = [0.0] * len(propensities)
+        self.group_of = [None] * len(propensities)
+        self.position = [None] * len(propensities)
+        self.groups = {}
+        self.group_sums = {}
+        for index, propensity in enumerate(propensities):
+            self.insert(index, propensity)
+        self.resum()
+
+    def resum(self):
+        for g, members in self.groups.items():
+            self.group_sums[g] = sum(self.propensities[i] for i in members)
+        self.a0 = sum(self.group_sums.values())
+        self.updates = 0
+
+    def insert(self, index, propensity):
+        self.propensities[index] = propensity
+        if propensity == 0:
+            return
+        g = math.frexp(propensity)[1]
+        members = self.groups.setdefault(g, [])
+        self.group_of[index] = g
+        self.position[index] = len(members)
+        members.append(index)
+        self.group_sums[g] = self.group_sums.get(g, 0.0) + propensity
+
+    def remove(self, index):
+        g = self.group_of[index]
+        if g is None:
+            return
+        members = self.groups[g]
+        last = members.pop()
+        if last != index:
+            members[self.position[index]] = last
+            self.position[last] = self.position[index]
+        self.group_sums[g] -= self.propensities[index]
+        if not members:
+            del self.groups[g]
+            del self.group_sums[g]
+        self.group_of[index] = None
+        self.position[index] = None
+
+    def update(self, index, propensity):
+        old = self.propensities[index]
+        if self.group_of[index] is not None and propensity != 0 and math.frexp(propensity)[1] == self.group_of[index]:
+            self.group_sums[self.group_of[index]] += propensity - old
+            self.propensities[index] = propensity
+        else:
+            self.remove(index)
+            self.insert(index, propensity)
+        self.a0 += propensity - old
+        self.updates += 1
+        if self.updates >= RESUM_INTERVAL:
+            self.resum()
+
+    def total(self):
+        return self.a0
+
+    def select(self, n):
+        chosen_group = None
+        cumulative = 0.0
+        for g, group_sum in self.group_sums.items():
+            chosen_group = g
+            cumulative += group_sum
+            if n < cumulative:
+                break
+
+        members = self.groups[chosen_group]
+        bound = math.ldexp(1.0, chosen_group)
+        while True:
+            index = members[int(self.uniform() * len(members))]
+            if self.uniform() * bound < self.propensities[index]:
+                return index
+
+    def fired(self, index):
+        pass
+
+
+# Strategies selectable from the command line
+SELECTION_STRATEGIES = {
+    "linear": LinearSelection,
+    "sorted-direct": SortedDirectSelection,
+    "sum-tree": SumTreeSelection,
+    "composition-rejection": CompositionRejectionSelection
+}
@@ -0,0 +1,28 @@
+import libsbml
+
+'''Types of the libsbml AST nodes and SBML elements accepted by the parser. They are
+kept apart from Constants, so that the simulation side does not depend on libsbml.'''
+
+TYPE_NUMBER = (libsbml.AST_INTEGER, libsbml.AST_REAL,
+               libsbml.AST_REAL_E, libsbml.AST_RATIONAL)
+
+TYPE_TRIGGER_LOGICAL = (libsbml.AST_LOGICAL_AND, libsbml.AST_LOGICAL_OR,
+              libsbml.AST_LOGICAL_NOT, libsbml.AST_LOGICAL_XOR)
+
+TYPE_TRIGGER_RELATIONAL = (libsbml.AST_RELATIONAL_EQ, libsbml.AST_RELATIONAL_GEQ,
+              libsbml.AST_RELATIONAL_GT, libsbml.AST_RELATIONAL_LEQ,
+              libsbml.AST_RELATIONAL_LT,libsbml.AST_RELATIONAL_NEQ)
+
+TYPE_TRIGGER = TYPE_TRIGGER_LOGICAL + TYPE_TRIGGER_RELATIONAL
+
+TYPE_CODE = (libsbml.SBML_PARAMETER, libsbml.SBML_SPECIES, libsbml.SBML_COMPARTMENT)
+
+TYPE_OP = (libsbml.AST_PLUS, libsbml.AST_MINUS)
+
+# Names of the relational and logical operators in the trees of the triggers that depend only on the time
+RELATIONAL_NAMES = {libsbml.AST_RELATIONAL_EQ: "eq", libsbml.AST_RELATIONAL_NEQ: "ne",
+                    libsbml.AST_RELATIONAL_GT: "gt", libsbml.AST_RELATIONAL_GEQ: "ge",
+                    libsbml.AST_RELATIONAL_LT: "lt", libsbml.AST_RELATIONAL_LEQ: "le"}
+
+LOGICAL_NAMES = {libsbml.AST_LOGICAL_AND: "and", libsbml.AST_LOGICAL_OR: "or",
+                 libsbml.AST_LOGICAL_XOR: "xor", libsbml.AST_LOGICAL_NOT: "not"}
@@ -0,0 +1,38 @@
+# Local Modules
+from Constants import *
+from Event_queue import EventQueue
+
+'''State of a single run of a model: the current values of the species and of the
+parameters, the value of every trigger at the previous step, the values captured at
+trigger time and the delayed events waiting to be executed. It is kept apart from the
+ModelSpec, that is never modified, so a model is parsed once and shared by any number
+of runs (replicates, points of a parameter sweep, threads), each one with its own
+SimulationState created from the initial conditions of the model or reset to them.
+The initial values can be overridden for a run: the triggers are then evaluated
+again at t = 0 with the new values.'''
+
+class SimulationState:
+    def __init__(self, model, species=None, parameters=None):
+        self.model = model
+        self.reset(species, parameters)
+
+    '''This method brings the state back to the initial conditions of the model, with
+    the initial values of some species or parameters optionally overridden.'''
+    def reset(self, species=None, parameters=None):
+        self.species = dict(self.model.species)
+        self.parameters = dict(self.model.parameters)
+        for values, initial, kind in ((species, self.species, "species"), (parameters, self.parameters, "parameter")):
+            for var_id, value in (values or {}).items():
+                if var_id not in initial:
+                    raise Exception(f"Unknown {kind}: {var_id}")
+                initial[var_id] = value
+
+        if species or parameters:
+            scope = {**self.species, **self.parameters, TIME: 0.0}
+            self.previous = {event[ID]: eval(event[TRIGGER_CODE], SAFE_GLOBALS_BASE, scope)
+                             for event in self.model.events}
+        else:
+            self.previous = {event[ID]: event[PREVIOUS] for event in self.model.events}
+        self.values_from_trigger_time = {event[ID]: dict(event[VALUES_FROM_TRIGGER_TIME])
+                                         for event in self.model.events}
+        self.pending_event_delay = EventQueue() # The set of all events with active delay
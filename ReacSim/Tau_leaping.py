@@ -0,0 +1,136 @@
+# Third part libraries
+import numpy as np
+
+# Local Modules
+from Gillespie_vectorized import *
+
+'''Explicit tau-leaping with the adaptive step selection of Cao, Gillespie and
+Petzold (2006). In a leap of length tau every non-critical reaction fires a
+Poisson(a_j * tau) number of times; the critical reactions (those that could
+exhaust one of their reactants in less than N_CRITICAL firings) fire at most once,
+as in the SSA. When the leap would be too short to be convenient, a batch of exact
+SSA steps is performed instead.
+A leap never crosses t_max, the time of a pending delayed event or the time at
+which a trigger that depends on time becomes True, so the events are executed at
+the end of a leap exactly as in Gillespie.gillespie_ssa.'''
+
+N_CRITICAL = 10         # Reactions with less than N_CRITICAL firings left are critical
+SSA_THRESHOLD = 10      # Exact SSA is used if tau < SSA_THRESHOLD / a0
+SSA_STEPS = 100         # Number of exact SSA steps performed in that case
+
+class TauLeaping(GillespieVectorized):
+    def __init__(self, model, t_max, epsilon=0.03, **kwargs):
+        super().__init__(model, t_max, **kwargs)
+        self.epsilon = epsilon
+
+        # Highest order of the reactions in which each species is a reactant (HOR) and the
+        # order of the species in those reactions, used to bound the relative change of
+        # the propensities (g_i of Cao, Gillespie and Petzold).
+        dense_orders = self.model.stoichiometry[ORDERS_MATRIX]
+        reaction_orders = dense_orders.sum(axis=1)
+        self.highest_orders = np.zeros(len(self.species_ids))
+        self.species_orders = np.zeros(len(self.species_ids))
+        for j, row in enumerate(dense_orders):
+            for i in np.flatnonzero(row):
+                if reaction_orders[j] > self.highest_orders[i]:
+                    self.highest_orders[i] = reaction_orders[j]
+                    self.species_orders[i] = row[i]
+                elif reaction_orders[j] == self.highest_orders[i]:
+                    self.species_orders[i] = max(self.species_orders[i], row[i])
+        self.reactant_species = np.flatnonzero(self.highest_orders > 0)
+
+        self.stoichiometry_squared = self.stoichiometry ** 2
+        self.consumption = np.where(self.stoichiometry < 0, -self.stoichiometry, 0)
+
+    '''This method returns the mask of the critical reactions: those with positive
+    propensity that can fire less than N_CRITICAL times before exhausting a reactant.'''
+    def critical_reactions(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            firings_left = np.where(self.consumption > 0, self.state // np.maximum(self.consumption, 1), np.inf)
+        return (self.propensities > 0) & (firings_left.min(axis=1) < N_CRITICAL)
+
+    '''This method returns the g_i coefficients for the reactant species.'''
+    def compute_g(self):
+        x = self.state[self.reactant_species].astype(float)
+        hor = self.highest_orders[self.reactant_species]
+        order = self.species_orders[self.reactant_species]
+        g = hor.copy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mask = (hor == 2) & (order == 2) & (x > 1)
+            g[mask] = 2 + 1 / (x[mask] - 1)
+            mask = (hor == 3) & (order == 2) & (x > 1)
+            g[mask] = 1.5 * (2 + 1 / (x[mask] - 1))
+            mask = (hor == 3) & (order == 3) & (x > 2)
+            g[mask] = 3 + 1 / (x[mask] - 1) + 2 / (x[mask] - 2)
+        return g
+
+    '''This method computes the largest leap that keeps the expected relative change
+    of every propensity, due to the non-critical reactions, below epsilon.'''
+    def select_tau(self, critical):
+        non_critical = ~critical
+        if not non_critical.any():
+            return math.inf
+        a = self.propensities[non_critical]
+        mu = (self.stoichiometry[non_critical][:, self.reactant_species].T @ a)
+        sigma2 = (self.stoichiometry_squared[non_critical][:, self.reactant_species].T @ a)
+
+        x = self.state[self.reactant_species]
+        bound = np.maximum(self.epsilon * x / self.compute_g(), 1.0)
+        with np.errstate(divide='ignore'):
+            tau_mu = np.where(mu != 0, bound / np.abs(mu), np.inf)
+            tau_sigma = np.where(sigma2 != 0, bound ** 2 / sigma2, np.inf)
+        return float(min(tau_mu.min(initial=np.inf), tau_sigma.min(initial=np.inf)))
+
+    '''This method simulates an approximate trajectory with tau-leaping, extended to
+    support SBML events and delays.'''
+    def gillespie_ssa(self):
+        self.start_budget()
+        while self.t < self.t_max and not self.out_of_time():
+            a0 = self.compute_propensities()
+            if a0 == 0:
+                break
+
+            critical = self.critical_reactions()
+            tau_non_critical = self.select_tau(critical)
+
+            # The leap is too short: exact SSA steps are cheaper. The budget is checked at
+            # every one of them, as at every leap.
+            if tau_non_critical < SSA_THRESHOLD / a0:
+                for _ in range(SSA_STEPS):
+                    if self.t >= self.t_max or self.out_of_time() or not self.ssa_step():
+                        break
+                if self.truncated_at is not None:
+                    break
+                continue
+
+            a0_critical = self.propensities[critical].sum()
+            while True:
+                tau_critical = self.rng.exponential() / a0_critical if a0_critical > 0 else math.inf
+                tau = min(tau_non_critical, tau_critical)
+                fire_critical = tau_critical <= tau_non_critical
+
+                horizon = self.next_event_horizon(self.t + tau)
+                if horizon < self.t + tau:
+                    tau = horizon - self.t
+                    fire_critical = False
+
+                firings = np.zeros(len(self.propensities), dtype=np.int64)
+                firings[~critical] = self.rng.generator.poisson(self.propensities[~critical] * tau)
+                if fire_critical:
+                    p = self.propensities[critical] / a0_critical
+                    firings[np.flatnonzero(critical)[self.rng.generator.choice(len(p), p=p)]] += 1
+
+                new_state = self.state + firings @ self.stoichiometry
+                if (new_state >= 0).all():
+                    break
+                # Negative amounts: the leap is repeated with half of the step
+                tau_non_critical /= 2
+
+            self.state[:] = new_state
+            self.sync_species()
+
+            # The events at the end of the leap are handled as in the SSA
+            if self.process_events(tau):
+                self.last_fired = None
+            # Updating the evolution of species
+            self.record_state()
@@ -0,0 +1,129 @@
+# Standard Library
+import math
+import operator
+
+'''Analysis of the triggers that depend only on the time and on constants (e.g.
+time >= 50, time > 10 && time < 20). The value of such a trigger is a function of
+the time alone, so the times at which it changes value can be computed once from
+its AST instead of evaluating the trigger at every step.
+The parser converts the AST of the trigger to a tree of plain data (tuples), that is
+kept in the ModelSpec, with the constant parameters left as names: the transitions
+can then be computed again, without libsbml, when the value of a parameter is
+overridden for a run (see Gillespie.schedule_time_triggers). The nodes of the tree are
+("time",), ("number", value), ("parameter", name), ("constant", value),
+("relational", operator, left, right) and (logical operator, child, ...).
+Every relational node compares the time with a constant, so it is True on a half
+line or on a point; the logical nodes combine them. The set of times on which the
+trigger is True is represented by the sorted thresholds of its relational nodes
+and by a predicate: the value of the predicate is constant on the open intervals
+between two thresholds, so it is enough to evaluate it on the thresholds and on
+a point of every interval to find all the transitions.'''
+
+RELATIONAL_OPERATORS = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "gt": operator.gt,
+    "ge": operator.ge,
+    "lt": operator.lt,
+    "le": operator.le
+}
+# Operator with swapped operands: c op time <=> time SWAPPED[op] c
+SWAPPED = {operator.eq: operator.eq, operator.ne: operator.ne, operator.gt: operator.lt,
+           operator.ge: operator.le, operator.lt: operator.gt, operator.le: operator.ge}
+MAX_ADJUSTMENTS = 4     # Steps of one ulp used to align a transition with the compiled trigger
+
+'''This function returns the tree of a trigger (see above) from its AST, or raises
+ValueError if the trigger does not depend only on the time and on constants. It is
+used by the parser only, so libsbml is imported here.'''
+def trigger_tree(ast, constant_parameters):
+    import libsbml
+    import Sbml_constants as sbml_constants
+
+    node_type = ast.getType()
+    if node_type == libsbml.AST_NAME_TIME:
+        return ("time",)
+    if node_type in sbml_constants.TYPE_NUMBER:
+        return ("number", ast.getValue())
+    if node_type == libsbml.AST_NAME and ast.getName() in constant_parameters:
+        return ("parameter", ast.getName())
+    if node_type == libsbml.AST_CONSTANT_TRUE or node_type == libsbml.AST_CONSTANT_FALSE:
+        return ("constant", node_type == libsbml.AST_CONSTANT_TRUE)
+
+    children = [trigger_tree(ast.getChild(i), constant_parameters) for i in range(ast.getNumChildren())]
+    if node_type in sbml_constants.RELATIONAL_NAMES and len(children) == 2:
+        return ("relational", sbml_constants.RELATIONAL_NAMES[node_type], *children)
+    if node_type in sbml_constants.LOGICAL_NAMES and (node_type != libsbml.AST_LOGICAL_NOT or len(children) == 1):
+        return (sbml_constants.LOGICAL_NAMES[node_type], *children)
+    raise ValueError(ast.getName())
+
+'''This function returns the value of an operand of a relational node: None for the
+time, or the number, or raises ValueError if the operand is not an operand.'''
+def operand_value(tree, parameters):
+    if tree[0] == "time":
+        return None
+    if tree[0] == "number":
+        return tree[1]
+    if tree[0] == "parameter":
+        return parameters[tree[1]]
+    raise ValueError(tree[0])
+
+'''This function returns the predicate of the trigger (a function of the time) and
+the thresholds of its relational nodes, with the values of the parameters given.'''
+def time_predicate(tree, parameters):
+    kind = tree[0]
+
+    if kind == "relational":
+        op = RELATIONAL_OPERATORS[tree[1]]
+        left, right = (operand_value(child, parameters) for child in tree[2:])
+        if left is None and right is None:
+            return (lambda t: op(t, t)), []
+        if left is None:
+            return (lambda t: op(t, right)), [right]
+        if right is None:
+            return (lambda t: SWAPPED[op](t, left)), [left]
+        value = op(left, right)
+        return (lambda t: value), []
+
+    if kind == "constant":
+        value = tree[1]
+        return (lambda t: value), []
+
+    parts = [time_predicate(child, parameters) for child in tree[1:]]
+    predicates = [predicate for predicate, _ in parts]
+    thresholds = [threshold for _, part in parts for threshold in part]
+    if kind == "and":
+        return (lambda t: all(p(t) for p in predicates)), thresholds
+    if kind == "or":
+        return (lambda t: any(p(t) for p in predicates)), thresholds
+    if kind == "xor":
+        return (lambda t: sum(p(t) for p in predicates) % 2 == 1), thresholds
+    if kind == "not":
+        return (lambda t: not predicates[0](t)), thresholds
+    raise ValueError(kind)
+
+'''This function returns the transitions of a trigger that depends only on the time (its
+tree), with the values of the parameters given, as a sorted list of (time, value) with
+time > 0: at that time the trigger takes the value. The times are aligned with the
+compiled trigger: at each of them check(time) gives the new value.'''
+def trigger_transitions(tree, parameters, check):
+    predicate, thresholds = time_predicate(tree, parameters)
+
+    points = sorted(set(thresholds))
+    transitions = []
+    previous = predicate(points[0] - abs(points[0]) - 1) if points else predicate(0.0)
+    for i, point in enumerate(points):
+        after = (point + points[i + 1]) / 2 if i + 1 < len(points) else point + abs(point) + 1
+        for time, value in ((point, predicate(point)), (math.nextafter(point, math.inf), predicate(after))):
+            if value != previous:
+                transitions.append((time, value))
+                previous = value
+
+    aligned = []
+    for time, value in transitions:
+        for _ in range(MAX_ADJUSTMENTS):
+            if bool(check(time)) == value:
+                break
+            time = math.nextafter(time, math.inf)
+        if time > 0:
+            aligned.append((time, value))
+    return aligned
@@ -0,0 +1,234 @@
+# Third part libraries
+import numpy as np
+
+# Local Modules
+from Constants import *
+from Trajectory_sink import CHUNK_SIZE
+
+'''Recorder of the trajectory of a simulation. The times are stored in a float64
+array and the amounts of the species in an int64 matrix (one row per recorded
+point, one column per species), preallocated and doubled when full. The matrix is
+promoted to float64 the first time a non-integer amount is recorded (events that
+assign real values, continuous engines as the Chemical Langevin Equation).
+The recording policy is chosen at run time:
+    - "every": every step of the simulation is recorded;
+    - "every-n": one step every every_n is recorded;
+    - "grid": the state is sampled on a fixed grid of times, the amount at a time
+      of the grid is the one after the last step not later than it. The memory is
+      bounded by the size of the grid, whatever the number of steps. The grid is
+      given either as the sequence of its times, or as its step (from 0 to t_max).
+In every policy the initial state is always recorded, and the last state reached
+is always returned by get_evolution().
+With a sink (see Trajectory_sink) the records of the "every" and "every-n" policies
+are kept in memory in a chunk of chunk_size rows, appended to the sink whenever it is
+full: the memory used does not depend on the number of steps. The grid, whose size
+does not depend on the number of steps either, is written to the sink when the
+recorder is closed.'''
+
+RECORDING_POLICIES = ("every", "every-n", "grid")
+INITIAL_CAPACITY = 1024
+TIME_GRID_TOLERANCE = 1e-9  # A grid step that divides t_max up to rounding reaches t_max
+
+'''This function returns the grid of times 0, step, 2 * step, ..., up to t_max.'''
+def time_grid(step, t_max):
+    if step <= 0:
+        raise Exception("The step of the grid must be greater than 0.")
+    return np.arange(int(t_max / step + TIME_GRID_TOLERANCE) + 1) * step
+
+'''This function samples a trajectory (as returned by get_evolution) on a grid of times,
+with a single searchsorted for all the times and the species: the amount at a time is the
+one after the last step not later than it, the initial one before the first step and the
+last one after the end of the trajectory. It returns a float array (time x species).'''
+def sample_on_grid(evolution, species_ids, grid):
+    counts = np.column_stack([evolution[s_id] for s_id in species_ids]).astype(float)
+    rows = np.searchsorted(evolution[TIME], grid, side='right') - 1
+    return counts[np.maximum(rows, 0)]
+
+
+class TrajectoryRecorder:
+    def __init__(self, species_ids, policy="every", every_n=1, grid=None, t_max=None, sink=None,
+                 chunk_size=CHUNK_SIZE):
+        if policy not in RECORDING_POLICIES:
+            raise Exception(f"Unknown recording policy: {policy}")
+        if policy == "every-n" and every_n < 1:
+            raise Exception("The recording interval must be at least 1.")
+        if policy == "grid" and grid is None:
+            raise Exception("The grid recording policy needs the times of the grid.")
+
+        self.species_ids = list(species_ids)
+        self.policy = policy
+        self.every_n = every_n if policy == "every-n" else 1
+        self.steps = 0
+        self.sink = sink
+        self.chunk_size = chunk_size
+        if sink is not None:
+            sink.truncate(0)    # A new trajectory
+
+        if policy == "grid":
+            if np.isscalar(grid):
+                if grid <= 0 or t_max is None:
+                    raise Exception("The step of the grid must be greater than 0 and needs t_max.")
+                grid = time_grid(grid, t_max)
+            self.times = np.asarray(grid, dtype=float)
+            if (np.diff(self.times) < 0).any():
+                raise Exception("The times of the grid must be sorted.")
+        else:
+            self.times = np.empty(INITIAL_CAPACITY if sink is None else chunk_size, dtype=float)
+        self.counts = np.empty((len(self.times), len(self.species_ids)), dtype=np.int64)
+        self.size = 0
+
+        # Last state seen, returned by get_evolution() if it has not been recorded
+        self.last_time = None
+        self.last_counts = None
+        self.last_recorded = False
+
+    '''Only the recorded part of the arrays is pickled (see Checkpoint).'''
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        if self.policy != "grid":
+            state["times"] = self.times[:self.size]
+            state["counts"] = self.counts[:self.size]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.policy != "grid":
+            capacity = max(len(self.times), INITIAL_CAPACITY if self.sink is None else self.chunk_size)
+            times, counts = self.times, self.counts
+            self.times = np.empty(capacity, dtype=float)
+            self.counts = np.empty((capacity, len(self.species_ids)), dtype=counts.dtype)
+            self.times[:len(times)] = times
+            self.counts[:len(counts)] = counts
+
+    '''This method converts the amounts to a row of the matrix, promoting the matrix
+    to float64 if they are not integer.'''
+    def as_row(self, counts):
+        row = np.array(counts)
+        if self.counts.dtype.kind == 'i' and row.dtype.kind == 'f' and (row != np.floor(row)).any():
+            self.counts = self.counts.astype(float)
+        return row
+
+    '''This method doubles the capacity of the arrays.'''
+    def grow(self):
+        capacity = 2 * len(self.times)
+        self.times = np.resize(self.times, capacity)
+        self.counts = np.resize(self.counts, (capacity, self.counts.shape[1]))
+
+    '''This method records the state reached at time t, according to the policy.'''
+    def record(self, t, counts):
+        row = self.as_row(counts)
+        if self.policy == "grid":
+            # The grid times before t keep the previous state
+            end = int(np.searchsorted(self.times, t, side='left'))
+            if end > self.size and self.last_counts is not None:
+                self.counts[self.size:end] = self.last_counts
+                self.size = end
+        elif self.steps % self.every_n == 0:
+            if self.size == len(self.times):
+                if self.sink is None:
+                    self.grow()
+                else:
+                    self.flush()
+            self.times[self.size] = t
+            self.counts[self.size] = row
+            self.size += 1
+            self.last_recorded = True
+        else:
+            self.last_recorded = False
+        self.steps += 1
+        self.last_time = t
+        self.last_counts = row
+
+    '''This method records the states reached by a sequence of steps (their times and one
+    row of amounts per step) at once, as a call of record for each of them.'''
+    def record_many(self, times, counts):
+        if len(times) == 0:
+            return
+        counts = np.asarray(counts)
+        if self.counts.dtype.kind == 'i' and counts.dtype.kind == 'f' and (counts != np.floor(counts)).any():
+            self.counts = self.counts.astype(float)
+
+        if self.policy == "grid":
+            # A time of the grid takes the state after the last step not later than it
+            end = int(np.searchsorted(self.times, times[-1], side='left'))
+            if end > self.size:
+                rows = np.searchsorted(times, self.times[self.size:end], side='right') - 1
+                filled = self.counts[self.size:end]
+                filled[:] = counts[np.maximum(rows, 0)]
+                if self.last_counts is not None:
+                    filled[rows < 0] = self.last_counts
+                self.size = end
+        else:
+            selected = np.flatnonzero((self.steps + np.arange(len(times))) % self.every_n == 0)
+            if self.sink is None:
+                while self.size + len(selected) > len(self.times):
+                    self.grow()
+            elif self.size + len(selected) > len(self.times):
+                self.flush()
+                if len(selected) > len(self.times):
+                    self.sink.write(times[selected], counts[selected])
+                    selected = selected[:0]
+            self.times[self.size:self.size + len(selected)] = times[selected]
+            self.counts[self.size:self.size + len(selected)] = counts[selected]
+            self.size += len(selected)
+            self.last_recorded = (self.steps + len(times) - 1) % self.every_n == 0
+        self.steps += len(times)
+        self.last_time = float(times[-1])
+        self.last_counts = counts[-1].copy()
+
+    '''This method returns the recorded trajectory as a dict of NumPy arrays, time and
+    one array for each species, compatible with plot_gillepsie. The last state reached
+    is added (or, on a grid, carried forward to the remaining times) without changing
+    the recorder, so the simulation can go on after the call.'''
+    def get_evolution(self):
+        if self.sink is not None and self.policy != "grid":
+            # The trajectory is read back from the sink
+            self.flush()
+            evolution = self.sink.read()
+            if self.last_counts is not None and not self.last_recorded:
+                evolution[TIME] = np.append(evolution[TIME], self.last_time)
+                for i, s_id in enumerate(self.species_ids):
+                    evolution[s_id] = np.append(evolution[s_id], self.last_counts[i])
+            return evolution
+
+        times = self.times[:self.size]
+        counts = self.counts[:self.size]
+        if self.last_counts is not None:
+            if self.policy == "grid" and self.size < len(self.times):
+                times = self.times
+                rest = np.broadcast_to(self.last_counts, (len(self.times) - self.size, len(self.species_ids)))
+                counts = np.concatenate((counts, rest.astype(counts.dtype)))
+            elif self.policy != "grid" and not self.last_recorded:
+                times = np.append(times, self.last_time)
+                counts = np.concatenate((counts, self.last_counts[None, :].astype(counts.dtype)))
+
+        evolution = {TIME: times}
+        evolution.update({s_id: counts[:, i] for i, s_id in enumerate(self.species_ids)})
+        return evolution
+
+    '''This method appends the records in memory to the sink and empties the chunk.'''
+    def flush(self):
+        if self.sink is not None and self.policy != "grid" and self.size > 0:
+            self.sink.write(self.times[:self.size], self.counts[:self.size])
+            self.size = 0
+
+    '''This method writes the end of the trajectory to the sink, if any, and closes it:
+    the last state reached if it has not been recorded, or the whole grid. The trajectory
+    can still be read with get_evolution().'''
+    def close(self):
+        if self.sink is None:
+            return
+        if self.policy == "grid":
+            evolution = self.get_evolution()
+            self.sink.truncate(0)
+            self.sink.write(evolution[TIME], np.column_stack([evolution[s_id] for s_id in self.species_ids]))
+        else:
+            if self.last_counts is not None and not self.last_recorded:
+                if self.size == len(self.times):
+                    self.flush()
+                self.times[self.size] = self.last_time
+                self.counts[self.size] = self.last_counts
+                self.size += 1
+                self.last_recorded = True
+            self.flush()
+        self.sink.close()
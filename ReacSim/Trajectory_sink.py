@@ -0,0 +1,269 @@
+# Standard Library
+import os
+from abc import ABC, abstractmethod
+
+# Third part libraries
+import numpy as np
+import pandas as pd
+
+# Local Modules
+from Constants import *
+from Trajectory_store import (TrajectoryStore, STORE_EXTENSION, HEADER_SIZE, TIME_INDEX_STRIDE, store_dtype,
+                              store_header, store_index)
+
+'''Sinks of the trajectories written to disk while the simulation runs. With a sink,
+the TrajectoryRecorder keeps in memory only a chunk of chunk_size records: when it is
+full, the chunk is appended to the sink and the memory is reused, so the memory used
+does not depend on t_max. A sink is one of:
+    - "npy": a single .npy file with a structured array, one float64 field for the time
+      and one for each species (np.load(path, mmap_mode='r')['X']); the header is
+      rewritten with the number of records every time the file is synced;
+    - "csv": a CSV file with a column for the time and one for each species;
+    - "chunks": a directory with a compressed .npz file for every chunk, with one
+      array for the time and one for each species (columnar chunks);
+    - "store": a trajectory store (see Trajectory_store), a single file with one or more
+      replicates, indexed by time, queried through numpy.memmap.
+A sink is pickled with the checkpoints of the simulation (see Checkpoint): it keeps
+its path and the length of the data written so far, and a restored sink drops what
+was written after the checkpoint, so the run continues writing exactly the same file.'''
+
+CHUNK_SIZE = 65536      # Records kept in memory by a recorder with a sink
+
+class TrajectorySink(ABC):
+    extension = ""
+
+    def __init__(self, path, species_ids):
+        self.path = path
+        self.species_ids = list(species_ids)
+        self.rows = 0
+        self.file = None
+        self.open()
+        self.truncate(0)
+
+    '''This method opens the sink for writing, keeping what it contains.'''
+    def open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        mode = "r+b" if os.path.exists(self.path) else "w+b"
+        self.file = open(self.path, mode)
+
+    '''This method appends records to the sink: times is an array of n times and counts
+    an (n x species) array of amounts.'''
+    @abstractmethod
+    def write(self, times, counts):
+        pass
+
+    '''This method brings the sink back to its first rows records.'''
+    @abstractmethod
+    def truncate(self, rows):
+        pass
+
+    '''This method writes to disk everything appended so far, so that read() returns it.'''
+    def sync(self):
+        if self.file is not None:
+            self.file.flush()
+
+    '''This method returns the trajectory in the sink as a dict of arrays, time and one
+    array for each species, compatible with plot_gillepsie.'''
+    @abstractmethod
+    def read(self):
+        pass
+
+    def close(self):
+        if self.file is not None:
+            self.sync()
+            self.file.close()
+            self.file = None
+
+    def __getstate__(self):
+        self.sync()
+        return {key: value for key, value in self.__dict__.items() if key != "file"}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.file = None
+        self.open()
+        self.truncate(self.rows)
+
+
+class NpySink(TrajectorySink):
+    extension = ".npy"
+    MAGIC = b"\x93NUMPY\x02\x00"
+
+    def __init__(self, path, species_ids):
+        self.dtype = np.dtype([(TIME, "<f8")] + [(s_id, "<f8") for s_id in species_ids])
+        # The header is padded to the length it has with the largest number of records,
+        # so it can be rewritten in place
+        self.header_length = len(self.header(10 ** 20))
+        super().__init__(path, species_ids)
+
+    '''This method returns the header of the .npy file for a number of records.'''
+    def header(self, rows):
+        description = repr({"descr": self.dtype.descr, "fortran_order": False, "shape": (rows,)})
+        length = getattr(self, "header_length", None)
+        if length is None:
+            length = -(-(len(self.MAGIC) + 4 + len(description) + 1) // 64) * 64
+        description = description.ljust(length - len(self.MAGIC) - 4 - 1) + "\n"
+        return self.MAGIC + len(description).to_bytes(4, "little") + description.encode("latin1")
+
+    def write(self, times, counts):
+        records = np.column_stack((times, counts)).astype("<f8")
+        self.file.seek(self.header_length + self.rows * self.dtype.itemsize)
+        self.file.write(records.tobytes())
+        self.rows += len(records)
+
+    def truncate(self, rows):
+        self.rows = rows
+        self.file.truncate(self.header_length + rows * self.dtype.itemsize)
+        self.sync()
+
+    def sync(self):
+        if self.file is not None:
+            self.file.seek(0)
+            self.file.write(self.header(self.rows))
+            self.file.flush()
+
+    def read(self):
+        self.sync()
+        data = np.load(self.path, mmap_mode="r") if self.rows > 0 else np.zeros(0, dtype=self.dtype)
+        return {name: data[name] for name in self.dtype.names}
+
+
+class CsvSink(TrajectorySink):
+    extension = ".csv"
+
+    def write(self, times, counts):
+        self.file.seek(self.offsets[-1][1])
+        lines = "".join(",".join(map(repr, row)) + "\n"
+                        for row in zip(times.tolist(), *np.asarray(counts).T.tolist()))
+        self.file.write(lines.encode())
+        self.rows += len(times)
+        self.offsets.append((self.rows, self.file.tell()))
+
+    def truncate(self, rows):
+        # Number of records and length of the file after the header and after every write
+        if rows == 0 or not hasattr(self, "offsets"):
+            header = (",".join([TIME] + self.species_ids) + "\n").encode()
+            self.file.seek(0)
+            self.file.write(header)
+            self.offsets = [(0, len(header))]
+        while self.offsets[-1][0] > rows:
+            self.offsets.pop()
+        self.rows, length = self.offsets[-1]
+        self.file.truncate(length)
+        self.sync()
+
+    def read(self):
+        self.sync()
+        data = pd.read_csv(self.path, float_precision="round_trip")
+        return {name: data[name].to_numpy() for name in data.columns}
+
+
+class ChunkedSink(TrajectorySink):
+    extension = ""
+
+    def open(self):
+        os.makedirs(self.path, exist_ok=True)
+        self.file = None
+
+    def chunk_path(self, index):
+        return os.path.join(self.path, f"chunk_{index:06d}.npz")
+
+    def chunk_files(self):
+        return sorted(f for f in os.listdir(self.path) if f.startswith("chunk_") and f.endswith(".npz"))
+
+    def write(self, times, counts):
+        counts = np.asarray(counts)
+        columns = {s_id: counts[:, i] for i, s_id in enumerate(self.species_ids)}
+        np.savez_compressed(self.chunk_path(len(self.chunk_rows)), **{TIME: times}, **columns)
+        self.chunk_rows.append(len(times))
+        self.rows += len(times)
+
+    def truncate(self, rows):
+        if rows == 0 or not hasattr(self, "chunk_rows"):
+            self.chunk_rows = []
+        # The chunks written after the first rows records are removed
+        while sum(self.chunk_rows) > rows:
+            self.chunk_rows.pop()
+        for filename in self.chunk_files()[len(self.chunk_rows):]:
+            os.remove(os.path.join(self.path, filename))
+        self.rows = sum(self.chunk_rows)
+
+    def read(self):
+        chunks = []
+        for index in range(len(self.chunk_rows)):
+            with np.load(self.chunk_path(index)) as chunk:
+                chunks.append({name: chunk[name] for name in [TIME] + self.species_ids})
+        return {name: np.concatenate([chunk[name] for chunk in chunks]) if chunks else np.zeros(0)
+                for name in [TIME] + self.species_ids}
+
+
+class StoreSink(TrajectorySink):
+    extension = STORE_EXTENSION
+
+    def __init__(self, path, species_ids):
+        self.dtype = store_dtype(species_ids)
+        self.replicates = []    # Index entries of the replicates completed
+        self.offset = HEADER_SIZE
+        self.time_index = []
+        super().__init__(path, species_ids)
+
+    def write(self, times, counts):
+        records = np.column_stack((times, counts)).astype("<f8")
+        self.file.seek(self.offset + self.rows * self.dtype.itemsize)
+        self.file.write(records.tobytes())
+        # The time of one record every TIME_INDEX_STRIDE is added to the time index
+        first = -self.rows % TIME_INDEX_STRIDE
+        self.time_index.extend(records[first::TIME_INDEX_STRIDE, 0].tolist())
+        self.rows += len(records)
+
+    '''The records of the current replicate after the first rows are dropped, the
+    replicates completed are kept.'''
+    def truncate(self, rows):
+        self.rows = rows
+        del self.time_index[-(-rows // TIME_INDEX_STRIDE):]
+        self.file.truncate(self.offset + rows * self.dtype.itemsize)
+        self.sync()
+
+    '''This method completes the current replicate: the next records are written in a
+    new replicate of the store.'''
+    def new_replicate(self):
+        if self.rows > 0:
+            self.replicates.append(self.entry())
+            self.offset += self.rows * self.dtype.itemsize
+            self.rows = 0
+            self.time_index = []
+
+    '''This method returns the index entry of the current replicate.'''
+    def entry(self):
+        return {"offset": self.offset, "rows": self.rows, "time_index": list(self.time_index)}
+
+    '''The index is written after the records and the header points to it, so the file
+    is a complete store after every sync.'''
+    def sync(self):
+        if self.file is not None:
+            end = self.offset + self.rows * self.dtype.itemsize
+            index = store_index(self.species_ids, self.replicates + ([self.entry()] if self.rows > 0 else []))
+            self.file.seek(end)
+            self.file.write(index)
+            self.file.truncate(end + len(index))
+            self.file.seek(0)
+            self.file.write(store_header(len(self.species_ids), end, len(index)))
+            self.file.flush()
+
+    '''This method returns the last replicate of the store.'''
+    def read(self):
+        self.sync()
+        store = TrajectoryStore(self.path)
+        if len(store) == 0:
+            return {name: np.zeros(0) for name in self.dtype.names}
+        return store.get_evolution(-1)
+
+
+OUTPUT_FORMATS = {
+    "npy": NpySink,
+    "csv": CsvSink,
+    "chunks": ChunkedSink,
+    "store": StoreSink
+}
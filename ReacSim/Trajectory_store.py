@@ -0,0 +1,151 @@
+# Standard Library
+import json
+import struct
+
+# Third part libraries
+import numpy as np
+import pandas as pd
+
+# Local Modules
+from Constants import *
+
+'''Store of trajectories, a single file with any number of replicates of the same
+model, read back with numpy.memmap: the queries return views of the file, the data
+are never copied nor loaded as a whole. The file is made of:
+    - a header of HEADER_SIZE bytes: the magic string, the version of the format, the
+      number of species and the position and the length of the index;
+    - the records of every replicate, one after the other: a float64 field for the time
+      and one for each species, as in a structured NumPy array;
+    - the index, in JSON: the species (their order is the order of the fields), the
+      stride of the time indexes and, for every replicate, the position of its records,
+      their number and its time index, the time of one record every stride.
+A time window is found with two binary searches: on the time index, that is small and
+in memory, and then on the stride records of the file between two of its entries, so
+only one page of the records is read. The window starts at the last record not later
+than its start, the state of the trajectory at that time, and ends at the last record
+not later than its end. The store is written by StoreSink (see Trajectory_sink), while
+the simulation runs or replicate after replicate by an Ensemble.'''
+
+STORE_MAGIC = b"RSTORE\x00\x00"
+STORE_VERSION = 1
+STORE_EXTENSION = ".rstore"
+HEADER_FORMAT = "<8sIIQQ"       # Magic, version, species, index position and length
+HEADER_SIZE = 64
+TIME_INDEX_STRIDE = 4096        # Records between two entries of a time index
+
+'''This function returns the dtype of the records of a store.'''
+def store_dtype(species_ids):
+    return np.dtype([(TIME, "<f8")] + [(s_id, "<f8") for s_id in species_ids])
+
+'''This function returns the header of a store, padded to HEADER_SIZE bytes.'''
+def store_header(species_count, index_offset, index_length):
+    header = struct.pack(HEADER_FORMAT, STORE_MAGIC, STORE_VERSION, species_count, index_offset, index_length)
+    return header.ljust(HEADER_SIZE, b"\x00")
+
+'''This function returns the index of a store, as JSON bytes.'''
+def store_index(species_ids, replicates):
+    index = {"species": list(species_ids), "time_index_stride": TIME_INDEX_STRIDE, "replicates": replicates}
+    return json.dumps(index).encode()
+
+
+class TrajectoryStore:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as store_file:
+            magic, version, species_count, index_offset, index_length = struct.unpack(
+                HEADER_FORMAT, store_file.read(HEADER_SIZE)[:struct.calcsize(HEADER_FORMAT)])
+            if magic != STORE_MAGIC:
+                raise Exception(f"{path} is not a trajectory store.")
+            if version != STORE_VERSION:
+                raise Exception(f"Trajectory store {path} has version {version}, expected {STORE_VERSION}.")
+            store_file.seek(index_offset)
+            index = json.loads(store_file.read(index_length))
+
+        self.species_ids = index["species"]
+        if len(self.species_ids) != species_count:
+            raise Exception(f"Trajectory store {path} is damaged.")
+        self.species_index = {s_id: i for i, s_id in enumerate(self.species_ids)}
+        self.dtype = store_dtype(self.species_ids)
+        self.stride = index["time_index_stride"]
+        self.replicates = index["replicates"]
+        self.time_indexes = [np.asarray(r["time_index"], dtype=float) for r in self.replicates]
+
+        # The records are mapped, not read: only the pages touched by the queries are loaded
+        self.data = None
+        if index_offset > HEADER_SIZE:
+            self.data = np.memmap(path, dtype=np.uint8, mode="r", shape=(index_offset,))
+
+    '''This method returns the number of replicates in the store.'''
+    def __len__(self):
+        return len(self.replicates)
+
+    '''This method returns the records of a replicate, a structured array that is a
+    view of the file.'''
+    def records(self, replicate=0):
+        entry = self.replicates[replicate]
+        if entry["rows"] == 0:
+            return np.zeros(0, dtype=self.dtype)
+        end = entry["offset"] + entry["rows"] * self.dtype.itemsize
+        return self.data[entry["offset"]:end].view(self.dtype)
+
+    '''This method returns the number of records of a replicate whose time is not
+    later than t (side='right') or earlier than t (side='left'), as searchsorted on the
+    times, with the time index of the replicate.'''
+    def search(self, replicate, t, side='right'):
+        time_index = self.time_indexes[replicate]
+        block = int(np.searchsorted(time_index, t, side=side))
+        if block == 0:
+            return 0
+        start = (block - 1) * self.stride
+        times = self.records(replicate)[TIME][start:start + self.stride]
+        return start + int(np.searchsorted(times, t, side=side))
+
+    '''This method returns the first and the last (excluded) record of the time window
+    from t_start to t_end of a replicate (the whole trajectory if they are None).'''
+    def window(self, replicate=0, t_start=None, t_end=None):
+        replicate = range(len(self.replicates))[replicate]
+        start = 0 if t_start is None else max(self.search(replicate, t_start) - 1, 0)
+        end = self.replicates[replicate]["rows"] if t_end is None else self.search(replicate, t_end)
+        return start, max(start, end)
+
+    '''This method returns the time window from t_start to t_end of a replicate, for
+    the given species (all if None), as a dict of arrays, time and one array for each
+    species, compatible with plot_gillepsie. The arrays are views of the file.'''
+    def query(self, species=None, t_start=None, t_end=None, replicate=0):
+        species = self.species_ids if species is None else list(species)
+        for s_id in species:
+            if s_id not in self.species_index:
+                raise Exception(f"Species '{s_id}' not found in the trajectory store.")
+        start, end = self.window(replicate, t_start, t_end)
+        records = self.records(replicate)[start:end]
+        evolution = {TIME: records[TIME]}
+        evolution.update({s_id: records[s_id] for s_id in species})
+        return evolution
+
+    '''This method returns the whole trajectory of a replicate (see query).'''
+    def get_evolution(self, replicate=0):
+        return self.query(replicate=replicate)
+
+    '''This method returns the mean of the replicates, that must have been recorded on
+    the same times (e.g. on the grid of an Ensemble), for the given species, as a dict
+    of arrays as query.'''
+    def mean_evolution(self, species=None):
+        if len(self.replicates) == 0:
+            raise Exception(f"Trajectory store {self.path} is empty.")
+        first = self.query(species)
+        mean = {s_id: np.zeros(len(first[TIME])) for s_id in first if s_id != TIME}
+        for replicate in range(len(self.replicates)):
+            evolution = self.query(species, replicate=replicate)
+            if not np.array_equal(evolution[TIME], first[TIME]):
+                raise Exception("The replicates of the trajectory store are not recorded on the same times.")
+            for s_id in mean:
+                mean[s_id] += evolution[s_id]
+        return {TIME: np.array(first[TIME]), **{s_id: m / len(self.replicates) for s_id, m in mean.items()}}
+
+    '''This method returns the trajectory of a replicate, or the mean of the replicates
+    if there are more than one and replicate is None (see mean_evolution), for the given
+    species as a DataFrame.'''
+    def to_dataframe(self, species=None, replicate=None):
+        if replicate is None and len(self.replicates) > 1:
+            return pd.DataFrame(self.mean_evolution(species))
+        return pd.DataFrame(self.query(species, replicate=replicate or 0))
@@ -0,0 +1,39 @@
+# Standard Library
+import time
+
+'''Budget of wall-clock time of a simulation, enforced by the engine itself: the loop
+of the simulation asks the budget at every step whether it is exhausted, and stops
+cleanly if it is, keeping the trajectory computed so far. The clock is read only once
+every check_every steps, so the cost of the check is negligible; the engines whose
+steps are long (a block of the compiled kernel) read it at every step with exceeded().
+A budget of None never expires.'''
+
+CHECK_EVERY = 100       # Steps between two readings of the clock
+
+class WallClockBudget:
+    def __init__(self, seconds=None, check_every=CHECK_EVERY):
+        if seconds is not None and seconds <= 0:
+            raise Exception("The wall-clock budget must be greater than 0.")
+        self.seconds = seconds
+        self.check_every = check_every
+        self.start()
+
+    '''This method starts the budget: the run can last seconds from now.'''
+    def start(self):
+        self.deadline = None if self.seconds is None else time.perf_counter() + self.seconds
+        self.countdown = self.check_every
+
+    '''This method returns True if the deadline has passed.'''
+    def exceeded(self):
+        return self.deadline is not None and time.perf_counter() >= self.deadline
+
+    '''This method is called at every step: it returns True if the deadline has passed,
+    reading the clock once every check_every calls.'''
+    def expired(self):
+        if self.deadline is None:
+            return False
+        self.countdown -= 1
+        if self.countdown > 0:
+            return False
+        self.countdown = self.check_every
+        return self.exceeded()
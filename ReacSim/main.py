@@ -1,13 +1,25 @@
 # This is a sample Python script.
 import argparse
 import time
-from multiprocessing import Process
 from pathlib import Path
 
 from Gillespie_events import *
+from Gillespie_vectorized import GillespieVectorized
+from Next_reaction_method import NextReactionMethod
+from Tau_leaping import TauLeaping
+from Chemical_langevin import ChemicalLangevin
+from Hybrid_simulation import HybridSimulation
+from Gillespie_batched import GillespieBatched
+from Gillespie_jit import GillespieJit
+from Reaction_selection import SELECTION_STRATEGIES
+from Trajectory_recorder import RECORDING_POLICIES
+import Ensemble
+import Model_cache
+import Checkpoint
+import Batch
+from Trajectory_sink import OUTPUT_FORMATS
 from Graph_generation import *
 from ODE_simulation import *
-import Parser
 
 
 '''if __name__ == '__main__':
@@ -36,17 +48,145 @@ import Parser
     print(f"Execution time ODEs: {time.time() - t:.3f}")'''
 T_MAX=0
 
-def run_gillespie(parser, filename):
+# Stochastic simulation engines selectable from the command line
+ENGINES = {
+    "direct": Gillespie,
+    "vectorized": GillespieVectorized,
+    "next-reaction": NextReactionMethod,
+    "tau-leap": TauLeaping,
+    "langevin": ChemicalLangevin,
+    "hybrid": HybridSimulation,
+    "batched": GillespieBatched,
+    "jit": GillespieJit
+}
+
+'''This function runs a stochastic simulation of the model and returns the simulation,
+with its output closed. With a max_wall_time (in seconds) the engine stops by itself
+when it runs out. With resume=True and the checkpoint_path option, the run continues
+from the checkpoint if it exists.'''
+def simulate(model, filename, t_max, engine="direct", options=None, max_wall_time=None, resume=False):
+    options = options or {}
+    checkpoint_path = options.get("checkpoint_path")
+    if resume and checkpoint_path is not None and os.path.exists(checkpoint_path):
+        Gillespie_sim = Checkpoint.load_checkpoint(checkpoint_path)
+        Gillespie_sim.t_max = t_max
+        Gillespie_sim.set_run_limits(max_wall_time, checkpoint_path, options["checkpoint_interval"])
+        print(f"Resuming {filename} from the checkpoint at t={Gillespie_sim.t:g}")
+    else:
+        Gillespie_sim = ENGINES[engine](model, t_max, **options, max_wall_time=max_wall_time)
+    Gillespie_sim.gillespie_ssa()
+    Gillespie_sim.close_output()
+    return Gillespie_sim
+
+'''This function runs the replicates of the model, saves their statistics to a CSV file
+and returns the statistics and the path of the file (see Ensemble).'''
+def simulate_ensemble(model, filename, t_max, engine, options, replicates, workers, seed, grid_step, store=None):
+    ensemble = Ensemble.Ensemble(model, t_max, ENGINES[engine], options, grid_step, store=store)
+    statistics = ensemble.run(replicates, workers, seed)
+    csv_path = f"./Example/Ensemble/{filename[:-4]}.csv"
+    os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+    ensemble.write_csv(csv_path)
+    return statistics, csv_path
+
+'''This function runs a stochastic simulation of the model and plots it. With a
+max_wall_time (in seconds) the engine stops by itself when it runs out, and the
+partial trajectory is plotted. It returns the status of the simulation
+("completed" or "truncated at t=..."), or None if it failed. With resume=True and the
+checkpoint_path option, the run continues from the checkpoint if it exists.'''
+def run_gillespie(model, filename, t_max, engine="direct", options=None, dfs=None, max_wall_time=None,
+                  resume=False):
     try:
         t = time.time()
-        Gillespie_sim = Gillespie(parser, T_MAX)
-        Gillespie_sim.gillespie_ssa()
+        Gillespie_sim = simulate(model, filename, t_max, engine, options, max_wall_time, resume)
         evolution = Gillespie_sim.get_evolution()
-        plot_gillepsie(evolution, T_MAX, filename[:-4], parser.dfs)
+        plot_gillepsie(evolution, t_max, filename[:-4], dfs)
+        if Gillespie_sim.truncated_at is not None:
+            print(f"{RED}[TIMEOUT] Gillespie took too long for {filename}: {Gillespie_sim.status}, "
+                  f"partial trajectory plotted{RESET}")
         print(f"Execution time with Gillespie for {filename}: {time.time() - t:.3f}")
+        return Gillespie_sim.status
     except Exception as e:
         print(f"{RED}[Gillespie ERROR] {filename}: {e}{RESET}")
 
+def run_ensemble(model, filename, t_max, engine, options, replicates, workers, seed, grid_step, dfs=None, store=None):
+    try:
+        t = time.time()
+        statistics, csv_path = simulate_ensemble(model, filename, t_max, engine, options, replicates, workers, seed,
+                                                 grid_step, store)
+        print(f"Execution time of {replicates} replicates for {filename}: {time.time() - t:.3f}, statistics saved in {csv_path}")
+    except Exception as e:
+        print(f"{RED}[Ensemble ERROR] {filename}: {e}{RESET}")
+        return
+    # The statistics are already saved: a failure of the plot is reported on its own
+    try:
+        plot_gillepsie({TIME: statistics[TIME], **statistics["mean"]}, t_max, f"{filename[:-4]} (mean of {replicates})",
+                       dfs)
+    except Exception as e:
+        print(f"{RED}[Plot ERROR] {filename}: {e}{RESET}")
+
+'''This function returns the options of the simulation of a file: a single simulation
+writes its trajectory and saves its checkpoints in files of its own.'''
+def file_options(args, options, filename):
+    if args.output is not None:
+        extension = OUTPUT_FORMATS[args.output_format].extension
+        options = {**options, "output": str(args.output / f"{filename[:-4]}{extension}"),
+                   "output_format": args.output_format}
+    if args.checkpoint_dir is not None:
+        options = {**options, "checkpoint_path": str(args.checkpoint_dir / f"{filename[:-4]}.ckpt"),
+                   "checkpoint_interval": args.checkpoint_interval}
+    return options
+
+'''This function is the job of the stochastic simulation of an SBML file in the batch
+mode (see Batch): the model is loaded, from the cache if possible, and simulated without
+plotting it, or its replicates are run if ensemble (replicates, workers, seed, grid_step,
+store) is given. It returns the status of the simulation.'''
+def stochastic_job(file_path, inference_directory, use_cache, t_max, engine, options, max_wall_time=None,
+                   resume=False, ensemble=None):
+    filename = os.path.basename(file_path)
+    model, _ = Model_cache.load_model(file_path, inference_directory, use_cache=use_cache)
+    if ensemble is not None:
+        _, csv_path = simulate_ensemble(model, filename, t_max, engine, options, *ensemble)
+        return f"{STATUS_COMPLETED}, {ensemble[0]} replicates in {csv_path}"
+    return simulate(model, filename, t_max, engine, options, max_wall_time, resume).status
+
+'''This function is the job of the ODE simulation of an SBML file in the batch mode.'''
+def ode_job(file_path, t_max):
+    simulate_odes_road_runner(file_path, t_max, os.path.basename(file_path)[:-4], plot=False)
+    return STATUS_COMPLETED
+
+'''This function prints the result of a job of the batch mode as soon as it ends.'''
+def report_job(result):
+    color, reset = (RED, RESET) if result["failed"] else ("", "")
+    print(f"{color}[{result['engine']}] {result['file']}: {result['status']} ({result['seconds']:.3f} s){reset}")
+
+'''This function runs the simulations of the files in the batch mode: the stochastic
+simulation and the ODE simulation of every file are two (file, engine) jobs, run on a
+pool of workers processes (all the cores if 0, see Batch), each one killed if it lasts
+more than job_timeout seconds. Nothing is plotted: the results are printed as soon as
+the jobs end and then in a summary table, saved to the summary CSV file if given.'''
+def run_batch(files, t_max, engine, options, args, inference_directory):
+    max_wall_time = args.max_time_gillespie if args.max_time_gillespie > 0.0 else None
+    jobs = []
+    for file_path in files:
+        filename = file_path.name
+        ensemble = None
+        if args.replicates > 1:
+            # The replicates are written to the trajectory store of --output, if any
+            store = file_options(args, options, filename).get("output")
+            ensemble = (args.replicates, args.workers, args.seed, args.grid_step, store)
+        stochastic_arguments = (str(file_path), inference_directory, not args.no_cache, t_max, engine,
+                                file_options(args, options, filename), max_wall_time, args.resume, ensemble)
+        jobs.append(Batch.Job(filename, engine, stochastic_job, stochastic_arguments, args.job_timeout))
+        jobs.append(Batch.Job(filename, "ode", ode_job, (str(file_path), t_max), args.job_timeout))
+
+    t = time.time()
+    results = Batch.run_jobs(jobs, args.jobs or None, report=report_job)
+    print(f"\nExecution time of {len(jobs)} jobs: {time.time() - t:.3f}\n")
+    print(Batch.format_summary(results))
+    if args.summary is not None:
+        Batch.write_summary_csv(results, str(args.summary))
+        print(f"Summary saved in {args.summary}")
+
 def main():
     # Single parser with all command-line options
     parser = argparse.ArgumentParser(
@@ -58,7 +198,8 @@ def main():
         "--max-time-gillespie",
         type=float,
         default=0.0,
-        help="Max time (in seconds) for Gillespie simulation. If 0, run without timeout."
+        help="Max time (in seconds) for Gillespie simulation: the simulation stops at the time reached and keeps "
+             "the partial trajectory. If 0, run without timeout."
     )
 
     # One or more SBML files to process
@@ -67,7 +208,7 @@ def main():
         type=Path,
         nargs='+',
         required=True,
-        help="One or more SBML file paths to process"
+        help="One or more SBML file paths to process, or directories whose .xml files are processed"
     )
     parser.add_argument(
         "--t_max",
@@ -75,39 +216,225 @@ def main():
         default=0.0,
         help="T_MAX limit fo the simulation"
     )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES.keys(),
+        default="direct",
+        help="Engine of the stochastic simulation: 'direct' evaluates the kinetic laws reaction by reaction, "
+             "'vectorized' computes all the mass-action propensities with NumPy, "
+             "'next-reaction' uses the Gibson-Bruck Next Reaction Method, "
+             "'tau-leap' uses the approximate tau-leaping with adaptive step, "
+             "'langevin' integrates the Chemical Langevin Equation for large populations, "
+             "'hybrid' integrates the fast reactions as ODEs and simulates the slow ones with the SSA, "
+             "'batched' advances many replicates together with NumPy (with --replicates), "
+             "'jit' runs the loop of the direct method compiled by Numba, and falls back to 'vectorized' "
+             "when Numba is not installed or the model has events."
+    )
+    parser.add_argument(
+        "--selection",
+        choices=SELECTION_STRATEGIES.keys(),
+        default=None,
+        help="Strategy used by the 'direct' engine to select the reaction to fire (default 'linear')."
+    )
+    parser.add_argument(
+        "--epsilon",
+        type=float,
+        default=0.03,
+        help="Error control parameter of the 'tau-leap' engine: bound on the relative change of the propensities in a leap."
+    )
+    parser.add_argument(
+        "--dt",
+        type=float,
+        default=None,
+        help="Step of the 'langevin' and 'hybrid' engines. If omitted, t_max / 1000."
+    )
+    parser.add_argument(
+        "--fast-propensity",
+        type=float,
+        default=100.0,
+        help="Propensity above which a reaction is integrated as an ODE by the 'hybrid' engine."
+    )
+    parser.add_argument(
+        "--fast-population",
+        type=int,
+        default=100,
+        help="Minimum amount of the species changed by a reaction integrated as an ODE by the 'hybrid' engine."
+    )
+    parser.add_argument(
+        "--recording",
+        choices=RECORDING_POLICIES,
+        default="every",
+        help="Recording policy of the trajectory: 'every' step, one step 'every-n', or sampled on a time 'grid'."
+    )
+    parser.add_argument(
+        "--record-every",
+        type=int,
+        default=10,
+        help="Number of steps between two recorded points with the 'every-n' recording policy."
+    )
+    parser.add_argument(
+        "--grid-step",
+        type=float,
+        default=1.0,
+        help="Step of the time grid (from 0 to t_max) of the 'grid' recording policy."
+    )
+    parser.add_argument(
+        "--replicates",
+        type=int,
+        default=1,
+        help="Number of independent replicates. If greater than 1, mean, variance and quantiles of the species "
+             "on the grid of --grid-step are computed while the replicates complete, and saved to a CSV file."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes that run the replicates."
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Seed of the random numbers: a run (or an ensemble, whose replicates derive their seeds from it) is reproducible bit for bit. If omitted, the runs are not reproducible."
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="Directory in which the trajectory of every simulation is written while it runs (<model>.npy, "
+             "<model>.csv, <model>/ or <model>.rstore), keeping in memory only a chunk of records. With "
+             "--replicates, the replicates are written to a trajectory store (--output-format store)."
+    )
+    parser.add_argument(
+        "--output-format",
+        choices=OUTPUT_FORMATS.keys(),
+        default="npy",
+        help="Format of the trajectories written to --output: 'store' is a single file with a time index, "
+             "queried through numpy.memmap (see Trajectory_store.py)."
+    )
+    parser.add_argument(
+        "--checkpoint-dir",
+        type=Path,
+        default=None,
+        help="Directory in which the state of every simulation is saved (<model>.ckpt) every --checkpoint-interval "
+             "seconds and when --max-time-gillespie runs out."
+    )
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=float,
+        default=Checkpoint.CHECKPOINT_INTERVAL,
+        help="Seconds between two checkpoints."
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue every simulation from its checkpoint in --checkpoint-dir, if it exists."
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of processes of the batch mode: if not 1, the stochastic simulation and the ODE simulation of "
+             "every file are independent jobs run on a pool of processes (0: one per core), the plots are not shown "
+             "and the results are collected in a summary table."
+    )
+    parser.add_argument(
+        "--job-timeout",
+        type=float,
+        default=None,
+        help="Seconds after which a job of the batch mode is killed and reported as timed out."
+    )
+    parser.add_argument(
+        "--summary",
+        type=Path,
+        default=None,
+        help="CSV file in which the summary table of the batch mode is saved."
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Parse every SBML file again instead of loading the parsed model from the cache (~/.cache/reacsim)."
+    )
     # Parse all arguments
     args = parser.parse_args()
+    if args.selection is not None and args.engine != "direct":
+        parser.error("--selection is supported only by the direct engine")
+    if args.resume and args.checkpoint_dir is None:
+        parser.error("--resume needs --checkpoint-dir")
+    if args.checkpoint_dir is not None and args.engine == "batched":
+        parser.error("--checkpoint-dir is not supported by the batched engine")
+    if args.output is not None and args.replicates > 1 and args.output_format != "store":
+        parser.error("--output with --replicates needs --output-format store")
+    if args.output is not None and args.engine == "batched" and args.replicates == 1:
+        parser.error("--output is supported by the batched engine only with --replicates")
+    if args.jobs < 0:
+        parser.error("--jobs must be at least 0")
+    if args.job_timeout is not None and args.job_timeout <= 0:
+        parser.error("--job-timeout must be greater than 0")
 
     # Read values
     MAX_TIME_GILLESPIE = args.max_time_gillespie
-    files_to_process = [p.resolve() for p in args.filesbml]  # Absolute paths
+    files_to_process = []   # Absolute paths, the .xml files of a directory in order of name
+    for p in args.filesbml:
+        files_to_process.extend(sorted(p.resolve().glob("*.xml")) if p.is_dir() else [p.resolve()])
     T_MAX = args.t_max
+    ENGINE = args.engine
+    OPTIONS = {"selection": args.selection or "linear", "recording": args.recording}
+    if args.recording == "every-n":
+        OPTIONS["every_n"] = args.record_every
+    elif args.recording == "grid":
+        OPTIONS["grid"] = args.grid_step
+    if ENGINE == "batched":
+        # A single replicate of the batched engine, sampled on the grid of --grid-step
+        OPTIONS = {"replicates": 1, "grid": args.grid_step}
+    elif ENGINE == "tau-leap":
+        OPTIONS["epsilon"] = args.epsilon
+    elif ENGINE == "langevin":
+        OPTIONS["dt"] = args.dt
+    elif ENGINE == "hybrid":
+        OPTIONS["dt"] = args.dt
+        OPTIONS["fast_propensity"] = args.fast_propensity
+        OPTIONS["fast_population"] = args.fast_population
+
+    # Every engine owns its stream of random numbers (see Random_stream), seeded here
+    OPTIONS["rng"] = args.seed
 
     # Path to save CSVs
     current_dir = os.path.dirname(__file__)
     file_path_csv = os.path.join(current_dir, "Example", "Inference_of_stochastic_rate_constant")
 
+    if args.jobs != 1:
+        files = []
+        for file_path in files_to_process:
+            if file_path.exists() and file_path.suffix == ".xml":
+                files.append(file_path)
+            else:
+                print(f"{RED}[SKIP] File does not exist or is not .xml: {file_path}{RESET}")
+        run_batch(files, T_MAX, ENGINE, OPTIONS, args, file_path_csv)
+        return
+
     for file_path in files_to_process:
         if file_path.exists() and file_path.suffix == ".xml":
             filename = file_path.name
             print(f"\nProcessing file: {filename}")
-            parser_instance = Parser.Parser(str(file_path), file_path_csv)
-
-            if MAX_TIME_GILLESPIE > 0.0:
-                # Run Gillespie in a separate process with timeout
-                p = Process(target=run_gillespie, args=(parser_instance, filename))
-                p.start()
-                p.join(timeout=MAX_TIME_GILLESPIE)
-
-                if p.is_alive():
-                    print(f"{RED}[TIMEOUT] Gillespie took too long for {filename}, terminating...{RESET}")
-                    p.terminate()
-                    p.join()
-                else:
+            # The engines receive the libsbml-free ModelSpec, that is cheap to send to a process.
+            # It is loaded from the cache if the file and the inference data have not changed.
+            model, dfs = Model_cache.load_model(str(file_path), file_path_csv, use_cache=not args.no_cache)
+
+            options = file_options(args, OPTIONS, filename)
+
+            if args.replicates > 1:
+                # The replicates are written to the trajectory store of --output, if any
+                run_ensemble(model, filename, T_MAX, ENGINE, OPTIONS, args.replicates, args.workers,
+                             args.seed, args.grid_step, dfs, options.get("output"))
+            elif MAX_TIME_GILLESPIE > 0.0:
+                # The engine enforces the timeout itself, stopping at the time reached
+                status = run_gillespie(model, filename, T_MAX, ENGINE, options, dfs, MAX_TIME_GILLESPIE, args.resume)
+                if status == STATUS_COMPLETED:
                     print(f"Gillespie simulation for {filename} completed within allowed time.")
             else:
                 # Run Gillespie directly (no timeout)
-                run_gillespie(parser_instance, filename)
+                run_gillespie(model, filename, T_MAX, ENGINE, options, dfs, resume=args.resume)
 
             # Always run ODE simulation
             try:
@@ -0,0 +1,43 @@
+# Standard Library
+import os
+import sys
+
+# Third part libraries
+import numpy as np
+import pytest
+
+'''Fixtures of the tests: the modules of ReacSim are flat (they import each other by
+name), so their directory is added to the path, and the models of this directory are
+parsed once for the whole session.'''
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(TEST_DIR), "ReacSim"))
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+from Constants import TIME
+
+'''This function returns the path of a model of the tests.'''
+def model_path(file_name):
+    return os.path.join(TEST_DIR, file_name)
+
+'''This function returns the ModelSpec of a model of the tests.'''
+def load_spec(file_name):
+    import Parser
+    return Parser.Parser(model_path(file_name)).get_model_spec()
+
+'''This function returns, for a species set by an event, the times at which it changes
+and the values it takes.'''
+def changes(evolution, s_id):
+    times, values = np.asarray(evolution[TIME]), np.asarray(evolution[s_id])
+    index = np.nonzero(np.diff(values))[0] + 1
+    return times[index].tolist(), values[index].tolist()
+
+'''Reversible isomerization A <-> B: the mean of A is known exactly (see exact_mean_a).'''
+@pytest.fixture(scope="session")
+def isomerization():
+    return load_spec("isomerization_p.xml")
+
+'''Decay of X with events whose triggers depend only on the time (>, >= and a window).'''
+@pytest.fixture(scope="session")
+def time_events():
+    return load_spec("time_events_p.xml")
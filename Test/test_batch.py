@@ -0,0 +1,42 @@
+# Standard Library
+import time
+
+# Local Modules
+from Constants import *
+import Batch
+
+def sleep(seconds):
+    time.sleep(seconds)
+    return STATUS_COMPLETED
+
+def fail():
+    raise Exception("broken model")
+
+
+def test_job_running_after_its_timeout_is_killed():
+    jobs = [Batch.Job("slow.xml", "direct", sleep, (60,), timeout=0.5),
+            Batch.Job("fast.xml", "direct", sleep, (0,), timeout=30),
+            Batch.Job("broken.xml", "ode", fail)]
+    reported = []
+    start = time.perf_counter()
+    results = Batch.run_jobs(jobs, workers=2, report=reported.append)
+
+    assert time.perf_counter() - start < 30
+    # The results are in the order of the jobs, reported as soon as they end
+    assert [result["file"] for result in results] == ["slow.xml", "fast.xml", "broken.xml"]
+    assert sorted(result["file"] for result in reported) == ["broken.xml", "fast.xml", "slow.xml"]
+    assert results[0]["status"] == STATUS_TIMEOUT.format(0.5) and results[0]["failed"]
+    assert 0.5 <= results[0]["seconds"] < 30
+    assert results[1]["status"] == STATUS_COMPLETED and not results[1]["failed"]
+    assert results[2]["status"] == STATUS_FAILED.format("broken model") and results[2]["failed"]
+
+
+def test_summary_table(tmp_path):
+    results = [Batch.Job("a.xml", "direct", sleep).result(STATUS_COMPLETED, 1.23456)]
+    lines = Batch.format_summary(results).splitlines()
+    assert lines[0].split() == list(Batch.SUMMARY_COLUMNS)
+    assert lines[2].split() == ["a.xml", "direct", STATUS_COMPLETED, "1.235"]
+
+    path = tmp_path / "summary" / "batch.csv"
+    Batch.write_summary_csv(results, str(path))
+    assert path.read_text().splitlines() == [",".join(Batch.SUMMARY_COLUMNS), f"a.xml,direct,{STATUS_COMPLETED},1.235"]
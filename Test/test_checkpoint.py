@@ -0,0 +1,67 @@
+# Third part libraries
+import numpy as np
+import pytest
+
+# Local Modules
+from Constants import *
+from Gillespie_events import Gillespie
+from Next_reaction_method import NextReactionMethod
+from Wall_clock_budget import WallClockBudget
+from Checkpoint import load_checkpoint, fork_checkpoint
+
+T_MAX = 10
+STEPS_BEFORE_CHECKPOINT = 50
+
+ENGINES = [Gillespie, NextReactionMethod]
+
+'''This function runs a simulation until its budget runs out after exactly steps steps
+(the budget reads the clock only once every check_every steps), saving its checkpoint.'''
+def run_until_checkpoint(engine, model, path, steps=STEPS_BEFORE_CHECKPOINT):
+    simulation = engine(model, T_MAX, rng=7)
+    simulation.set_run_limits(checkpoint_path=str(path))
+    simulation.budget = WallClockBudget(1e-9, check_every=steps)
+    simulation.gillespie_ssa()
+    assert simulation.truncated_at is not None
+    return simulation
+
+'''This function continues a simulation without limits, and returns its trajectory.'''
+def finish(simulation):
+    simulation.set_run_limits()
+    simulation.gillespie_ssa()
+    return simulation.get_evolution()
+
+def assert_same_evolution(first, second):
+    assert first.keys() == second.keys()
+    for name in first:
+        np.testing.assert_array_equal(np.asarray(first[name]), np.asarray(second[name]))
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("model", ["isomerization", "time_events"])
+def test_resume_equals_uninterrupted_run(engine, model, request, tmp_path):
+    model = request.getfixturevalue(model)
+    uninterrupted = engine(model, T_MAX, rng=7)
+    uninterrupted.gillespie_ssa()
+
+    path = tmp_path / "run.ckpt"
+    run_until_checkpoint(engine, model, path)
+    resumed = finish(load_checkpoint(str(path)))
+    assert_same_evolution(resumed, uninterrupted.get_evolution())
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_forks_are_independent(engine, isomerization, tmp_path):
+    path = tmp_path / "run.ckpt"
+    parent = run_until_checkpoint(engine, isomerization, path)
+    prefix = len(parent.get_evolution()[TIME])
+
+    evolutions = [finish(fork) for fork in fork_checkpoint(str(path), 3, seed=5)]
+    for evolution in evolutions:
+        np.testing.assert_array_equal(np.asarray(evolution[TIME][:prefix]), np.asarray(parent.get_evolution()[TIME]))
+    # After the fork every replicate has its own random numbers, from its first step
+    first_steps = [evolution[TIME][prefix] for evolution in evolutions]
+    assert len(set(first_steps)) == len(first_steps)
+
+    # A fork does not depend on the others: run alone, it gives the same trajectory
+    alone = fork_checkpoint(str(path), 3, seed=5)[2]
+    assert_same_evolution(finish(alone), evolutions[2])
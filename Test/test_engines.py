@@ -0,0 +1,107 @@
+# Third part libraries
+import numpy as np
+import pytest
+
+# Local Modules
+from Constants import *
+from Ensemble import Ensemble
+from Gillespie_events import Gillespie
+from Next_reaction_method import NextReactionMethod, IndexedPriorityQueue
+from Gillespie_batched import GillespieBatched
+from Gillespie_jit import GillespieJit
+from Reaction_selection import SELECTION_STRATEGIES
+from Tau_leaping import TauLeaping
+from Chemical_langevin import ChemicalLangevin
+from Hybrid_simulation import HybridSimulation
+
+'''The engines are compared on the means of ensembles of the reversible isomerization
+A <-> B, whose exact mean is known: an exact engine must agree with the direct method
+within the statistical error, an approximate one within the statistical error and a
+small bias.'''
+
+T_MAX = 10
+REPLICATES = 200
+SIGMAS = 5          # Tolerance on the difference of two means, in standard errors
+
+'''This function returns the exact mean of A at the times t (A(0) = 200, B(0) = 0).'''
+def exact_mean_a(model, t):
+    k1, k2 = model.parameters["k1"], model.parameters["k2"]
+    total = model.species["A"] + model.species["B"]
+    return total * (k2 + k1 * np.exp(-(k1 + k2) * np.asarray(t))) / (k1 + k2)
+
+def ensemble_statistics(model, engine, options=None, seed=11):
+    return Ensemble(model, T_MAX, engine, options).run(REPLICATES, seed=seed)
+
+'''This function checks that the means of A of two ensembles agree within SIGMAS
+standard errors, plus bias.'''
+def assert_means_agree(statistics, reference, bias=0.0):
+    difference = np.abs(statistics["mean"]["A"] - reference["mean"]["A"])
+    error = np.sqrt((statistics["variance"]["A"] + reference["variance"]["A"]) / REPLICATES)
+    assert np.all(difference <= SIGMAS * error + bias)
+
+
+@pytest.fixture(scope="module")
+def direct(isomerization):
+    return ensemble_statistics(isomerization, Gillespie, seed=3)
+
+
+def test_direct_matches_the_exact_mean(isomerization, direct):
+    difference = np.abs(direct["mean"]["A"] - exact_mean_a(isomerization, direct[TIME]))
+    assert np.all(difference <= SIGMAS * np.sqrt(direct["variance"]["A"] / REPLICATES) + 1e-9)
+
+
+def test_next_reaction_method_matches_direct(isomerization, direct):
+    assert_means_agree(ensemble_statistics(isomerization, NextReactionMethod), direct)
+
+
+@pytest.mark.parametrize("selection", sorted(SELECTION_STRATEGIES))
+def test_selection_strategy_matches_direct(isomerization, direct, selection):
+    assert_means_agree(ensemble_statistics(isomerization, Gillespie, {"selection": selection}), direct)
+
+
+def test_batched_matches_direct(isomerization, direct):
+    assert_means_agree(ensemble_statistics(isomerization, GillespieBatched), direct)
+
+
+def test_batched_ensemble_rejects_the_recording_options(isomerization):
+    with pytest.raises(Exception, match="not supported by the batched engine: recording, selection"):
+        Ensemble(isomerization, T_MAX, GillespieBatched, {"selection": "linear", "recording": "every"})
+    # The options set by the ensemble itself are replaced, the wall-clock budget is passed
+    Ensemble(isomerization, T_MAX, GillespieBatched, {"grid": 0.5, "rng": 1, "max_wall_time": 60}).run(2)
+
+
+def test_jit_matches_direct(isomerization, direct):
+    pytest.importorskip("numba")
+    assert GillespieJit(isomerization, T_MAX).uses_kernel
+    assert_means_agree(ensemble_statistics(isomerization, GillespieJit), direct)
+
+
+'''The approximate engines are checked within the statistical error and a small bias.'''
+def assert_approximates_the_ssa(model, direct, engine, options=None):
+    assert_means_agree(ensemble_statistics(model, engine, options), direct, bias=2.0)
+
+
+def test_tau_leaping_matches_the_ssa(isomerization, direct):
+    assert_approximates_the_ssa(isomerization, direct, TauLeaping)
+
+
+def test_chemical_langevin_matches_the_ssa(isomerization, direct):
+    assert_approximates_the_ssa(isomerization, direct, ChemicalLangevin, {"dt": 0.05})
+
+
+def test_hybrid_matches_the_ssa(isomerization, direct):
+    # With these thresholds the forward reaction is fast, integrated as an ODE, for part of the run
+    options = {"dt": 0.5, "fast_propensity": 5.0, "fast_population": 50}
+    assert_approximates_the_ssa(isomerization, direct, HybridSimulation, options)
+
+
+def test_indexed_priority_queue_keeps_the_minimum_on_top():
+    keys = [5.0, 3.0, 8.0, 1.0, 9.0, 4.0]
+    queue = IndexedPriorityQueue(keys)
+    assert queue.top() == (3, 1.0)
+    queue.update(3, 10.0)
+    assert queue.top() == (1, 3.0)
+    queue.update(4, 0.5)
+    assert queue.top() == (4, 0.5)
+    # The positions stay consistent with the heap
+    assert all(queue.heap[queue.position[index]] == index for index in range(len(keys)))
@@ -0,0 +1,57 @@
+# Local Modules
+from Constants import *
+from Event_queue import EventQueue
+
+def event(event_id):
+    return {ID: event_id}
+
+
+def test_events_are_popped_in_time_order():
+    queue = EventQueue()
+    for event_id, delay_time in (("c", 3.0), ("a", 1.0), ("b", 2.0)):
+        queue.push(event(event_id), delay_time)
+    assert queue.first_time(0.0) == 1.0
+    assert [e[ID] for e in queue.pop_due(0.0, 10.0)[0]] == ["a"]
+    assert queue.pop_due(1.0, 10.0)[1] == 2.0
+    assert queue.pop_due(2.0, 2.5) == ([], None)
+    assert len(queue) == 1 and "c" in queue
+
+
+def test_events_at_the_same_time_are_popped_together_in_push_order():
+    queue = EventQueue()
+    for event_id in ("x", "y", "z"):
+        queue.push(event(event_id), 5.0)
+    due, first = queue.pop_due(0.0, 5.0)
+    assert [e[ID] for e in due] == ["x", "y", "z"] and first == 5.0
+    assert len(queue) == 0
+
+
+def test_cancelled_event_is_skipped_at_the_head():
+    queue = EventQueue()
+    queue.push(event("a"), 1.0)
+    queue.push(event("b"), 2.0)
+    queue.cancel("a")
+    assert "a" not in queue and len(queue) == 1
+    # The entry of "a" is still in the heap until it reaches the head
+    assert len(queue.heap) == 2
+    assert queue.first_time(0.0) == 2.0
+    assert len(queue.heap) == 1
+
+
+def test_rescheduled_event_keeps_only_the_new_time():
+    queue = EventQueue()
+    queue.push(event("a"), 1.0)
+    queue.push(event("a"), 4.0)
+    assert queue["a"][0] == 4.0
+    assert queue.pop_due(0.0, 2.0) == ([], None)
+    due, first = queue.pop_due(0.0, 10.0)
+    assert [e[ID] for e in due] == ["a"] and first == 4.0
+    assert len(queue) == 0 and queue.first_time(0.0) is None
+
+
+def test_events_not_later_than_t_are_discarded():
+    queue = EventQueue()
+    queue.push(event("past"), 1.0)
+    queue.push(event("next"), 3.0)
+    assert queue.first_time(2.0) == 3.0
+    assert "past" not in queue
@@ -0,0 +1,62 @@
+# Standard Library
+import os
+
+# Third part libraries
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.interpolate import interp1d
+
+# Local Modules
+from conftest import model_path
+from Constants import *
+from Gillespie_events import Gillespie
+import Parser
+from Trajectory_recorder import sample_on_grid, time_grid
+
+
+def test_time_grid():
+    np.testing.assert_allclose(time_grid(0.5, 2.0), [0.0, 0.5, 1.0, 1.5, 2.0])
+    # A step that divides t_max up to rounding reaches t_max
+    assert len(time_grid(0.1, 1.0)) == 11
+    with pytest.raises(Exception):
+        time_grid(0, 1.0)
+
+
+def test_sampling_takes_the_previous_step():
+    evolution = {TIME: np.array([0.0, 0.7, 1.2, 3.9]), "A": np.array([5, 4, 6, 2])}
+    grid = np.array([0.0, 0.5, 0.7, 1.0, 2.0, 4.0, 6.0])
+    sampled = sample_on_grid(evolution, ["A"], grid)[:, 0]
+    # The previous interpolation of the former export, with the last value after the end
+    previous = interp1d(evolution[TIME], evolution["A"], kind="previous", bounds_error=False,
+                        fill_value=(5, 2))
+    np.testing.assert_array_equal(sampled, previous(grid))
+    np.testing.assert_array_equal(sampled, [5, 5, 4, 4, 6, 2, 2])
+
+
+def test_grid_recording_is_the_sampled_trajectory(isomerization):
+    grid = time_grid(0.25, 10)
+    runs = {}
+    for recording in ("every", "grid"):
+        simulation = Gillespie(isomerization, 10, recording=recording, grid=grid, rng=1)
+        simulation.gillespie_ssa()
+        runs[recording] = simulation.get_evolution()
+    sampled = sample_on_grid(runs["every"], ["A", "B"], grid)
+    np.testing.assert_array_equal(runs["grid"][TIME], grid)
+    np.testing.assert_array_equal(np.column_stack((runs["grid"]["A"], runs["grid"]["B"])), sampled)
+
+
+def test_export_averages_on_the_grid(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("Example/Generated")
+    os.makedirs("Example/Inference_of_kinetic_laws")
+    parser = Parser.Parser(model_path("isomerization_p.xml"))
+    parser.export_mean_species_counts_csv("forward", 4, t_max=5, grid_step=0.5)
+
+    means = pd.read_csv("Example/Inference_of_kinetic_laws/k1.csv")
+    # The species of the reaction are copied from a set, in any order
+    assert means.columns[0] == TIME and sorted(means.columns[1:]) == ["A", "B"]
+    np.testing.assert_allclose(means[TIME], time_grid(0.5, 5))
+    # A only decays in the model of the single reaction, and A + B is constant
+    assert means["A"].iloc[0] == 200 and (np.diff(means["A"]) <= 0).all()
+    np.testing.assert_allclose(means["A"] + means["B"], 200)
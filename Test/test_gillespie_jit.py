@@ -0,0 +1,59 @@
+# Third part libraries
+import numpy as np
+import pytest
+
+# Local Modules
+from Constants import *
+from Gillespie_vectorized import GillespieVectorized
+from Gillespie_jit import GillespieJit, ssa_kernel
+import Gillespie_jit
+from test_engines import T_MAX, REPLICATES, SIGMAS, exact_mean_a
+
+
+@pytest.mark.parametrize("model", ["isomerization", "time_events"])
+def test_fallback_equals_vectorized(model, request, monkeypatch):
+    model = request.getfixturevalue(model)
+    # Without Numba (the model with events falls back also with Numba)
+    monkeypatch.setattr(Gillespie_jit, "compiled_kernel", None)
+    evolutions = []
+    for engine in (GillespieJit, GillespieVectorized):
+        simulation = engine(model, T_MAX, rng=4)
+        assert engine is GillespieVectorized or not simulation.uses_kernel
+        simulation.gillespie_ssa()
+        evolutions.append(simulation.get_evolution())
+    for name in evolutions[0]:
+        np.testing.assert_array_equal(evolutions[0][name], evolutions[1][name])
+
+
+'''The loop of the kernel is checked without compiling it, run by the interpreter.'''
+def test_kernel_matches_the_exact_mean(isomerization, monkeypatch):
+    monkeypatch.setattr(Gillespie_jit, "compiled_kernel", ssa_kernel)
+    final = []
+    for seed in range(REPLICATES):
+        simulation = GillespieJit(isomerization, T_MAX, rng=seed)
+        assert simulation.uses_kernel
+        simulation.gillespie_ssa()
+        evolution = simulation.get_evolution()
+        assert simulation.species["A"] + simulation.species["B"] == 200
+        assert evolution["A"][-1] == simulation.species["A"]
+        # The last step of a block can pass t_max: the state at t_max is the one before it
+        final.append(evolution["A"][np.searchsorted(evolution[TIME], T_MAX, side='right') - 1])
+    error = np.std(final) / np.sqrt(REPLICATES)
+    assert abs(np.mean(final) - exact_mean_a(isomerization, T_MAX)) <= SIGMAS * error
+
+
+def test_compiled_kernel_equals_the_interpreted_one(isomerization):
+    pytest.importorskip("numba")
+    runs = []
+    for kernel in (Gillespie_jit.compiled_kernel, ssa_kernel):
+        simulation = GillespieJit(isomerization, T_MAX, rng=2)
+        exponentials = simulation.rng.generator.standard_exponential(100)
+        uniforms = simulation.rng.generator.random(100)
+        times, counts = np.empty(100), np.empty((100, 2), dtype=np.int64)
+        steps, t, stopped = kernel(0.0, float(T_MAX), simulation.state, simulation.rates, simulation.term_species,
+                                   simulation.term_orders, simulation.term_starts, simulation.term_ends,
+                                   simulation.reactants, simulation.products, exponentials, uniforms, times, counts)
+        runs.append((steps, t, stopped, times[:steps], counts[:steps]))
+    assert runs[0][:3] == runs[1][:3]
+    np.testing.assert_array_equal(runs[0][3], runs[1][3])
+    np.testing.assert_array_equal(runs[0][4], runs[1][4])
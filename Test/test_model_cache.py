@@ -0,0 +1,75 @@
+# Standard Library
+import os
+import shutil
+
+# Third part libraries
+import pytest
+
+# Local Modules
+from conftest import model_path
+from Constants import *
+import Model_cache
+import Parser
+
+
+@pytest.fixture
+def model_file(tmp_path):
+    path = tmp_path / "isomerization_p.xml"
+    shutil.copy(model_path("isomerization_p.xml"), path)
+    return str(path)
+
+@pytest.fixture
+def cache(tmp_path):
+    return Model_cache.ModelCache(str(tmp_path / "cache"))
+
+'''The Parser is replaced by one that fails, so a load that parses the file fails.'''
+@pytest.fixture
+def no_parser(monkeypatch):
+    def parse(*args, **kwargs):
+        raise AssertionError("the model was parsed again")
+    monkeypatch.setattr(Parser, "Parser", parse)
+
+def entries(cache):
+    return sorted(name for name in os.listdir(cache.directory) if name.endswith(Model_cache.ENTRY_SUFFIX))
+
+
+def test_miss_then_hit(model_file, cache, request):
+    model, _ = Model_cache.load_model(model_file, cache=cache)
+    assert len(entries(cache)) == 1
+
+    request.getfixturevalue("no_parser")
+    cached, _ = Model_cache.load_model(model_file, cache=cache)
+    assert cached.species == model.species
+    assert [r[ID] for r in cached.reactions] == [r[ID] for r in model.reactions]
+
+
+def test_changed_file_is_a_miss(model_file, cache):
+    Model_cache.load_model(model_file, cache=cache)
+    with open(model_file) as sbml_file:
+        text = sbml_file.read()
+    with open(model_file, "w") as sbml_file:
+        sbml_file.write(text.replace('initialAmount="200"', 'initialAmount="100"'))
+
+    model, _ = Model_cache.load_model(model_file, cache=cache)
+    assert model.species["A"] == 100
+    assert len(entries(cache)) == 2
+
+
+def test_no_cache_parses_and_does_not_write(model_file, cache):
+    Model_cache.load_model(model_file, use_cache=False, cache=cache)
+    assert not os.path.isdir(cache.directory)
+
+
+def test_least_recently_used_entry_is_evicted(cache):
+    value = b"x" * 1000
+    cache.put("first", value)
+    os.utime(cache.entry_path("first"), (1, 1))
+    cache.put("second", value)
+    os.utime(cache.entry_path("second"), (2, 2))
+    assert cache.get("first") == value     # Now the most recently used
+
+    cache.max_bytes = 2 * len(value) + 100
+    cache.put("third", value)
+    assert cache.get("second") is None
+    assert cache.get("first") == value
+    assert cache.get("third") == value
@@ -0,0 +1,40 @@
+# Standard Library
+import pickle
+
+# Third part libraries
+import numpy as np
+import pytest
+
+# Local Modules
+from Constants import *
+from Gillespie_events import Gillespie
+from Gillespie_vectorized import GillespieVectorized
+
+
+@pytest.mark.parametrize("engine", [Gillespie, GillespieVectorized])
+def test_pickled_spec_runs_the_same_trajectory(time_events, engine):
+    GillespieVectorized(time_events, 10)    # The compiled code and the matrices are not pickled
+    restored = pickle.loads(pickle.dumps(time_events))
+    assert restored.compiled == {}
+    assert restored.species == time_events.species
+    assert restored.parameters == time_events.parameters
+    assert [r[ID] for r in restored.reactions] == [r[ID] for r in time_events.reactions]
+    assert [e[ID] for e in restored.events] == [e[ID] for e in time_events.events]
+
+    evolutions = []
+    for model in (time_events, restored):
+        simulation = engine(model, 10, rng=1)
+        simulation.gillespie_ssa()
+        evolutions.append(simulation.get_evolution())
+    for name in evolutions[0]:
+        np.testing.assert_array_equal(evolutions[0][name], evolutions[1][name])
+
+
+def test_restored_spec_is_read_only(time_events):
+    restored = pickle.loads(pickle.dumps(time_events))
+    with pytest.raises(TypeError):
+        restored.species["X"] = 0
+    with pytest.raises(TypeError):
+        restored.reactions[0][RATE_CONSTANT] = "k"
+    with pytest.raises(ValueError):
+        restored.stoichiometry[STATE_VECTOR][0] = 0
@@ -0,0 +1,46 @@
+# Third part libraries
+import matplotlib.pyplot as plt
+import pytest
+
+# Local Modules
+from Constants import *
+from Gillespie_events import Gillespie
+from Graph_generation import plot_gillepsie
+from Trajectory_store import TrajectoryStore, STORE_EXTENSION
+import main
+
+@pytest.fixture(autouse=True)
+def close_figures():
+    yield
+    plt.close("all")
+
+
+def test_ensemble_of_species_without_custom_colors(isomerization, tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    main.run_ensemble(isomerization, "isomerization_p.xml", 5, "direct", {}, 4, 1, 1, 1.0, dfs={})
+    output = capsys.readouterr().out
+    assert "ERROR" not in output
+    assert (tmp_path / "Example" / "Ensemble" / "isomerization_p.csv").exists()
+    assert [line.get_label() for line in plt.gca().get_lines()] == ["A", "B"]
+
+
+def test_plot_failure_is_not_an_ensemble_error(isomerization, tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    def fail(*args, **kwargs):
+        raise Exception("no display")
+    monkeypatch.setattr(main, "plot_gillepsie", fail)
+    main.run_ensemble(isomerization, "isomerization_p.xml", 5, "direct", {}, 4, 1, 1, 1.0, dfs={})
+    output = capsys.readouterr().out
+    assert "[Plot ERROR] isomerization_p.xml: no display" in output and "Ensemble ERROR" not in output
+    assert (tmp_path / "Example" / "Ensemble" / "isomerization_p.csv").exists()
+
+
+def test_store_is_plotted_without_data_points(isomerization, tmp_path):
+    path = str(tmp_path / ("run" + STORE_EXTENSION))
+    simulation = Gillespie(isomerization, 10, rng=1, output=path, output_format="store")
+    simulation.gillespie_ssa()
+    simulation.close_output()
+    plot_gillepsie(TrajectoryStore(path), 5, "isomerization")
+    lines = plt.gca().get_lines()
+    assert [line.get_label() for line in lines] == ["A", "B"]
+    assert lines[0].get_xdata().max() <= 5
@@ -0,0 +1,50 @@
+# Standard Library
+import pickle
+
+# Third part libraries
+import numpy as np
+
+# Local Modules
+from Constants import *
+from Ensemble import Ensemble
+from Gillespie_events import Gillespie
+from Random_stream import BLOCK_SIZE, RandomStream
+
+
+def test_blocks_are_the_numbers_of_the_generator():
+    stream = RandomStream(7)
+    uniforms = [stream.random() for _ in range(BLOCK_SIZE + 10)]
+    # The exponentials are drawn after the first two blocks of uniforms
+    exponentials = [stream.exponential() for _ in range(3)]
+
+    generator = np.random.default_rng(7)
+    expected = np.concatenate((generator.random(BLOCK_SIZE), generator.random(BLOCK_SIZE)[:10]))
+    np.testing.assert_array_equal(uniforms, expected)
+    np.testing.assert_array_equal(exponentials, generator.standard_exponential(BLOCK_SIZE)[:3])
+
+
+def test_restored_stream_continues_where_it_was():
+    stream = RandomStream(np.random.SeedSequence(11))
+    for _ in range(100):
+        stream.random()
+    restored = pickle.loads(pickle.dumps(stream))
+    np.testing.assert_array_equal([restored.random() for _ in range(BLOCK_SIZE)],
+                                  [stream.random() for _ in range(BLOCK_SIZE)])
+
+
+def test_same_seed_same_run(isomerization):
+    runs = []
+    for seed in (5, 5, 6):
+        simulation = Gillespie(isomerization, 10, rng=seed)
+        simulation.gillespie_ssa()
+        runs.append(simulation.get_evolution()[TIME])
+    np.testing.assert_array_equal(runs[0], runs[1])
+    assert len(runs[0]) != len(runs[2]) or (runs[0] != runs[2]).any()
+
+
+def test_ensemble_is_reproducible_and_its_replicates_independent(isomerization):
+    statistics = [Ensemble(isomerization, 5).run(8, workers=1, seed=seed) for seed in (3, 3, 4)]
+    np.testing.assert_array_equal(statistics[0]["mean"]["A"], statistics[1]["mean"]["A"])
+    assert (statistics[0]["mean"]["A"] != statistics[2]["mean"]["A"]).any()
+    # The replicates are children of the SeedSequence of the seed: they are not all the same run
+    assert statistics[0]["variance"]["A"][-1] > 0
@@ -0,0 +1,35 @@
+# Standard Library
+import random
+
+# Third part libraries
+import numpy as np
+import pytest
+
+# Local Modules
+from Reaction_selection import SELECTION_STRATEGIES
+
+DRAWS = 20000
+
+'''This function returns the frequencies with which a strategy selects the reactions.'''
+def frequencies(selection, reactions):
+    rng = random.Random(1)
+    selection.uniform = rng.random
+    counts = np.zeros(reactions)
+    for _ in range(DRAWS):
+        counts[selection.select(rng.random() * selection.total())] += 1
+    return counts / DRAWS
+
+
+@pytest.mark.parametrize("name", sorted(SELECTION_STRATEGIES))
+def test_selection_is_proportional_to_the_propensities(name):
+    selection = SELECTION_STRATEGIES[name]()
+    selection.build([1.0, 0.0, 3.0, 6.0])
+    assert selection.total() == pytest.approx(10.0)
+    np.testing.assert_allclose(frequencies(selection, 4), [0.1, 0.0, 0.3, 0.6], atol=0.02)
+
+    # After an update, and after some firings that can change the order of the search
+    selection.update(1, 10.0)
+    for index in (3, 3, 2, 1):
+        selection.fired(index)
+    assert selection.total() == pytest.approx(20.0)
+    np.testing.assert_allclose(frequencies(selection, 4), [0.05, 0.5, 0.15, 0.3], atol=0.02)
@@ -0,0 +1,53 @@
+# Standard Library
+import math
+
+# Third part libraries
+import numpy as np
+import pytest
+
+# Local Modules
+from conftest import changes
+from Constants import *
+from Gillespie_events import Gillespie
+from Simulation_state import SimulationState
+
+
+def test_reset_restores_the_initial_state(time_events):
+    state = SimulationState(time_events, species={"X": 10}, parameters={"k": 1.0})
+    assert state.species["X"] == 10 and state.parameters["k"] == 1.0
+    state.reset()
+    assert state.species == dict(time_events.species)
+    assert state.parameters == dict(time_events.parameters)
+
+
+def test_unknown_override(time_events):
+    with pytest.raises(Exception, match="Unknown species"):
+        SimulationState(time_events, species={"Z": 1})
+
+
+def test_runs_of_the_same_engine_are_independent(time_events):
+    simulation = Gillespie(time_events, 10, rng=1)
+    simulation.reset(species={"X": 5})
+    simulation.gillespie_ssa()
+    assert simulation.get_evolution()["X"][0] == 5
+
+    # The same seed gives the same run as a new engine
+    simulation.reset(rng=3)
+    simulation.gillespie_ssa()
+    fresh = Gillespie(time_events, 10, rng=3)
+    fresh.gillespie_ssa()
+    np.testing.assert_array_equal(simulation.get_evolution()[TIME], fresh.get_evolution()[TIME])
+
+
+def test_overridden_parameter_moves_the_transitions(time_events):
+    simulation = Gillespie(time_events, 10, rng=1)
+    simulation.reset(parameters={"t_at": 5.0, "t_window": 6.5})
+    simulation.gillespie_ssa()
+    evolution = simulation.get_evolution()
+    assert changes(evolution, "At") == ([5.0], [1])
+    assert changes(evolution, "Window") == ([math.nextafter(1.0, math.inf), 6.5], [1, 2])
+
+    # The values of the model are used again by the next run without overrides
+    simulation.reset()
+    simulation.gillespie_ssa()
+    assert changes(simulation.get_evolution(), "At") == ([3.0], [1])
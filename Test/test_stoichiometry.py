@@ -0,0 +1,54 @@
+# Third part libraries
+import pytest
+
+# Local Modules
+from conftest import model_path
+from Constants import *
+from Gillespie_events import Gillespie
+from Gillespie_vectorized import GillespieVectorized
+import Parser
+
+'''This function returns the ModelSpec of the isomerization with the text of the SBML
+file replaced as given.'''
+def edited_isomerization(tmp_path, old, new):
+    with open(model_path("isomerization_p.xml")) as sbml_file:
+        text = sbml_file.read()
+    assert old in text
+    path = tmp_path / "isomerization_p.xml"
+    path.write_text(text.replace(old, new, 1))
+    return Parser.Parser(str(path)).get_model_spec()
+
+
+def test_non_integer_stoichiometry_is_refused_only_by_the_matrix_engines(tmp_path):
+    model = edited_isomerization(tmp_path, '<speciesReference species="B" stoichiometry="1"/>',
+                                 '<speciesReference species="B" stoichiometry="1.5"/>')
+    simulation = Gillespie(model, 10, rng=1)
+    simulation.gillespie_ssa()
+    assert simulation.get_evolution()["B"][-1] > 0
+
+    with pytest.raises(Exception, match="Non integer stoichiometry in reaction 'forward'"):
+        GillespieVectorized(model, 10, rng=1)
+
+
+'''2A -> 3A from A = 1: the reactant is clamped at 0 before the products are added.'''
+@pytest.mark.parametrize("engine", [Gillespie, GillespieVectorized])
+def test_reactants_are_clamped_before_the_products_are_added(tmp_path, engine):
+    model = edited_isomerization(tmp_path, '''<speciesReference species="A" stoichiometry="1"/>
+        </listOfReactants>
+        <listOfProducts>
+          <speciesReference species="B" stoichiometry="1"/>''', '''<speciesReference species="A" stoichiometry="2"/>
+        </listOfReactants>
+        <listOfProducts>
+          <speciesReference species="A" stoichiometry="3"/>''')
+    simulation = engine(model, 10, rng=1)
+    simulation.reset(species={"A": 1})
+    simulation.fire_reaction(0)
+    assert simulation.species["A"] == 3
+
+
+def test_assigned_amounts_are_rounded(isomerization):
+    simulation = GillespieVectorized(isomerization, 10, rng=1)
+    for value, amount in ((2.7, 3), (2.2, 2), (2.5, 2), (3.5, 4)):
+        simulation.set_value("A", value)
+        assert simulation.state[simulation.species_index["A"]] == amount
+        assert simulation.species["A"] == amount
@@ -0,0 +1,48 @@
+# Third part libraries
+import libsbml
+import pytest
+
+# Local Modules
+from conftest import model_path
+import Parser
+
+MODELS = ["isomerization_p.xml", "time_events_p.xml", "SIR_p.xml"]
+
+@pytest.fixture(scope="module", params=MODELS)
+def parser(request):
+    return Parser.Parser(model_path(request.param))
+
+
+def test_elements_are_the_ones_of_the_model(parser):
+    model = parser.model
+    for s_id, element in parser.elements.items():
+        assert element.getId() == s_id
+        assert element.getTypeCode() == model.getElementBySId(s_id).getTypeCode()
+    for elements in (model.getListOfCompartments(), model.getListOfSpecies(), model.getListOfParameters(),
+                     model.getListOfReactions(), model.getListOfEvents()):
+        assert all(element.getId() in parser.elements for element in elements)
+
+
+def test_trigger_identifiers(parser):
+    model = parser.model
+    expected = {element.getId() for elements in (model.getListOfCompartments(), model.getListOfSpecies(),
+                                                 model.getListOfParameters()) for element in elements}
+    assert parser.identifiers == expected
+    assert parser.compartment_ids == [c.getId() for c in model.getListOfCompartments()]
+    assert set(parser.unit_definitions) == {ud.getId() for ud in model.getListOfUnitDefinitions()}
+
+
+def test_ast_symbols():
+    ast = libsbml.parseL3Formula("k1 * power(A, 2) + B / (time + 1)")
+    assert Parser.ast_symbols(ast) == {"k1", "A", "B"}
+    assert Parser.ast_symbols(None) == set()
+
+
+def test_unknown_symbol_in_a_trigger(tmp_path):
+    with open(model_path("time_events_p.xml")) as sbml_file:
+        text = sbml_file.read()
+    assert "<ci>t_after</ci>" in text
+    path = tmp_path / "unknown_p.xml"
+    path.write_text(text.replace("<ci>t_after</ci>", "<ci>t_missing</ci>", 1))
+    with pytest.raises(Exception, match="t_missing"):
+        Parser.Parser(str(path))
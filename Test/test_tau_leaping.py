@@ -0,0 +1,17 @@
+# Local Modules
+from Constants import *
+from Tau_leaping import TauLeaping, SSA_STEPS
+from Wall_clock_budget import WallClockBudget
+import Tau_leaping
+
+
+def test_exact_steps_stop_when_the_budget_runs_out(isomerization, monkeypatch):
+    # Every leap is too short: the engine always falls back to batches of exact steps
+    monkeypatch.setattr(Tau_leaping, "SSA_THRESHOLD", float("inf"))
+    simulation = TauLeaping(isomerization, 1000)
+    simulation.budget = WallClockBudget(1e-9, check_every=5)
+    simulation.gillespie_ssa()
+
+    assert simulation.truncated_at is not None
+    assert simulation.t < 1000
+    assert len(simulation.get_evolution()[TIME]) < SSA_STEPS
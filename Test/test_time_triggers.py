@@ -0,0 +1,65 @@
+# Standard Library
+import math
+
+# Third part libraries
+import pytest
+
+# Local Modules
+from conftest import changes
+from Constants import *
+from Gillespie_events import Gillespie
+from Next_reaction_method import NextReactionMethod
+import Time_triggers as time_triggers
+
+TIME_NODE = ("time",)
+
+def number(value):
+    return ("number", value)
+
+def relational(op, left, right):
+    return ("relational", op, left, right)
+
+'''This function returns the transitions of a tree, checked against the predicate itself.'''
+def transitions(tree, parameters=None):
+    predicate, _ = time_triggers.time_predicate(tree, parameters or {})
+    return time_triggers.trigger_transitions(tree, parameters or {}, predicate)
+
+
+def test_greater_than_fires_just_after_the_threshold():
+    assert transitions(relational("gt", TIME_NODE, number(2.0))) == [(math.nextafter(2.0, math.inf), True)]
+
+
+def test_greater_equal_fires_at_the_threshold():
+    assert transitions(relational("ge", TIME_NODE, number(2.0))) == [(2.0, True)]
+
+
+def test_swapped_operands():
+    assert transitions(relational("lt", number(2.0), TIME_NODE)) == [(math.nextafter(2.0, math.inf), True)]
+
+
+def test_falling_edge_and_rise_again():
+    window = ("or", ("and", relational("gt", TIME_NODE, number(1.0)), relational("lt", TIME_NODE, number(2.0))),
+              relational("ge", TIME_NODE, number(4.0)))
+    assert transitions(window) == [(math.nextafter(1.0, math.inf), True), (2.0, False), (4.0, True)]
+
+
+def test_trigger_true_at_start_has_only_the_falling_edge():
+    assert transitions(relational("lt", TIME_NODE, number(3.0))) == [(3.0, False)]
+
+
+def test_parameters_are_read_from_the_values_given():
+    tree = relational("ge", TIME_NODE, ("parameter", "t_dose"))
+    assert transitions(tree, {"t_dose": 5.0}) == [(5.0, True)]
+    assert transitions(tree, {"t_dose": 7.5}) == [(7.5, True)]
+
+
+@pytest.mark.parametrize("engine", [Gillespie, NextReactionMethod])
+def test_events_fire_at_the_transitions(time_events, engine):
+    simulation = engine(time_events, 10, rng=1)
+    simulation.gillespie_ssa()
+    evolution = simulation.get_evolution()
+    assert changes(evolution, "After") == ([math.nextafter(2.0, math.inf)], [1])
+    assert changes(evolution, "At") == ([3.0], [1])
+    # Rises just after 1, falls at 2 and rises again at 4: the event is executed twice
+    assert changes(evolution, "Window") == ([math.nextafter(1.0, math.inf), 4.0], [1, 2])
+
@@ -0,0 +1,70 @@
+# Third part libraries
+import numpy as np
+import pytest
+
+# Local Modules
+from Constants import *
+from Gillespie_vectorized import GillespieVectorized
+from Trajectory_recorder import TrajectoryRecorder
+
+SPECIES = ["A", "B"]
+
+'''Ten steps at times 0.5, 1.5, ..., 9.5: A counts the steps and B is constant.'''
+STEP_TIMES = np.arange(10) + 0.5
+STEP_COUNTS = np.column_stack((np.arange(1, 11), np.full(10, 7)))
+
+def recorded(policy, many=False, **kwargs):
+    recorder = TrajectoryRecorder(SPECIES, policy, **kwargs)
+    recorder.record(0.0, [0, 7])
+    if many:
+        recorder.record_many(STEP_TIMES, STEP_COUNTS)
+    else:
+        for t, counts in zip(STEP_TIMES, STEP_COUNTS):
+            recorder.record(t, counts)
+    return recorder.get_evolution()
+
+
+@pytest.mark.parametrize("many", [False, True])
+def test_every_step_is_recorded(many):
+    evolution = recorded("every", many)
+    np.testing.assert_array_equal(evolution[TIME], np.concatenate(([0.0], STEP_TIMES)))
+    np.testing.assert_array_equal(evolution["A"], np.arange(11))
+    np.testing.assert_array_equal(evolution["B"], np.full(11, 7))
+
+
+@pytest.mark.parametrize("many", [False, True])
+def test_one_step_every_n_and_the_last_state(many):
+    evolution = recorded("every-n", many, every_n=4)
+    # The initial state is the step 0, then the steps 4 and 8, and the last one (10)
+    np.testing.assert_array_equal(evolution[TIME], [0.0, 3.5, 7.5, 9.5])
+    np.testing.assert_array_equal(evolution["A"], [0, 4, 8, 10])
+
+
+@pytest.mark.parametrize("many", [False, True])
+def test_grid_takes_the_last_step_not_later_than_each_time(many):
+    evolution = recorded("grid", many, grid=2.0, t_max=12.0)
+    np.testing.assert_array_equal(evolution[TIME], [0.0, 2.0, 4.0, 6.0, 8.0, 10.0, 12.0])
+    # The state at 2.0 is the one after the step at 1.5; the last state is carried to the end
+    np.testing.assert_array_equal(evolution["A"], [0, 2, 4, 6, 8, 10, 10])
+
+
+def test_non_integer_amounts_promote_the_matrix():
+    recorder = TrajectoryRecorder(SPECIES)
+    recorder.record(0.0, [1, 2])
+    recorder.record(1.0, np.array([1.5, 2.0]))
+    evolution = recorder.get_evolution()
+    assert evolution["A"].dtype == float
+    np.testing.assert_array_equal(evolution["A"], [1.0, 1.5])
+
+
+def test_policies_record_the_same_run(isomerization):
+    evolutions = {}
+    for recording in ("every", "every-n"):
+        simulation = GillespieVectorized(isomerization, 10, recording=recording, every_n=3, rng=1)
+        simulation.gillespie_ssa()
+        evolutions[recording] = simulation.get_evolution()
+    every, every_n = evolutions["every"], evolutions["every-n"]
+    # The policy does not change the run: every third step, and the last one
+    rows = np.unique(np.append(np.arange(0, len(every[TIME]), 3), len(every[TIME]) - 1))
+    for name in (TIME, "A", "B"):
+        np.testing.assert_array_equal(every_n[name], every[name][rows])
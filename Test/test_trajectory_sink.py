@@ -0,0 +1,86 @@
+# Standard Library
+import os
+
+# Third part libraries
+import numpy as np
+import pytest
+
+# Local Modules
+from Constants import *
+from Gillespie_vectorized import GillespieVectorized
+from Trajectory_recorder import TrajectoryRecorder
+from Trajectory_sink import OUTPUT_FORMATS, ChunkedSink
+
+SPECIES = ["A", "B"]
+FORMATS = ["npy", "csv", "chunks"]
+CHUNK = 4
+
+'''Ten steps at times 0.5, 1.5, ..., 9.5 after the initial state: A counts the steps.'''
+TIMES = np.concatenate(([0.0], np.arange(10) + 0.5))
+COUNTS = np.column_stack((np.arange(11), np.full(11, 7)))
+
+def sink(tmp_path, output_format):
+    return OUTPUT_FORMATS[output_format](str(tmp_path / ("trajectory" + OUTPUT_FORMATS[output_format].extension)),
+                                         SPECIES)
+
+def assert_trajectory(evolution, times=TIMES, counts=COUNTS):
+    np.testing.assert_array_equal(evolution[TIME], times)
+    for i, s_id in enumerate(SPECIES):
+        np.testing.assert_array_equal(evolution[s_id], counts[:, i])
+
+
+@pytest.mark.parametrize("output_format", FORMATS)
+def test_steps_are_flushed_in_chunks(tmp_path, output_format):
+    output = sink(tmp_path, output_format)
+    recorder = TrajectoryRecorder(SPECIES, sink=output, chunk_size=CHUNK)
+    for t, counts in zip(TIMES, COUNTS):
+        recorder.record(t, counts)
+        assert recorder.size <= CHUNK
+    # Two full chunks are in the sink, the rest in memory
+    assert output.rows == 2 * CHUNK
+    assert_trajectory(recorder.get_evolution())
+
+    recorder.close()
+    assert_trajectory(output.read())
+    if output_format == "chunks":
+        assert len(output.chunk_files()) == 3
+
+
+@pytest.mark.parametrize("output_format", FORMATS)
+def test_many_steps_longer_than_a_chunk(tmp_path, output_format):
+    output = sink(tmp_path, output_format)
+    recorder = TrajectoryRecorder(SPECIES, "every-n", every_n=2, sink=output, chunk_size=CHUNK)
+    recorder.record_many(TIMES[:3], COUNTS[:3])
+    recorder.record_many(TIMES[3:], COUNTS[3:])
+    recorder.close()
+    assert_trajectory(output.read(), TIMES[::2], COUNTS[::2])
+
+
+def test_a_new_trajectory_replaces_the_chunks(tmp_path):
+    output = ChunkedSink(str(tmp_path / "chunks"), SPECIES)
+    recorder = TrajectoryRecorder(SPECIES, sink=output, chunk_size=CHUNK)
+    recorder.record_many(TIMES, COUNTS)
+    recorder.close()
+
+    output.open()
+    recorder = TrajectoryRecorder(SPECIES, sink=output, chunk_size=CHUNK)
+    recorder.record_many(TIMES[:2], COUNTS[:2])
+    recorder.close()
+    assert_trajectory(output.read(), TIMES[:2], COUNTS[:2])
+    assert len(output.chunk_files()) == 1
+
+
+@pytest.mark.parametrize("output_format", FORMATS)
+def test_engine_output_equals_the_trajectory_in_memory(isomerization, tmp_path, output_format):
+    in_memory = GillespieVectorized(isomerization, 10, rng=1)
+    in_memory.gillespie_ssa()
+    expected = in_memory.get_evolution()
+
+    path = str(tmp_path / ("run" + OUTPUT_FORMATS[output_format].extension))
+    simulation = GillespieVectorized(isomerization, 10, rng=1, output=path, output_format=output_format)
+    simulation.gillespie_ssa()
+    simulation.close_output()
+    assert os.path.exists(path)
+    written = simulation.output.read()
+    for name in (TIME, "A", "B"):
+        np.testing.assert_array_equal(written[name], expected[name])
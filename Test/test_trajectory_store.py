@@ -0,0 +1,65 @@
+# Third part libraries
+import numpy as np
+import pytest
+
+# Local Modules
+from Constants import *
+from Trajectory_sink import StoreSink
+from Trajectory_store import TrajectoryStore, TIME_INDEX_STRIDE
+
+SPECIES = ["A", "B"]
+ROWS = 3 * TIME_INDEX_STRIDE + 100     # Long enough to use several entries of the time index
+
+'''A store with two replicates recorded at the times 0, 1, ..., ROWS - 1: in the first
+A = t and B = 2t, in the second A = -t and B = 0.'''
+@pytest.fixture
+def store(tmp_path):
+    path = str(tmp_path / "trajectories.rstore")
+    times = np.arange(ROWS, dtype=float)
+    sink = StoreSink(path, SPECIES)
+    # The first replicate is written in two parts, as the chunks of a recorder
+    sink.write(times[:1000], np.column_stack((times[:1000], 2 * times[:1000])))
+    sink.write(times[1000:], np.column_stack((times[1000:], 2 * times[1000:])))
+    sink.new_replicate()
+    sink.write(times, np.column_stack((-times, np.zeros(ROWS))))
+    sink.close()
+    return TrajectoryStore(path)
+
+
+def test_replicates_and_whole_trajectory(store):
+    assert len(store) == 2
+    evolution = store.get_evolution(0)
+    np.testing.assert_array_equal(evolution[TIME], np.arange(ROWS))
+    np.testing.assert_array_equal(evolution["B"], 2 * np.arange(ROWS))
+
+
+def test_window_starts_at_the_state_before_its_start(store):
+    # The state at 5000.5 is the record at 5000; the last record not later than 6000 is included
+    evolution = store.query(t_start=5000.5, t_end=6000)
+    np.testing.assert_array_equal(evolution[TIME], np.arange(5000, 6001))
+    np.testing.assert_array_equal(evolution["A"], np.arange(5000, 6001))
+
+
+def test_window_on_a_record_and_across_the_time_index(store):
+    start = TIME_INDEX_STRIDE - 1
+    evolution = store.query(["B"], t_start=start, t_end=2 * TIME_INDEX_STRIDE + 1, replicate=1)
+    assert list(evolution) == [TIME, "B"]
+    np.testing.assert_array_equal(evolution[TIME], np.arange(start, 2 * TIME_INDEX_STRIDE + 2))
+
+
+def test_window_outside_the_trajectory(store):
+    assert store.window(0, -10, -5) == (0, 0)
+    assert store.window(0, None, 2.5) == (0, 3)
+    assert store.window(0, ROWS + 10, None) == (ROWS - 1, ROWS)
+    assert store.window(-1) == (0, ROWS)
+
+
+def test_mean_of_the_replicates(store):
+    mean = store.mean_evolution()
+    np.testing.assert_array_equal(mean["A"], np.zeros(ROWS))
+    np.testing.assert_array_equal(mean["B"], np.arange(ROWS))
+
+
+def test_unknown_species(store):
+    with pytest.raises(Exception, match="not found"):
+        store.query(["C"])
@@ -0,0 +1,103 @@
+# Standard Library
+from collections import Counter
+
+# Third part libraries
+import pytest
+
+# Local Modules
+from conftest import model_path
+from Constants import *
+from Gillespie_events import Gillespie
+from Gillespie_batched import GillespieBatched
+from Gillespie_vectorized import GillespieVectorized
+import Parser
+
+SPECIES_C = '''
+      <species id="C" compartment="cell" initialAmount="0" substanceUnits="item"
+               hasOnlySubstanceUnits="true" boundaryCondition="false" constant="false"/>
+    </listOfSpecies>'''
+
+EVENTS = '''
+    <listOfEvents>
+      <event id="low">
+        <trigger>
+          <math xmlns="http://www.w3.org/1998/Math/MathML">
+            <apply> <lt/> <ci> A </ci> <cn type="integer"> 150 </cn> </apply>
+          </math>
+        </trigger>
+        <listOfEventAssignments>
+          <eventAssignment variable="C">
+            <math xmlns="http://www.w3.org/1998/Math/MathML"> <cn type="integer"> 10 </cn> </math>
+          </eventAssignment>
+        </listOfEventAssignments>
+      </event>
+      <event id="flag">
+        <trigger>
+          <math xmlns="http://www.w3.org/1998/Math/MathML">
+            <apply> <gt/> <ci> C </ci> <cn type="integer"> 5 </cn> </apply>
+          </math>
+        </trigger>
+        <listOfEventAssignments>
+          <eventAssignment variable="k2">
+            <math xmlns="http://www.w3.org/1998/Math/MathML"> <cn type="real"> 0.05 </cn> </math>
+          </eventAssignment>
+        </listOfEventAssignments>
+      </event>
+    </listOfEvents>
+  </model>'''
+
+'''The isomerization with a species C that no reaction changes: the trigger of "low"
+reads A, changed by every reaction, the trigger of "flag" reads only C, set by "low".'''
+@pytest.fixture(scope="module")
+def flagged(tmp_path_factory):
+    with open(model_path("isomerization_p.xml")) as sbml_file:
+        text = sbml_file.read()
+    text = text.replace("\n    </listOfSpecies>", SPECIES_C, 1).replace("\n  </model>", EVENTS, 1)
+    path = tmp_path_factory.mktemp("models") / "flagged_p.xml"
+    path.write_text(text)
+    return Parser.Parser(str(path)).get_model_spec()
+
+'''This function runs a simulation and returns the number of evaluations of every trigger.'''
+def trigger_evaluations(simulation):
+    triggers = {event[TRIGGER_CODE]: event[ID] for event in simulation.model.events}
+    evaluations = Counter()
+    evaluate_expr = simulation.evaluate_expr
+    def counting(code, *args, **kwargs):
+        if code in triggers:
+            evaluations[triggers[code]] += 1
+        return evaluate_expr(code, *args, **kwargs)
+    simulation.evaluate_expr = counting
+    simulation.gillespie_ssa()
+    return evaluations
+
+
+def test_trigger_dependencies(flagged):
+    assert {event[ID]: set(event[TRIGGER_DEPENDENCIES]) for event in flagged.events} == {"low": {"A"}, "flag": {"C"}}
+
+
+@pytest.mark.parametrize("engine", [Gillespie, GillespieVectorized])
+def test_unchanged_triggers_are_skipped(flagged, engine):
+    simulation = engine(flagged, 10, rng=1)
+    evaluations = trigger_evaluations(simulation)
+    evolution = simulation.get_evolution()
+    steps = len(evolution[TIME])
+
+    # "low" is evaluated at every step; "flag" at the first one, when C is set and once
+    # more when it is executed, but never after the reactions
+    assert evolution["C"][-1] == 10
+    assert evaluations["low"] >= steps - 2
+    assert evaluations["flag"] == 3
+
+
+def test_batched_engine_skips_unchanged_triggers(flagged):
+    simulation = GillespieBatched(flagged, 10, replicates=8, rng=1)
+    iterations = []
+    compute_propensities = simulation.compute_propensities
+    simulation.compute_propensities = lambda: iterations.append(1) or compute_propensities()
+    evaluations = trigger_evaluations(simulation)
+
+    # The trigger of "flag" is evaluated again only at the iterations in which C is set in some
+    # replicate (and when it is executed), not after every reaction
+    assert (simulation.get_counts()[:, -1, simulation.species_index["C"]] == 10).all()
+    assert evaluations["low"] >= len(iterations) - 2
+    assert evaluations["flag"] <= 1 + 2 * 8
@@ -0,0 +1,47 @@
+# Standard Library
+import os
+
+# Third part libraries
+import pytest
+
+# Local Modules
+from Constants import *
+from Gillespie_events import Gillespie
+from Gillespie_vectorized import GillespieVectorized
+from Next_reaction_method import NextReactionMethod
+from Wall_clock_budget import WallClockBudget, CHECK_EVERY
+
+
+def test_clock_is_read_once_every_check_every_calls(monkeypatch):
+    budget = WallClockBudget(1e-9, check_every=3)
+    readings = []
+    monkeypatch.setattr(WallClockBudget, "exceeded", lambda self: readings.append(1) or True)
+    assert [budget.expired() for _ in range(6)] == [False, False, True, False, False, True]
+    assert len(readings) == 2
+
+
+def test_no_budget_never_expires():
+    budget = WallClockBudget()
+    assert not any(budget.expired() for _ in range(2 * CHECK_EVERY)) and not budget.exceeded()
+    with pytest.raises(Exception):
+        WallClockBudget(0)
+
+
+@pytest.mark.parametrize("engine", [Gillespie, GillespieVectorized, NextReactionMethod])
+def test_run_is_truncated_without_checkpoint(isomerization, engine, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    simulation = engine(isomerization, 1000, rng=1, max_wall_time=1e-9)
+    simulation.gillespie_ssa()
+
+    # The run stops at the first reading of the clock, keeping what it computed
+    evolution = simulation.get_evolution()
+    assert simulation.truncated_at is not None and simulation.truncated_at < 1000
+    assert simulation.status == STATUS_TRUNCATED.format(simulation.truncated_at)
+    assert len(evolution[TIME]) == CHECK_EVERY and evolution[TIME][-1] == simulation.truncated_at
+    assert os.listdir(tmp_path) == []
+
+    # Without a budget the same simulation goes on to t_max
+    simulation.set_run_limits()
+    simulation.gillespie_ssa()
+    assert simulation.status == STATUS_COMPLETED
+    assert simulation.t >= 1000 and len(simulation.get_evolution()[TIME]) > CHECK_EVERY
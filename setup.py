@@ -15,6 +15,9 @@ setup(
         "libroadrunner",
         "scipy"
     ],
+    extras_require={
+        "jit": ["numba"]
+    },
     python_requires=">=3.7",
     entry_points={
         "console_scripts": [